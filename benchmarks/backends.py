@@ -0,0 +1,120 @@
+import uuid
+from contextlib import AsyncExitStack
+from datetime import datetime, timedelta
+
+import arrow
+from fastapi import FastAPI
+from sqlalchemy import text
+
+from benchmarks.fakes import InMemoryRecordRepository, InMemoryUserRepository, summary_rows
+from dependency.db import get_session_factory
+from dependency.partition import get_record_partitions
+from dependency.repository import get_record_repository, get_user_repository
+from repository.asyncpg_record import AsyncpgRecordRepository
+from repository.record import RecordRepository
+from repository.user import UserRepository
+
+START = datetime(2024, 1, 1)
+
+
+def _timestamp(date: datetime) -> int:
+    # Naive datetimes are UTC throughout the app
+    return arrow.get(date).int_timestamp
+
+
+class MemoryBackend:
+    # Repositories answering from memory, isolates the Python side of the hot paths
+    name = "memory"
+
+    def __init__(self, sizes: tuple[int, ...]):
+        self.__user_ids = {size: f"bench-{size}" for size in sizes}
+        self.__record_repo = InMemoryRecordRepository(
+            {user_id: summary_rows(user_id, size, START) for size, user_id in self.__user_ids.items()}
+        )
+        self.__user_repo = InMemoryUserRepository(list(self.__user_ids.values()))
+
+    async def __aenter__(self) -> "MemoryBackend":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+    def summary_target(self, size: int) -> tuple[str, int, int]:
+        return self.__user_ids[size], _timestamp(START), _timestamp(START + timedelta(hours=size))
+
+    def record_repository(self) -> InMemoryRecordRepository:
+        return self.__record_repo
+
+    def record_repositories(self) -> dict[str | None, InMemoryRecordRepository]:
+        return {None: self.__record_repo}
+
+    def user_repository(self) -> InMemoryUserRepository:
+        return self.__user_repo
+
+    async def install(self, app: FastAPI, stack: AsyncExitStack) -> None:
+        app.dependency_overrides[get_record_repository] = self.record_repository
+        app.dependency_overrides[get_user_repository] = self.user_repository
+        # There are no partitions to create without a database
+        app.dependency_overrides[get_record_partitions] = lambda: None
+        stack.callback(app.dependency_overrides.clear)
+
+
+class PostgresBackend:
+    # The database from the POSTGRES_* settings (docker-compose.yml locally), migrated to head.
+    # One benchmark user gets an hourly record for max(sizes) hours, kept between runs.
+    name = "postgres"
+    USER_ID = "00000000-0000-4000-8000-00000000b001"
+
+    def __init__(self, sizes: tuple[int, ...]):
+        self.__hours = max(sizes)
+        self.__stack = AsyncExitStack()
+
+    async def __aenter__(self) -> "PostgresBackend":
+        self.__session = await self.__stack.enter_async_context(get_session_factory()())
+        await self.__seed()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.__stack.aclose()
+
+    async def __seed(self) -> None:
+        await self.__session.execute(
+            text(
+                "INSERT INTO users (user_id, username, created_at) VALUES (:user_id, :username, now()) "
+                "ON CONFLICT DO NOTHING"
+            ),
+            {"user_id": uuid.UUID(self.USER_ID), "username": "benchmark"},
+        )
+        await self.__session.commit()
+        repository = RecordRepository(self.__session)
+        for offset in range(0, self.__hours, 1000):
+            # Existing records are skipped, so only the first run pays for the seeding
+            await repository.create_records(
+                [
+                    {
+                        "user_id": self.USER_ID,
+                        "record_id": f"benchmark-{hour}",
+                        "word_count": (hour * 37) % 500,
+                        "study_time": (hour * 101) % 7200,
+                        "date": START + timedelta(hours=hour, minutes=15),
+                    }
+                    for hour in range(offset, min(offset + 1000, self.__hours))
+                ]
+            )
+
+    def summary_target(self, size: int) -> tuple[str, int, int]:
+        return self.USER_ID, _timestamp(START), _timestamp(START + timedelta(hours=size))
+
+    def record_repository(self) -> RecordRepository:
+        return RecordRepository(self.__session)
+
+    def record_repositories(self) -> dict[str | None, RecordRepository]:
+        # The SUMMARY_QUERY implementations
+        return {"sqlalchemy": RecordRepository(self.__session), "asyncpg": AsyncpgRecordRepository(self.__session)}
+
+    def user_repository(self) -> UserRepository:
+        return UserRepository(self.__session)
+
+    async def install(self, app: FastAPI, stack: AsyncExitStack) -> None:
+        # The app keeps its own engine, caches and background tasks as in production
+        await stack.enter_async_context(app.router.lifespan_context(app))
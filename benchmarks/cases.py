@@ -0,0 +1,220 @@
+import random
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+import arrow
+import httpx
+import jwt
+from fastapi.datastructures import Headers
+from fastapi.responses import JSONResponse
+
+from api.auth.authenticator import JsonWebTokenAuthenticator
+from api.v1.user.encoder import encode_summaries, encode_summary_columns
+from api.v1.user.schema import GetUserSummaryResponse
+from cache.summary import SummaryCache
+from cache.token import TokenCache
+from constant.granularity import Granularity
+from constant.moving_average import MovingAverage
+from dependency.cache import get_summary_cache
+from service.user import UserService
+from util.cursor import encode_cursor
+
+SIZES = (100, 1000, 10000)
+PAGE_SIZE = 100
+WINDOWS = (
+    (None, MovingAverage.SMA),
+    (7, MovingAverage.SMA),
+    (30, MovingAverage.SMA),
+    ((7, 30, 90), MovingAverage.SMA),
+    (30, MovingAverage.EMA),
+    (30, MovingAverage.WMA),
+)
+
+
+@dataclass
+class Case:
+    name: str
+    params: dict[str, Any]
+    run: Callable[[], Awaitable[Any]]
+    setup: Callable[[], Awaitable[Any]] | None = None
+    teardown: Callable[[], Awaitable[Any]] | None = None
+
+    @property
+    def key(self) -> str:
+        params = ",".join(f"{name}={value}" for name, value in self.params.items())
+        return f"{self.name}[{params}]" if params else self.name
+
+
+@dataclass
+class Result:
+    key: str
+    name: str
+    params: dict[str, Any]
+    calls: int
+    total_s: float
+    latencies_ns: list[int] = field(repr=False)
+
+    def as_dict(self) -> dict[str, Any]:
+        latencies = sorted(self.latencies_ns)
+        return {
+            "key": self.key,
+            "name": self.name,
+            "params": self.params,
+            "calls": self.calls,
+            "ops_per_s": round(self.calls / self.total_s, 2),
+            "mean_ms": round(sum(latencies) / len(latencies) / 1e6, 4),
+            "median_ms": round(latencies[len(latencies) // 2] / 1e6, 4),
+            "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] / 1e6, 4),
+            "min_ms": round(latencies[0] / 1e6, 4),
+        }
+
+
+async def measure(case: Case, min_time: float, min_calls: int = 5, warmup: int = 2) -> Result:
+    if case.setup is not None:
+        await case.setup()
+    try:
+        for _ in range(warmup):
+            await case.run()
+        latencies = []
+        started = time.perf_counter()
+        while len(latencies) < min_calls or time.perf_counter() - started < min_time:
+            start = time.perf_counter_ns()
+            await case.run()
+            latencies.append(time.perf_counter_ns() - start)
+        total = time.perf_counter() - started
+    finally:
+        if case.teardown is not None:
+            await case.teardown()
+    return Result(case.key, case.name, case.params, len(latencies), total, latencies)
+
+
+def summary_cases(backend) -> list[Case]:
+    # UserService.get_user_summary without caches: repository call plus moving averages,
+    # for every record repository implementation of the backend
+    cases = []
+    for size in SIZES:
+        user_id, start, end = backend.summary_target(size)
+        for n, method in WINDOWS:
+            for repository_name, record_repository in backend.record_repositories().items():
+                service = UserService(record_repository, backend.user_repository())
+
+                async def run(service=service, user_id=user_id, start=start, end=end, n=n, method=method):
+                    return await service.get_user_summary(user_id, start, end, Granularity.HOUR, n=n, method=method)
+
+                window = ",".join(map(str, n)) if isinstance(n, tuple) else n
+                params = {"buckets": size, "n": window, "method": str(method)}
+                if repository_name is not None:
+                    params["repository"] = repository_name
+                cases.append(Case("summary", params, run))
+    return cases
+
+
+def summary_page_cases(backend) -> list[Case]:
+    # UserService.get_user_summary_page without caches: the page in the middle of the range, its SMA warmed up
+    # by the n - 1 buckets before it
+    cases = []
+    for size in SIZES:
+        user_id, start, end = backend.summary_target(size)
+        after = encode_cursor(arrow.get(start).shift(hours=size // 2 - 1).naive)
+        for repository_name, record_repository in backend.record_repositories().items():
+            service = UserService(record_repository, backend.user_repository())
+
+            async def run(service=service, user_id=user_id, start=start, end=end, after=after):
+                return await service.get_user_summary_page(
+                    user_id, start, end, Granularity.HOUR, PAGE_SIZE, after, n=30, method=MovingAverage.SMA
+                )
+
+            params = {"buckets": size, "limit": PAGE_SIZE, "n": 30}
+            if repository_name is not None:
+                params["repository"] = repository_name
+            cases.append(Case("summary_page", params, run))
+    return cases
+
+
+async def _summaries(backend, size: int) -> list[dict[str, Any]]:
+    user_id, start, end = backend.summary_target(size)
+    service = UserService(backend.record_repository(), backend.user_repository())
+    return await service.get_user_summary(user_id, start, end, Granularity.HOUR, n=[7, 30])
+
+
+async def serialization_cases(backend) -> list[Case]:
+    cases = []
+    for size in SIZES:
+        summaries = await _summaries(backend, size)
+
+        async def model(summaries=summaries):
+            content = GetUserSummaryResponse(summary=summaries, total=len(summaries)).model_dump(mode="json")
+            return JSONResponse(content=content).body
+
+        async def rows(summaries=summaries):
+            return encode_summaries(summaries)
+
+        async def columns(summaries=summaries):
+            return encode_summary_columns(summaries)
+
+        for encoder, run in (("model", model), ("rows", rows), ("columns", columns)):
+            cases.append(Case("serialize", {"buckets": size, "encoder": encoder}, run))
+    return cases
+
+
+def _token() -> str:
+    return jwt.encode({"user_id": "bench", "exp": arrow.utcnow().int_timestamp + 3600}, key="", algorithm="HS256")
+
+
+def auth_cases() -> list[Case]:
+    headers = Headers({"Authorization": f"Bearer {_token()}"})
+    cases = []
+    for cached, authenticator in (
+        (False, JsonWebTokenAuthenticator(quiet=True)),
+        (True, JsonWebTokenAuthenticator(TokenCache(1024), quiet=True)),
+    ):
+
+        async def run(authenticator=authenticator):
+            return authenticator.verify(headers)
+
+        cases.append(Case("auth_verify", {"cached": cached}, run))
+    return cases
+
+
+def e2e_cases(backend, app) -> list[Case]:
+    # Whole requests through the ASGI app and its middleware, in process
+    headers = {"Authorization": f"Bearer {_token()}"}
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", headers=headers)
+    user_id, start, end = backend.summary_target(1000)
+    params = {"start": start, "end": end, "granularity": "hour", "n": "7,30"}
+    counter = iter(range(10**9))
+    # Records unique to this run so every one is created, also when the database keeps earlier runs' records
+    nonce = random.SystemRandom().randrange(1, 10**9)
+    base_timestamp = arrow.utcnow().int_timestamp - 86400 * 365
+    etags = {}
+
+    async def summary():
+        response = await client.get(f"/api/v1/users/{user_id}/summary", params=params)
+        response.raise_for_status()
+
+    async def summary_not_modified():
+        # A poll revalidating the ETag of the previous poll, as long as no record is written in between
+        response = await client.get(
+            f"/api/v1/users/{user_id}/summary", params=params, headers={"If-None-Match": etags.get("summary", "")}
+        )
+        etags["summary"] = response.headers["ETag"]
+
+    async def create_record():
+        body = {"word_count": nonce, "study_time": 60, "timestamp": base_timestamp - next(counter)}
+        response = await client.post(f"/api/v1/records/{user_id}", json=body)
+        response.raise_for_status()
+
+    async def without_summary_cache():
+        app.dependency_overrides[get_summary_cache] = lambda: SummaryCache(0, 0)
+
+    async def with_summary_cache():
+        app.dependency_overrides.pop(get_summary_cache, None)
+
+    return [
+        Case("e2e_summary", {"buckets": 1000, "cache": False}, summary, without_summary_cache, with_summary_cache),
+        Case("e2e_summary", {"buckets": 1000, "cache": True}, summary),
+        Case("e2e_summary_not_modified", {"buckets": 1000}, summary_not_modified),
+        Case("e2e_create_record", {}, create_record),
+    ]
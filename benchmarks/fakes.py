@@ -0,0 +1,100 @@
+import bisect
+from collections.abc import AsyncIterator, Sequence
+from datetime import datetime, timedelta
+from typing import Any, NamedTuple
+
+
+class SummaryRow(NamedTuple):
+    user_id: str
+    bucket: datetime
+    total_words: int
+    total_time: int
+
+
+class WriteResult(NamedTuple):
+    record_id: str
+    user_exists: bool
+    created: bool
+
+
+class User(NamedTuple):
+    user_id: str
+
+
+def summary_rows(user_id: str, count: int, start: datetime = datetime(2024, 1, 1)) -> list[SummaryRow]:
+    # Deterministic hourly buckets, the same on every run
+    return [SummaryRow(user_id, start + timedelta(hours=i), (i * 37) % 500, (i * 101) % 7200) for i in range(count)]
+
+
+class InMemoryRecordRepository:
+    # Stands in for RecordRepository: summaries are pre-built per user and returned whatever the range,
+    # writes are acknowledged without being kept
+    def __init__(self, summaries: dict[str, list[SummaryRow]]):
+        self.__summaries = summaries
+
+    async def get_record_summary(
+        self,
+        user_id: str,
+        start: datetime,
+        end: datetime,
+        granularity: Any,
+        sma_windows: Sequence[int] = (),
+        statistics: bool = False,
+    ) -> list[SummaryRow]:
+        return self.__summaries.get(user_id, [])
+
+    async def get_record_summary_page(
+        self,
+        user_id: str,
+        start: datetime,
+        end: datetime,
+        granularity: Any,
+        limit: int,
+        after: datetime | None = None,
+        lookback: int | None = 0,
+        statistics: bool = False,
+    ) -> list[SummaryRow]:
+        rows = self.__summaries.get(user_id, [])
+        position = 0 if after is None else bisect.bisect_right(rows, after, key=lambda row: row.bucket)
+        first = 0 if lookback is None else max(position - lookback, 0)
+        return rows[first : position + limit]
+
+    async def get_record_summaries(
+        self, user_ids: Sequence[str], start: datetime, end: datetime, granularity: Any
+    ) -> list[SummaryRow]:
+        return [row for user_id in user_ids for row in self.__summaries.get(user_id, [])]
+
+    async def stream_record_summary(
+        self,
+        user_id: str,
+        start: datetime,
+        end: datetime,
+        granularity: Any,
+        sma_windows: Sequence[int] = (),
+        statistics: bool = False,
+    ) -> AsyncIterator[SummaryRow]:
+        for row in self.__summaries.get(user_id, []):
+            yield row
+
+    async def create_record(
+        self, user_id: str, record_id: str, word_count: int, study_time: int, date: datetime
+    ) -> WriteResult:
+        return WriteResult(record_id, True, True)
+
+    async def create_records(self, records: list[dict[str, Any]]) -> list[WriteResult]:
+        return [WriteResult(record["record_id"], True, True) for record in records]
+
+
+class InMemoryUserRepository:
+    def __init__(self, user_ids: Sequence[str]):
+        self.__user_ids = set(user_ids)
+
+    async def get_user(self, user_id: str) -> User | None:
+        return User(user_id) if user_id in self.__user_ids else None
+
+    async def get_record_version(self, user_id: str) -> int | None:
+        # Writes are not kept, so the records never change
+        return 0 if user_id in self.__user_ids else None
+
+    async def get_users(self, user_ids: Sequence[str]) -> list[User]:
+        return [User(user_id) for user_id in user_ids if user_id in self.__user_ids]
@@ -0,0 +1,122 @@
+"""Benchmarks of the summary and ingest hot paths.
+
+    python benchmarks/run.py --backend memory --output bench.json
+    python benchmarks/run.py --backend postgres --output bench-pg.json --compare bench-pg-main.json
+
+The memory backend answers from in-process repository fakes, the postgres backend uses the database from the
+POSTGRES_* settings (docker-compose.yml locally) migrated to head.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import subprocess
+import sys
+from contextlib import AsyncExitStack
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+sys.path.insert(0, str(project_root))
+
+import arrow  # noqa: E402
+
+from benchmarks.backends import MemoryBackend, PostgresBackend  # noqa: E402
+from benchmarks.cases import (  # noqa: E402
+    SIZES,
+    Case,
+    auth_cases,
+    e2e_cases,
+    measure,
+    serialization_cases,
+    summary_cases,
+    summary_page_cases,
+)
+from dependency.db import dispose_engine  # noqa: E402
+
+GROUPS = ("summary", "serialize", "auth", "e2e")
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=project_root, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _cases(group: str, backend, stack: AsyncExitStack) -> list[Case]:
+    if group == "summary":
+        return summary_cases(backend) + summary_page_cases(backend)
+    if group == "serialize":
+        return await serialization_cases(backend)
+    if group == "auth":
+        return auth_cases()
+    from main import app
+
+    await backend.install(app, stack)
+    return e2e_cases(backend, app)
+
+
+async def run(args: argparse.Namespace) -> list[dict]:
+    backend_class = MemoryBackend if args.backend == "memory" else PostgresBackend
+    results = []
+    async with backend_class(SIZES) as backend:
+        for group in args.groups:
+            async with AsyncExitStack() as stack:
+                for case in await _cases(group, backend, stack):
+                    if args.filter and args.filter not in case.key:
+                        continue
+                    result = (await measure(case, args.min_time)).as_dict()
+                    results.append(result)
+                    print(
+                        f"{result['key']:<60} {result['median_ms']:>10.3f} ms median "
+                        f"{result['p95_ms']:>10.3f} ms p95 {result['ops_per_s']:>12.1f} ops/s"
+                    )
+    await dispose_engine()
+    return results
+
+
+def compare(results: list[dict], baseline_path: Path) -> None:
+    baseline = {result["key"]: result for result in json.loads(baseline_path.read_text())["results"]}
+    print(f"\nMedian against {baseline_path}:")
+    for result in results:
+        base = baseline.get(result["key"])
+        if base is None:
+            continue
+        change = (result["median_ms"] - base["median_ms"]) / base["median_ms"] * 100
+        print(f"{result['key']:<60} {base['median_ms']:>10.3f} -> {result['median_ms']:>10.3f} ms {change:>+8.1f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=("memory", "postgres"), default="memory")
+    parser.add_argument("--groups", nargs="+", choices=GROUPS, default=list(GROUPS))
+    parser.add_argument("--filter", help="Only run the cases whose key contains this text")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Seconds each case runs for at least")
+    parser.add_argument("--output", type=Path, help="Write the results as JSON to this file")
+    parser.add_argument("--compare", type=Path, help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    results = asyncio.run(run(args))
+    if args.output:
+        report = {
+            "meta": {
+                "backend": args.backend,
+                "commit": _git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "created_at": arrow.utcnow().isoformat(),
+                "min_time": args.min_time,
+            },
+            "results": results,
+        }
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
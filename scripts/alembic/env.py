@@ -9,7 +9,7 @@ from dependency.setting import get_settings
 # Import your Base
 from model.base import Base
 
-from model import user, record
+from model import user, record, record_rollup
 config = context.config
 settings = get_settings()
 DATABASE_URL = f"postgresql+asyncpg://{settings.postgres_user}:{settings.postgres_password}@{settings.postgres_host}:{settings.postgres_port}/{settings.postgres_db}"
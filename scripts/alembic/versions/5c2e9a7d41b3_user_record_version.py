@@ -0,0 +1,29 @@
+"""user record version
+
+Revision ID: 5c2e9a7d41b3
+Revises: 8bf153229a73
+Create Date: 2026-10-18 14:12:37.905126
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2e9a7d41b3'
+down_revision: Union[str, Sequence[str], None] = '8bf153229a73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A constant default, so existing rows are not rewritten
+    op.add_column('users', sa.Column('record_version', sa.BigInteger(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'record_version')
@@ -0,0 +1,112 @@
+"""partition records
+
+Revision ID: 8bf153229a73
+Revises: e1f13066173e
+Create Date: 2026-10-18 10:02:41.730514
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8bf153229a73'
+down_revision: Union[str, Sequence[str], None] = 'e1f13066173e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Creates the monthly partitions records_YYYY_MM covering [start_month, end_month]. Rows already sitting in
+# records_default for a new month are moved into its partition, so the function can always be re-run.
+ENSURE_PARTITIONS = """
+CREATE OR REPLACE FUNCTION records_ensure_partitions(start_month timestamp, end_month timestamp) RETURNS integer AS $$
+DECLARE
+    month timestamp := date_trunc('month', start_month);
+    partition text;
+    created integer := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('records_ensure_partitions'));
+    WHILE month <= date_trunc('month', end_month) LOOP
+        partition := 'records_' || to_char(month, 'YYYY_MM');
+        IF to_regclass(partition) IS NULL THEN
+            CREATE TEMP TABLE records_moved (LIKE records) ON COMMIT DROP;
+            WITH moved AS (
+                DELETE FROM records_default WHERE date >= month AND date < month + interval '1 month' RETURNING *
+            )
+            INSERT INTO records_moved SELECT * FROM moved;
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF records FOR VALUES FROM (%L) TO (%L)',
+                partition, month, month + interval '1 month'
+            );
+            INSERT INTO records SELECT * FROM records_moved;
+            DROP TABLE records_moved;
+            created := created + 1;
+        END IF;
+        month := month + interval '1 month';
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.rename_table('records', 'records_unpartitioned')
+    op.execute('ALTER TABLE records_unpartitioned RENAME CONSTRAINT records_pkey TO records_unpartitioned_pkey')
+    op.drop_index('ix_records_id', table_name='records_unpartitioned')
+    op.drop_index('ix_records_record_id', table_name='records_unpartitioned')
+    op.drop_index('ix_records_user_id', table_name='records_unpartitioned')
+
+    # The partition key has to be part of every unique constraint. record_id hashes the record timestamp in
+    # seconds and date is stored at that second, so (record_id, date) is as unique as record_id alone.
+    op.create_table('records',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('records_id_seq')"), nullable=False),
+    sa.Column('record_id', sa.String(), nullable=True),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('word_count', sa.Integer(), nullable=False),
+    sa.Column('study_time', sa.Integer(), nullable=False),
+    sa.Column('date', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id', 'date'),
+    postgresql_partition_by='RANGE (date)'
+    )
+    op.execute('ALTER SEQUENCE records_id_seq OWNED BY records.id')
+    op.create_index('ix_records_record_id', 'records', ['record_id', 'date'], unique=True)
+    op.create_index('ix_records_user_id_date', 'records', ['user_id', 'date'], unique=False)
+    op.execute('CREATE TABLE records_default PARTITION OF records DEFAULT')
+    op.execute(ENSURE_PARTITIONS)
+
+    op.execute(
+        """
+        SELECT records_ensure_partitions(coalesce(min(date), now()::timestamp), now()::timestamp + interval '3 months')
+        FROM records_unpartitioned
+        """
+    )
+    op.execute('INSERT INTO records SELECT * FROM records_unpartitioned')
+    op.drop_table('records_unpartitioned')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.rename_table('records', 'records_partitioned')
+    op.execute('ALTER TABLE records_partitioned RENAME CONSTRAINT records_pkey TO records_partitioned_pkey')
+    op.drop_index('ix_records_record_id', table_name='records_partitioned')
+    op.drop_index('ix_records_user_id_date', table_name='records_partitioned')
+
+    op.create_table('records',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('records_id_seq')"), nullable=False),
+    sa.Column('record_id', sa.String(), nullable=True),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('word_count', sa.Integer(), nullable=False),
+    sa.Column('study_time', sa.Integer(), nullable=False),
+    sa.Column('date', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute('INSERT INTO records SELECT * FROM records_partitioned')
+    op.execute('ALTER SEQUENCE records_id_seq OWNED BY records.id')
+    op.create_index(op.f('ix_records_id'), 'records', ['id'], unique=False)
+    op.create_index(op.f('ix_records_record_id'), 'records', ['record_id'], unique=True)
+    op.create_index(op.f('ix_records_user_id'), 'records', ['user_id'], unique=False)
+    op.drop_table('records_partitioned')
+    op.execute('DROP FUNCTION records_ensure_partitions(timestamp, timestamp)')
@@ -0,0 +1,46 @@
+"""record rollups
+
+Revision ID: e1f13066173e
+Revises: 04599f02be05
+Create Date: 2026-10-18 09:30:12.418207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1f13066173e'
+down_revision: Union[str, Sequence[str], None] = '04599f02be05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('record_rollups',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('granularity', sa.String(), nullable=False),
+    sa.Column('bucket', sa.DateTime(), nullable=False),
+    sa.Column('word_count', sa.BigInteger(), nullable=False),
+    sa.Column('study_time', sa.BigInteger(), nullable=False),
+    sa.Column('record_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'granularity', 'bucket')
+    )
+    # Backfill from the records written before the rollups existed
+    op.execute(
+        """
+        INSERT INTO record_rollups (user_id, granularity, bucket, word_count, study_time, record_count)
+        SELECT r.user_id, g.granularity, date_trunc(g.granularity, r.date), sum(r.word_count), sum(r.study_time), count(*)
+        FROM records r
+        CROSS JOIN (VALUES ('hour'), ('day'), ('week'), ('month')) AS g (granularity)
+        GROUP BY r.user_id, g.granularity, date_trunc(g.granularity, r.date)
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('record_rollups')
@@ -3,9 +3,11 @@ import sys
 import uuid
 from pathlib import Path
 
-from sqlalchemy import select
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
+from constant.channel import USER_CHANGED_CHANNEL
 from dependency.setting import get_settings
 from model.user import User
 
@@ -15,16 +17,19 @@ sys.path.insert(0, str(project_root / "src"))
 settings = get_settings()
 DATABASE_URL = f"postgresql+asyncpg://{settings.postgres_user}:{settings.postgres_password}@{settings.postgres_host}:{settings.postgres_port}/{settings.postgres_db}"
 
+# Rows per INSERT in bulk mode, the whole file is still created in one transaction
+BULK_CHUNK_SIZE = 1000
+
 DEFAULT_USERS = [
     {"username": "test_user_1", "user_id": "550e8400-e29b-41d4-a716-446655440001"},
     {"username": "test_user_2", "user_id": "550e8400-e29b-41d4-a716-446655440002"},
 ]
 
 
-async def create_database_session() -> AsyncSession:
+async def create_database_session(echo: bool = True) -> AsyncSession:
     engine = create_async_engine(
         DATABASE_URL,
-        echo=True,
+        echo=echo,
         pool_pre_ping=True,
         pool_recycle=1500,
         pool_size=1,
@@ -51,6 +56,11 @@ async def create_user(session: AsyncSession, username: str, user_id: str = None)
     new_user = User(username=username, user_id=uuid.UUID(user_id) if user_id else uuid.uuid4())
 
     session.add(new_user)
+    # Lets running workers forget that this user id was unknown
+    await session.execute(
+        text("SELECT pg_notify(:channel, :user_id)"),
+        {"channel": USER_CHANGED_CHANNEL, "user_id": str(new_user.user_id)},
+    )
     await session.commit()
     await session.refresh(new_user)
 
@@ -104,6 +114,59 @@ async def create_custom_users(usernames: list[str]):
         raise
 
 
+def read_bulk_users(path: str) -> tuple[list[dict], int]:
+    # One user per line: a username, optionally followed by a comma and its UUID. Blank lines and # comments
+    # are skipped, a username repeated in the file is only created once.
+    lines = sys.stdin.read().splitlines() if path == "-" else Path(path).read_text().splitlines()
+    users = {}
+    repeated = 0
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        username, _, user_id = (part.strip() for part in line.partition(","))
+        if username in users:
+            repeated += 1
+            continue
+        users[username] = {"username": username, "user_id": uuid.UUID(user_id) if user_id else uuid.uuid4()}
+    return list(users.values()), repeated
+
+
+async def create_bulk_users(path: str):
+    users, repeated = read_bulk_users(path)
+    print(f"  Start creating {len(users)} users from {'stdin' if path == '-' else path}...")
+
+    try:
+        session = await create_database_session(echo=False)
+
+        created = 0
+        for offset in range(0, len(users), BULK_CHUNK_SIZE):
+            stmt = (
+                insert(User)
+                .values(users[offset : offset + BULK_CHUNK_SIZE])
+                .on_conflict_do_nothing(index_elements=[User.username])
+                .returning(User.user_id)
+            )
+            user_ids = [str(user_id) for user_id in (await session.execute(stmt)).scalars()]
+            if user_ids:
+                await session.execute(
+                    text("SELECT pg_notify(:channel, user_id) FROM unnest(CAST(:user_ids AS text[])) AS user_id"),
+                    {"channel": USER_CHANGED_CHANNEL, "user_ids": user_ids},
+                )
+            created += len(user_ids)
+        await session.commit()
+        await session.close()
+
+        print(f"\n  Done! {created} users created, {len(users) - created} already existed")
+        if repeated:
+            print(f"   {repeated} repeated usernames in the input were skipped")
+        return created
+
+    except Exception as e:
+        print(f"  Error occurred while creating users, none were created: {e}")
+        raise
+
+
 async def list_all_users():
     print("  Querying all users...")
 
@@ -135,6 +198,8 @@ def print_usage():
     print("   python scripts/create_users.py                    # Create default test users")
     print("   python scripts/create_users.py --list             # List all users")
     print("   python scripts/create_users.py user1 user2        # Create custom users")
+    print("   python scripts/create_users.py --bulk users.csv   # Create users from username[,uuid] lines")
+    print("   python scripts/create_users.py --bulk -           # Same, reading from stdin")
     print("   python scripts/create_users.py --help             # Show this help message")
 
 
@@ -153,6 +218,11 @@ async def main():
         await list_all_users()
         return
 
+    if "--bulk" in args:
+        index = args.index("--bulk")
+        await create_bulk_users(args[index + 1] if index + 1 < len(args) else "-")
+        return
+
     if args:
         await create_custom_users(args)
     else:
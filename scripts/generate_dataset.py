@@ -0,0 +1,217 @@
+"""Bulk loads a synthetic dataset of users and their records for scaling tests.
+
+    python scripts/generate_dataset.py --users 100000 --records-per-user 1000 --workers 8
+
+Users are copied in first, then worker processes each COPY the records of a chunk of users (asyncpg
+copy_records_to_table) and rebuild those users' rollups. Every user draws from its own generator seeded with
+--seed and the user's number, so the same seed loads the same dataset with any number of workers.
+
+Records per user follow --distribution around --records-per-user. Each record falls on a day of the range
+weighted by --weekday-weights and at an hour weighted by --hour-weights.
+
+Uses the database from the POSTGRES_* settings migrated to head. Users are named synthetic-<seed>-<number>,
+a seed can be loaded once per database.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+import arrow  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+
+from dependency.db import dispose_engine, get_session_factory  # noqa: E402
+from repository.record import RecordRepository  # noqa: E402
+
+USER_COLUMNS = ("user_id", "username", "created_at")
+RECORD_COLUMNS = ("record_id", "user_id", "word_count", "study_time", "date")
+# Quiet nights, a morning bump and an evening peak
+DEFAULT_HOUR_WEIGHTS = "1,1,1,1,1,1,2,4,6,6,5,5,6,5,5,5,6,7,9,12,14,12,7,3"
+DEFAULT_WEEKDAY_WEIGHTS = "10,10,10,10,9,6,7"
+
+
+@dataclass(frozen=True)
+class Plan:
+    seed: int
+    users: int
+    records_per_user: int
+    distribution: str
+    sigma: float
+    start: datetime
+    days: int
+    weekday_weights: tuple[float, ...]
+    hour_weights: tuple[float, ...]
+    word_count: tuple[int, int]
+    study_time: tuple[int, int]
+
+    @property
+    def end(self) -> datetime:
+        return self.start + timedelta(days=self.days)
+
+
+def _weights(value: str, size: int) -> tuple[float, ...]:
+    weights = tuple(float(weight) for weight in value.split(","))
+    if len(weights) != size or min(weights) < 0 or sum(weights) <= 0:
+        raise argparse.ArgumentTypeError(f"expected {size} comma separated non-negative weights")
+    return weights
+
+
+def _user(plan: Plan, number: int) -> tuple[random.Random, uuid.UUID]:
+    rng = random.Random(f"{plan.seed}-{number}")
+    return rng, uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _record_count(plan: Plan, rng: random.Random) -> int:
+    if plan.distribution == "constant":
+        return plan.records_per_user
+    if plan.distribution == "uniform":
+        return rng.randint(0, 2 * plan.records_per_user)
+    # Lognormal with the same mean: a long tail of heavy users
+    mu = math.log(max(plan.records_per_user, 1)) - plan.sigma**2 / 2
+    return round(rng.lognormvariate(mu, plan.sigma))
+
+
+def _users(plan: Plan) -> Iterator[tuple]:
+    for number in range(plan.users):
+        _, user_id = _user(plan, number)
+        yield user_id, f"synthetic-{plan.seed}-{number}", plan.start
+
+
+@lru_cache
+def _cumulative_weights(plan: Plan) -> tuple[list[float], list[float]]:
+    days = (plan.weekday_weights[(plan.start + timedelta(days=day)).weekday()] for day in range(plan.days))
+    return list(itertools.accumulate(days)), list(itertools.accumulate(plan.hour_weights))
+
+
+def _records(plan: Plan, number: int) -> Iterator[tuple]:
+    rng, user_id = _user(plan, number)
+    day_weights, hour_weights = _cumulative_weights(plan)
+    count = _record_count(plan, rng)
+    days = rng.choices(range(plan.days), cum_weights=day_weights, k=count)
+    hours = rng.choices(range(24), cum_weights=hour_weights, k=count)
+    start = arrow.get(plan.start).int_timestamp
+    seen = set()
+    for day, hour in zip(days, hours):
+        offset = day * 86400 + hour * 3600 + rng.randrange(3600)
+        word_count = rng.randint(*plan.word_count)
+        study_time = rng.randint(*plan.study_time)
+        # A user's records have distinct timestamps so their record_ids (see RecordService) do not collide
+        if offset in seen:
+            continue
+        seen.add(offset)
+        record_id = hashlib.sha256(f"{user_id}-{start + offset}-{word_count}-{study_time}".encode()).hexdigest()
+        yield record_id, user_id, word_count, study_time, plan.start + timedelta(seconds=offset)
+
+
+async def _copy(session: AsyncSession, table: str, rows: Iterator[tuple], columns: tuple[str, ...]) -> None:
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(table, records=rows, columns=columns)
+
+
+async def _load_users(plan: Plan) -> None:
+    try:
+        async with get_session_factory()() as session:
+            await RecordRepository(session).ensure_partitions(plan.start, plan.end)
+            await _copy(session, "users", _users(plan), USER_COLUMNS)
+            await session.commit()
+    finally:
+        await dispose_engine()
+
+
+async def _load_records(plan: Plan, first: int, last: int) -> int:
+    user_ids = [_user(plan, number)[1] for number in range(first, last)]
+    rows = list(itertools.chain.from_iterable(_records(plan, number) for number in range(first, last)))
+    try:
+        async with get_session_factory()() as session:
+            await _copy(session, "records", iter(rows), RECORD_COLUMNS)
+            await RecordRepository(session).rebuild_rollups(user_ids)
+    finally:
+        await dispose_engine()
+    return len(rows)
+
+
+def load_chunk(plan: Plan, first: int, last: int) -> tuple[int, int]:
+    # Runs in a worker process with its own event loop and connection
+    return last - first, asyncio.run(_load_records(plan, first, last))
+
+
+async def _analyze() -> None:
+    try:
+        async with get_session_factory()() as session:
+            await session.execute(text("ANALYZE users, records, record_rollups"))
+            await session.commit()
+    finally:
+        await dispose_engine()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--records-per-user", type=int, default=1000, help="Mean number of records per user")
+    parser.add_argument("--distribution", choices=("constant", "uniform", "lognormal"), default="lognormal")
+    parser.add_argument("--sigma", type=float, default=1.0, help="Spread of the lognormal distribution")
+    parser.add_argument("--start", type=arrow.get, default=arrow.get("2024-01-01"), help="First day of records")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--weekday-weights", type=lambda value: _weights(value, 7), default=DEFAULT_WEEKDAY_WEIGHTS)
+    parser.add_argument("--hour-weights", type=lambda value: _weights(value, 24), default=DEFAULT_HOUR_WEIGHTS)
+    parser.add_argument("--word-count", type=int, nargs=2, default=(10, 2000), metavar=("MIN", "MAX"))
+    parser.add_argument("--study-time", type=int, nargs=2, default=(60, 7200), metavar=("MIN", "MAX"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-users", type=int, default=500, help="Users loaded per COPY and transaction")
+    args = parser.parse_args()
+
+    plan = Plan(
+        seed=args.seed,
+        users=args.users,
+        records_per_user=args.records_per_user,
+        distribution=args.distribution,
+        sigma=args.sigma,
+        start=args.start.floor("day").naive,
+        days=args.days,
+        weekday_weights=args.weekday_weights,
+        hour_weights=args.hour_weights,
+        word_count=tuple(args.word_count),
+        study_time=tuple(args.study_time),
+    )
+    started = time.perf_counter()
+    asyncio.run(_load_users(plan))
+    print(f"Loaded {plan.users} users in {time.perf_counter() - started:.1f}s")
+
+    users = records = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        chunks = [
+            executor.submit(load_chunk, plan, first, min(first + args.chunk_users, plan.users))
+            for first in range(0, plan.users, args.chunk_users)
+        ]
+        for chunk in as_completed(chunks):
+            chunk_users, chunk_records = chunk.result()
+            users += chunk_users
+            records += chunk_records
+            elapsed = time.perf_counter() - started
+            print(f"{users}/{plan.users} users, {records} records, {records / elapsed:.0f} records/s")
+
+    asyncio.run(_analyze())
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
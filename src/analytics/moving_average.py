@@ -0,0 +1,84 @@
+from collections import deque
+from collections.abc import Iterable
+
+from constant.moving_average import MovingAverage
+
+
+class SimpleMovingAverage:
+    def __init__(self, n: int):
+        self.__n = n
+        self.__window: deque[int] = deque()
+        self.__total = 0
+
+    def update(self, value: int) -> float | None:
+        self.__window.append(value)
+        self.__total += value
+        if len(self.__window) > self.__n:
+            self.__total -= self.__window.popleft()
+        if len(self.__window) < self.__n:
+            return None
+        return round(self.__total / self.__n, 2)
+
+
+# alpha = 2 / (n + 1), seeded with the SMA of the first n values
+class ExponentialMovingAverage:
+    def __init__(self, n: int):
+        self.__n = n
+        self.__alpha = 2 / (n + 1)
+        self.__count = 0
+        self.__total = 0
+        self.__value: float | None = None
+
+    def update(self, value: int) -> float | None:
+        if self.__value is None:
+            self.__count += 1
+            self.__total += value
+            if self.__count < self.__n:
+                return None
+            self.__value = self.__total / self.__n
+        else:
+            self.__value += self.__alpha * (value - self.__value)
+        return round(self.__value, 2)
+
+
+# Weights 1..n, the newest value is the heaviest
+class WeightedMovingAverage:
+    def __init__(self, n: int):
+        self.__n = n
+        self.__denominator = n * (n + 1) // 2
+        self.__window: deque[int] = deque()
+        self.__total = 0
+        self.__numerator = 0
+
+    def update(self, value: int) -> float | None:
+        if len(self.__window) == self.__n:
+            # Shifting the window lowers every weight by one: drop one copy of each value, add the new one n times
+            self.__numerator += self.__n * value - self.__total
+            self.__total += value - self.__window.popleft()
+        else:
+            self.__numerator += (len(self.__window) + 1) * value
+            self.__total += value
+        self.__window.append(value)
+        if len(self.__window) < self.__n:
+            return None
+        return round(self.__numerator / self.__denominator, 2)
+
+
+MOVING_AVERAGES = {
+    MovingAverage.SMA: SimpleMovingAverage,
+    MovingAverage.EMA: ExponentialMovingAverage,
+    MovingAverage.WMA: WeightedMovingAverage,
+}
+
+
+def create_moving_average(
+    method: MovingAverage, n: int
+) -> SimpleMovingAverage | ExponentialMovingAverage | WeightedMovingAverage:
+    if n < 1:
+        raise ValueError(f"Window size must be positive, got {n}")
+    return MOVING_AVERAGES[method](n)
+
+
+def moving_average(values: Iterable[int], n: int, method: MovingAverage = MovingAverage.SMA) -> list[float | None]:
+    average = create_moving_average(method, n)
+    return [average.update(value) for value in values]
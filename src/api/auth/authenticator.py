@@ -6,11 +6,18 @@ from fastapi import HTTPException, Request, status
 from fastapi.datastructures import Headers
 
 from api.auth.schema import AuthData, JsonWebToken
+from cache.token import TokenCache
+from core.metrics import stage
 
 logger = logging.getLogger(__name__)
 
 
 class JsonWebTokenAuthenticator:
+    def __init__(self, token_cache: TokenCache | None = None, quiet: bool = False):
+        self.__token_cache = token_cache
+        # Skips printing and logging every token, both are synchronous writes on the request path
+        self.__quiet = quiet
+
     def get_jwt(self, headers: Headers) -> str:
         auth_header = headers.get("Authorization")
         if not auth_header:
@@ -29,19 +36,27 @@ class JsonWebTokenAuthenticator:
             )
 
     def validate_jwt_token(self, token: str) -> dict | None:
+        if self.__token_cache is not None:
+            identifier_token = self.__token_cache.get(token)
+            if identifier_token is not None:
+                return identifier_token
         try:
-            print(token)
+            if not self.__quiet:
+                print(token)
             identifier_token = jwt.decode(
                 token,
                 algorithms=["HS256"],
             )
-            logger.info("Identifier Token: %s", identifier_token)
+            if not self.__quiet:
+                logger.info("Identifier Token: %s", identifier_token)
             expired_time = identifier_token.get("exp", None)
             # Check expired_time is expired or not
             if expired_time is None:
                 raise jwt.InvalidTokenError("Token has no expired time field: exp")
             if expired_time < int(time.time()):
                 raise jwt.ExpiredSignatureError("Token has expired")
+            if self.__token_cache is not None:
+                self.__token_cache.set(token, identifier_token)
             return identifier_token
         except jwt.ExpiredSignatureError:
             logger.warning("Token has expired")
@@ -65,4 +80,5 @@ class JsonWebTokenAuthenticator:
         )
 
     async def __call__(self, request: Request):
-        return self.verify(request.headers)
+        with stage("auth"):
+            return self.verify(request.headers)
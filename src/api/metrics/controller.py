@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from core.metrics import REGISTRY
+from dependency.metrics import get_worker_snapshots
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get(
+    "/metrics",
+    summary="Prometheus metrics",
+    description="Request, stage, pool and cache metrics in the Prometheus text format, summed over the workers when "
+    "they share METRICS_DIR and of this worker otherwise.",
+    response_class=PlainTextResponse,
+)
+async def get_metrics() -> PlainTextResponse:
+    worker_snapshots = get_worker_snapshots()
+    others = await worker_snapshots.others() if worker_snapshots is not None else []
+    return PlainTextResponse(REGISTRY.render(others), media_type="text/plain; version=0.0.4; charset=utf-8")
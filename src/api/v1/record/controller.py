@@ -4,16 +4,20 @@ from typing import Annotated
 from fastapi import APIRouter, Body, Depends, status
 from fastapi.responses import JSONResponse
 
-from api.auth.authenticator import JsonWebTokenAuthenticator
+from api.v1.record.schema import CreateRecordRequest, CreateRecordsResponse
+from constant.record_status import RecordStatus
+from dependency.auth import get_authenticator
 from dependency.service import get_record_service
 from service.record import RecordService
 
 logger = logging.getLogger(__name__)
 
+MAX_BATCH_SIZE = 1000
+
 router = APIRouter(
     prefix="/records",
     tags=["Record"],
-    dependencies=[Depends(JsonWebTokenAuthenticator())],
+    dependencies=[Depends(get_authenticator())],
 )
 
 
@@ -42,3 +46,31 @@ async def create_record(
         status_code=status.HTTP_201_CREATED,
         content={},
     )
+
+
+@router.post(
+    "/{user_id}/batch",
+    summary="Add records for a user in one batch",
+    description="Adds up to 1000 records for a user in one statement. Records that already exist are skipped.",
+    response_description="The status of every record, in request order.",
+    status_code=status.HTTP_200_OK,
+    responses={
+        200: {"model": CreateRecordsResponse, "description": "Records processed"},
+        400: {"description": "Bad Request"},
+        404: {"description": "User not found"},
+        500: {"description": "Internal Server Error"},
+    },
+)
+async def create_records(
+    user_id: str,
+    record: Annotated[RecordService, Depends(get_record_service)],
+    records: Annotated[list[CreateRecordRequest], Body(min_length=1, max_length=MAX_BATCH_SIZE)],
+) -> JSONResponse:
+    results = await record.create_records(user_id=user_id, records=[item.model_dump() for item in records])
+    created = sum(1 for result in results if result["status"] == RecordStatus.CREATED)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content=CreateRecordsResponse(results=results, created=created, duplicate=len(results) - created).model_dump(
+            mode="json"
+        ),
+    )
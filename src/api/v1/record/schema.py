@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+
+from constant.record_status import RecordStatus
+
+
+class CreateRecordRequest(BaseModel):
+    word_count: int
+    study_time: int
+    timestamp: int | None = None
+
+
+class CreateRecordResult(BaseModel):
+    record_id: str
+    status: RecordStatus
+
+
+class CreateRecordsResponse(BaseModel):
+    results: list[CreateRecordResult]
+    created: int
+    duplicate: int
@@ -1,21 +1,34 @@
 import logging
-from typing import Annotated
+from collections.abc import AsyncIterator
+from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, Query, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, status
+from fastapi.responses import Response, StreamingResponse
 
-from api.auth.authenticator import JsonWebTokenAuthenticator
-from api.v1.user.schema import GetUserSummaryResponse
+from api.v1.user.encoder import encode_summaries, encode_summary, encode_summary_columns, encode_users_summaries
+from api.v1.user.schema import (
+    MAX_SUMMARY_PAGE_SIZE,
+    MAX_SUMMARY_USERS,
+    GetUsersSummaryRequest,
+    GetUsersSummaryResponse,
+    GetUserSummaryResponse,
+    Summary,
+)
 from constant.granularity import Granularity
+from constant.moving_average import MovingAverage
+from constant.summary_layout import SummaryLayout
+from core.metrics import stage
+from dependency.auth import get_authenticator
 from dependency.service import get_user_service
 from service.user import UserService
+from util.etag import etag_matches, make_etag
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/users",
     tags=["Users"],
-    dependencies=[Depends(JsonWebTokenAuthenticator())],
+    dependencies=[Depends(get_authenticator())],
 )
 
 
@@ -26,7 +39,12 @@ router = APIRouter(
     response_description="The summary of the user's records.",
     status_code=status.HTTP_200_OK,
     responses={
-        200: {"model": GetUserSummaryResponse, "description": "Success"},
+        200: {
+            "model": GetUserSummaryResponse,
+            "description": "Success",
+            "content": {"application/x-ndjson": {"schema": Summary.model_json_schema()}},
+        },
+        304: {"description": "Not Modified, the user has written no records since the If-None-Match ETag"},
         400: {"description": "Bad Request"},
         404: {"description": "User not found"},
         500: {"description": "Internal Server Error"},
@@ -38,10 +56,110 @@ async def get_user_summary(
     end: Annotated[int, Query()],
     granularity: Annotated[Granularity, Query()],
     user: Annotated[UserService, Depends(get_user_service)],
-    n: Annotated[int | None, Query()] = None,
-) -> JSONResponse:
-    summaries = await user.get_user_summary(user_id=user_id, start=start, end=end, granularity=granularity, n=n)
-    return JSONResponse(
-        status_code=status.HTTP_201_CREATED,
-        content=GetUserSummaryResponse(summary=summaries, total=len(summaries)).model_dump(mode="json"),
+    n: Annotated[
+        str | None, Query(pattern=r"^[1-9]\d*(,[1-9]\d*)*$", description="Window size(s), e.g. 7,30,90")
+    ] = None,
+    method: Annotated[MovingAverage, Query()] = MovingAverage.SMA,
+    stream: Annotated[bool, Query(description="Stream the summaries as NDJSON, one bucket per line")] = False,
+    layout: Annotated[
+        SummaryLayout, Query(description="columns returns one array per field instead of one object per bucket")
+    ] = SummaryLayout.ROWS,
+    stats: Annotated[
+        bool,
+        Query(description="Add record_count and the min, max, avg, stddev, p50 and p95 of word_count and study_time"),
+    ] = False,
+    limit: Annotated[
+        int | None, Query(ge=1, le=MAX_SUMMARY_PAGE_SIZE, description="Return at most this many buckets per page")
+    ] = None,
+    after: Annotated[str | None, Query(description="The next cursor of the previous page")] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    windows = [int(window) for window in n.split(",")] if n else None
+    if after is not None and limit is None:
+        raise HTTPException(status_code=400, detail="after requires a limit")
+    if stream and layout == SummaryLayout.COLUMNS:
+        raise HTTPException(status_code=400, detail="Streamed summaries only support the rows layout")
+    if stream and limit is not None:
+        raise HTTPException(status_code=400, detail="Streamed summaries cannot be paginated")
+    # Answered before the summary is queried or encoded
+    record_version = await user.get_record_version(user_id)
+    etag = make_etag(record_version)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    if stream:
+        summaries = await user.stream_user_summary(
+            user_id=user_id,
+            start=start,
+            end=end,
+            granularity=granularity,
+            n=windows,
+            method=method,
+            statistics=stats,
+        )
+        return StreamingResponse(_ndjson(summaries), media_type="application/x-ndjson", headers={"ETag": etag})
+    next_cursor = None
+    if limit is None:
+        summaries = await user.get_user_summary(
+            user_id=user_id,
+            start=start,
+            end=end,
+            granularity=granularity,
+            n=windows,
+            method=method,
+            statistics=stats,
+            record_version=record_version,
+        )
+    else:
+        summaries, next_cursor = await user.get_user_summary_page(
+            user_id=user_id,
+            start=start,
+            end=end,
+            granularity=granularity,
+            limit=limit,
+            after=after,
+            n=windows,
+            method=method,
+            statistics=stats,
+            record_version=record_version,
+        )
+    encode = encode_summary_columns if layout == SummaryLayout.COLUMNS else encode_summaries
+    with stage("serialization"):
+        content = encode(summaries, next_cursor)
+    return Response(
+        status_code=status.HTTP_201_CREATED, content=content, media_type="application/json", headers={"ETag": etag}
+    )
+
+
+@router.post(
+    "/summary",
+    summary="Get the summaries of several users",
+    description=f"Retrieves the summaries of up to {MAX_SUMMARY_USERS} users with one query.",
+    response_description="The summary of every user's records, keyed by user id.",
+    status_code=status.HTTP_200_OK,
+    responses={
+        200: {"model": GetUsersSummaryResponse, "description": "Success"},
+        400: {"description": "Bad Request"},
+        404: {"description": "User not found"},
+        500: {"description": "Internal Server Error"},
+    },
+)
+async def get_users_summary(
+    request: Annotated[GetUsersSummaryRequest, Body()],
+    user: Annotated[UserService, Depends(get_user_service)],
+) -> Response:
+    summaries = await user.get_users_summary(
+        user_ids=[str(user_id) for user_id in request.user_ids],
+        start=request.start,
+        end=request.end,
+        granularity=request.granularity,
+        n=request.n,
+        method=request.method,
     )
+    with stage("serialization"):
+        content = encode_users_summaries(summaries)
+    return Response(status_code=status.HTTP_200_OK, content=content, media_type="application/json")
+
+
+async def _ndjson(summaries: AsyncIterator[dict[str, Any]]) -> AsyncIterator[str]:
+    async for summary in summaries:
+        yield encode_summary(summary) + "\n"
@@ -0,0 +1,48 @@
+import json
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+
+# Fields GetUserSummaryResponse always carries, the moving average fields default to null
+SUMMARY_FIELDS = ("date", "word_count", "study_time", "word_count_sma", "study_time_sma")
+
+# The service's plain dicts are encoded by the C encoder, no Summary model is built per bucket.
+# The output matches GetUserSummaryResponse.model_dump(mode="json").
+_encode = json.JSONEncoder(separators=(",", ":")).encode
+
+
+def _iso(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _row(summary: dict[str, Any]) -> dict[str, Any]:
+    row = dict(summary)
+    row["date"] = _iso(row["date"])
+    row.setdefault("word_count_sma", None)
+    row.setdefault("study_time_sma", None)
+    return row
+
+
+def encode_summary(summary: dict[str, Any]) -> str:
+    return _encode(_row(summary))
+
+
+def encode_summaries(summaries: Sequence[dict[str, Any]], next_cursor: str | None = None) -> bytes:
+    rows = [_row(summary) for summary in summaries]
+    return _encode({"summary": rows, "total": len(summaries), "next": next_cursor}).encode()
+
+
+def encode_summary_columns(summaries: Sequence[dict[str, Any]], next_cursor: str | None = None) -> bytes:
+    # {"summary": {"date": [...], "word_count": [...], ...}, "total": n, "next": cursor}, a field missing from a
+    # bucket is null
+    fields = dict.fromkeys(SUMMARY_FIELDS)
+    for summary in summaries:
+        fields.update(dict.fromkeys(summary))
+    columns = {field: [summary.get(field) for summary in summaries] for field in fields}
+    columns["date"] = [_iso(date) for date in columns["date"]]
+    return _encode({"summary": columns, "total": len(summaries), "next": next_cursor}).encode()
+
+
+def encode_users_summaries(summaries: dict[str, Sequence[dict[str, Any]]]) -> bytes:
+    rows = {user_id: [_row(summary) for summary in user_summaries] for user_id, user_summaries in summaries.items()}
+    return _encode({"summary": rows, "total": len(summaries)}).encode()
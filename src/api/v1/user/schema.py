@@ -1,9 +1,22 @@
+import uuid
 from datetime import datetime
+from typing import Annotated
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
+
+from constant.granularity import Granularity
+from constant.moving_average import MovingAverage
+
+MAX_SUMMARY_USERS = 500
+MAX_SUMMARY_PAGE_SIZE = 10000
 
 
 class Summary(BaseModel):
+    # Extra moving average fields such as word_count_ema or word_count_sma_30,
+    # with stats also record_count and statistics such as word_count_p95
+    model_config = ConfigDict(extra="allow")
+    __pydantic_extra__: dict[str, int | float | None]
+
     date: datetime
     word_count: int
     study_time: int
@@ -14,3 +27,18 @@ class Summary(BaseModel):
 class GetUserSummaryResponse(BaseModel):
     summary: list[Summary]
     total: int
+    next: str | None = Field(default=None, description="Cursor of the next page, null on the last or only page")
+
+
+class GetUsersSummaryRequest(BaseModel):
+    user_ids: list[uuid.UUID] = Field(min_length=1, max_length=MAX_SUMMARY_USERS)
+    start: int
+    end: int
+    granularity: Granularity
+    n: list[Annotated[int, Field(ge=1)]] | None = Field(default=None, description="Window size(s), e.g. [7, 30, 90]")
+    method: MovingAverage = MovingAverage.SMA
+
+
+class GetUsersSummaryResponse(BaseModel):
+    summary: dict[str, list[Summary]]
+    total: int
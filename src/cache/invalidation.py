@@ -0,0 +1,42 @@
+import time
+from collections import OrderedDict
+
+
+class Invalidations:
+    # The users' last invalidation, numbered from one counter for all users. A value read after token() was taken is
+    # current while its user had no invalidation since. Invalidations are forgotten after ttl seconds, or the oldest
+    # ones past max_size; a forgotten one raises the floor that users without an invalidation compare against, so
+    # tokens from before it are stale for every user. The caches' entries expire within ttl, so only values read
+    # before a forgotten invalidation and cached after it are dropped early.
+    def __init__(self, max_size: int, ttl: float):
+        self.__max_size = max_size
+        self.__ttl = ttl
+        self.__counter = 0
+        self.__floor = 0
+        self.__users: OrderedDict[str, tuple[int, float]] = OrderedDict()
+
+    def token(self) -> int:
+        return self.__counter
+
+    def current(self, user_id: str, token: int) -> bool:
+        self.__forget()
+        entry = self.__users.get(user_id)
+        return token >= (entry[0] if entry is not None else self.__floor)
+
+    def invalidate(self, user_id: str) -> None:
+        self.__counter += 1
+        self.__users[user_id] = (self.__counter, time.monotonic() + self.__ttl)
+        self.__users.move_to_end(user_id)
+        self.__forget()
+
+    def __forget(self) -> None:
+        now = time.monotonic()
+        while self.__users:
+            user_id, (counter, expires_at) = next(iter(self.__users.items()))
+            if expires_at >= now and len(self.__users) <= self.__max_size:
+                break
+            del self.__users[user_id]
+            self.__floor = counter
+
+    def __len__(self) -> int:
+        return len(self.__users)
@@ -0,0 +1,48 @@
+import asyncio
+import logging
+from collections.abc import Callable
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationListener:
+    # Keeps a dedicated connection LISTENing on the channels of `handlers` and reconnects when it drops.
+    # on_reset is called on every (re)connect because notifications sent while disconnected are lost.
+    def __init__(
+        self,
+        dsn: str,
+        handlers: dict[str, Callable[[str], None]],
+        on_reset: Callable[[], None],
+        retry_interval: float = 5,
+    ):
+        self.__dsn = dsn
+        self.__handlers = handlers
+        self.__on_reset = on_reset
+        self.__retry_interval = retry_interval
+
+    def __notify(self, connection: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        self.__handlers[channel](payload)
+
+    async def run(self) -> None:
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.__dsn)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                for channel in self.__handlers:
+                    await connection.add_listener(channel, self.__notify)
+                self.__on_reset()
+                logger.info("Listening on %s", ", ".join(self.__handlers))
+                await closed.wait()
+                logger.warning("Connection listening on %s was closed", ", ".join(self.__handlers))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Listening on %s failed: %s", ", ".join(self.__handlers), e)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self.__retry_interval)
@@ -0,0 +1,38 @@
+import time
+from collections import OrderedDict
+
+from cache.summary import normalize_user_id
+
+
+class RecentWrites:
+    # Users who wrote within the last `window` seconds. Their reads go to the primary until a lagging replica
+    # has caught up; a window of 0 (no replica) keeps nothing.
+    def __init__(self, window: float, max_size: int):
+        self.__window = window
+        self.__max_size = max_size
+        self.__expires_at: OrderedDict[str, float] = OrderedDict()
+
+    def add(self, user_id: str) -> None:
+        if self.__window <= 0 or self.__max_size <= 0:
+            return
+        now = time.monotonic()
+        user_id = normalize_user_id(user_id)
+        self.__expires_at[user_id] = now + self.__window
+        self.__expires_at.move_to_end(user_id)
+        # Ordered by expiry, so the expired entries and the oldest ones when full are at the front
+        while self.__expires_at and (
+            len(self.__expires_at) > self.__max_size or next(iter(self.__expires_at.values())) < now
+        ):
+            self.__expires_at.popitem(last=False)
+
+    def contains(self, user_id: str) -> bool:
+        if not self.__expires_at:
+            return False
+        expires_at = self.__expires_at.get(normalize_user_id(user_id))
+        return expires_at is not None and expires_at >= time.monotonic()
+
+    def clear(self) -> None:
+        self.__expires_at.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self.__expires_at)}
@@ -0,0 +1,56 @@
+import time
+from collections import OrderedDict
+
+from cache.invalidation import Invalidations
+from cache.summary import normalize_user_id
+
+
+class RecordVersionCache:
+    # LRU + TTL cache of the users' record_version. A user's record writes drop their entry, and like SummaryCache a
+    # version read from the database while a write lands is not kept: set() checks the Invalidations token taken
+    # before the read. The TTL bounds how long writes other workers are not told about go unseen.
+    def __init__(self, max_size: int, ttl: float):
+        self.__max_size = max_size
+        self.__ttl = ttl
+        self.__versions: OrderedDict[str, tuple[int, float]] = OrderedDict()
+        self.__invalidations = Invalidations(max_size, ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str) -> int | None:
+        user_id = normalize_user_id(user_id)
+        entry = self.__versions.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        version, expires_at = entry
+        if expires_at < time.monotonic():
+            del self.__versions[user_id]
+            self.misses += 1
+            return None
+        self.__versions.move_to_end(user_id)
+        self.hits += 1
+        return version
+
+    def invalidations(self, user_id: str) -> int:
+        return self.__invalidations.token()
+
+    def set(self, user_id: str, version: int, invalidations: int) -> None:
+        user_id = normalize_user_id(user_id)
+        if self.__max_size <= 0 or not self.__invalidations.current(user_id, invalidations):
+            return
+        self.__versions[user_id] = (version, time.monotonic() + self.__ttl)
+        self.__versions.move_to_end(user_id)
+        while len(self.__versions) > self.__max_size:
+            self.__versions.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        user_id = normalize_user_id(user_id)
+        self.__versions.pop(user_id, None)
+        self.__invalidations.invalidate(user_id)
+
+    def clear(self) -> None:
+        self.__versions.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self.__versions), "hits": self.hits, "misses": self.misses}
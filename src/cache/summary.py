@@ -0,0 +1,89 @@
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+from cache.invalidation import Invalidations
+
+
+def normalize_user_id(user_id: str) -> str:
+    # Path parameters may spell a UUID differently from the canonical text Postgres sends in notifications
+    try:
+        return str(uuid.UUID(str(user_id)))
+    except ValueError:
+        return str(user_id)
+
+
+def _buckets(value: Any) -> int:
+    # Summaries are lists of buckets, pages are (buckets, cursor)
+    buckets = value[0] if isinstance(value, tuple) else value
+    return max(len(buckets), 1)
+
+
+class SummaryCache:
+    # LRU + TTL cache of summaries, bounded by the buckets they hold. Every entry remembers the version (an
+    # Invalidations token) taken before it was computed, a write to the user makes all the user's entries stale at once.
+    def __init__(self, max_buckets: int, ttl: float):
+        self.__max_buckets = max_buckets
+        self.__ttl = ttl
+        self.__entries: OrderedDict[tuple[str, Hashable], tuple[int, float, Any]] = OrderedDict()
+        self.__buckets = 0
+        self.__invalidations = Invalidations(max_buckets, ttl)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def version(self, user_id: str) -> int:
+        return self.__invalidations.token()
+
+    def get(self, user_id: str, key: Hashable) -> Any | None:
+        user_id = normalize_user_id(user_id)
+        entry = self.__entries.get((user_id, key))
+        if entry is None:
+            self.misses += 1
+            return None
+        version, expires_at, value = entry
+        if not self.__invalidations.current(user_id, version) or expires_at < time.monotonic():
+            self.__remove((user_id, key))
+            self.misses += 1
+            return None
+        self.__entries.move_to_end((user_id, key))
+        self.hits += 1
+        return value
+
+    def set(self, user_id: str, key: Hashable, value: Any, version: int) -> None:
+        user_id = normalize_user_id(user_id)
+        if _buckets(value) > self.__max_buckets or not self.__invalidations.current(user_id, version):
+            # Too large to cache, or a write happened while the value was computed
+            return
+        self.__remove((user_id, key))
+        self.__entries[(user_id, key)] = (version, time.monotonic() + self.__ttl, value)
+        self.__buckets += _buckets(value)
+        while self.__buckets > self.__max_buckets:
+            self.__remove(next(iter(self.__entries)))
+            self.evictions += 1
+
+    def invalidate(self, user_id: str) -> None:
+        self.__invalidations.invalidate(normalize_user_id(user_id))
+        self.invalidations += 1
+
+    def clear(self) -> None:
+        self.__entries.clear()
+        self.__buckets = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self.__entries),
+            "buckets": self.__buckets,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def __remove(self, key: tuple[str, Hashable]) -> None:
+        entry = self.__entries.pop(key, None)
+        if entry is not None:
+            self.__buckets -= _buckets(entry[2])
@@ -0,0 +1,43 @@
+import hashlib
+import time
+from collections import OrderedDict
+
+
+class TokenCache:
+    # Payloads of verified tokens keyed by the token's digest, so a client reusing its token skips the decoding.
+    # An entry is served until the token's exp, after which the token is decoded (and rejected) again.
+    def __init__(self, max_size: int):
+        self.__max_size = max_size
+        self.__entries: OrderedDict[bytes, dict] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def __digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> dict | None:
+        digest = self.__digest(token)
+        payload = self.__entries.get(digest)
+        if payload is None:
+            self.misses += 1
+            return None
+        if payload["exp"] < int(time.time()):
+            del self.__entries[digest]
+            self.misses += 1
+            return None
+        self.__entries.move_to_end(digest)
+        self.hits += 1
+        return payload
+
+    def set(self, token: str, payload: dict) -> None:
+        if self.__max_size <= 0:
+            return
+        digest = self.__digest(token)
+        self.__entries[digest] = payload
+        self.__entries.move_to_end(digest)
+        while len(self.__entries) > self.__max_size:
+            self.__entries.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self.__entries), "hits": self.hits, "misses": self.misses}
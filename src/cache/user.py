@@ -0,0 +1,64 @@
+import time
+from collections import OrderedDict
+
+from cache.summary import normalize_user_id
+
+
+class UserExistenceCache:
+    # Known user ids are kept until evicted (LRU), unknown ids only for negative_ttl seconds
+    # so a user created meanwhile is seen shortly and a flood of bad ids does not reach the database.
+    def __init__(self, max_size: int, negative_ttl: float):
+        self.__max_size = max_size
+        self.__negative_ttl = negative_ttl
+        self.__known: OrderedDict[str, None] = OrderedDict()
+        self.__missing: OrderedDict[str, float] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def exists(self, user_id: str) -> bool | None:
+        # True or False when cached, None when the database has to be asked
+        user_id = normalize_user_id(user_id)
+        if user_id in self.__known:
+            self.__known.move_to_end(user_id)
+            self.hits += 1
+            return True
+        expires_at = self.__missing.get(user_id)
+        if expires_at is not None:
+            if expires_at >= time.monotonic():
+                self.hits += 1
+                return False
+            del self.__missing[user_id]
+        self.misses += 1
+        return None
+
+    def add(self, user_id: str) -> None:
+        if self.__max_size <= 0:
+            return
+        user_id = normalize_user_id(user_id)
+        self.__missing.pop(user_id, None)
+        self.__known[user_id] = None
+        self.__known.move_to_end(user_id)
+        while len(self.__known) > self.__max_size:
+            self.__known.popitem(last=False)
+
+    def add_missing(self, user_id: str) -> None:
+        if self.__max_size <= 0 or self.__negative_ttl <= 0:
+            return
+        user_id = normalize_user_id(user_id)
+        self.__known.pop(user_id, None)
+        self.__missing[user_id] = time.monotonic() + self.__negative_ttl
+        self.__missing.move_to_end(user_id)
+        while len(self.__missing) > self.__max_size:
+            self.__missing.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        user_id = normalize_user_id(user_id)
+        self.__known.pop(user_id, None)
+        self.__missing.pop(user_id, None)
+
+    def clear(self) -> None:
+        self.__known.clear()
+        self.__missing.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"known": len(self.__known), "missing": len(self.__missing), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,4 @@
+# Postgres NOTIFY channel, the payload is the user_id whose records changed
+RECORD_WRITTEN_CHANNEL = "record_written"
+# Payload is the user_id of a user that was created or deleted
+USER_CHANGED_CHANNEL = "user_changed"
@@ -0,0 +1,6 @@
+from enum import StrEnum
+
+
+class LogFormat(StrEnum):
+    TEXT = "text"
+    JSON = "json"
@@ -0,0 +1,12 @@
+from enum import StrEnum
+
+
+class MovingAverage(StrEnum):
+    SMA = "sma"
+    EMA = "ema"
+    WMA = "wma"
+
+
+class MovingAverageSource(StrEnum):
+    PYTHON = "python"
+    DATABASE = "database"
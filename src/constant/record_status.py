@@ -0,0 +1,6 @@
+from enum import StrEnum
+
+
+class RecordStatus(StrEnum):
+    CREATED = "created"
+    DUPLICATE = "duplicate"
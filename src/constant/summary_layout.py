@@ -0,0 +1,6 @@
+from enum import StrEnum
+
+
+class SummaryLayout(StrEnum):
+    ROWS = "rows"
+    COLUMNS = "columns"
@@ -0,0 +1,6 @@
+from enum import StrEnum
+
+
+class SummaryQuery(StrEnum):
+    SQLALCHEMY = "sqlalchemy"
+    ASYNCPG = "asyncpg"
@@ -0,0 +1,260 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+# Minimal in-process metrics rendered in the Prometheus text format. Recording is a dict lookup and an addition,
+# cheap enough for the request path. Every worker process keeps its own values, WorkerSnapshots adds up those of
+# the workers of one server.
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], le: float | str | None = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.__documentation = documentation
+        self.__labelnames = labelnames
+        self.__values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        self.__values[labelvalues] = self.__values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self.__values.get(labelvalues, 0)
+
+    def samples(self) -> dict[tuple[str, ...], float]:
+        return dict(self.__values)
+
+    def collect(self, samples: dict[tuple[str, ...], float] | None = None) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.__documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labelvalues, value in (self.__values if samples is None else samples).items():
+            yield f"{self.name}{_labels(self.__labelnames, labelvalues)} {value}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.__documentation = documentation
+        self.__labelnames = labelnames
+        self.__buckets = buckets
+        # Per label values: the count of every bucket (the last one is +Inf), then the sum
+        self.__values: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        counts = self.__values.get(labelvalues)
+        if counts is None:
+            counts = self.__values[labelvalues] = [0] * (len(self.__buckets) + 1) + [0.0]
+        counts[bisect_left(self.__buckets, value)] += 1
+        counts[-1] += value
+
+    def count(self, *labelvalues: str) -> int:
+        counts = self.__values.get(labelvalues)
+        return sum(counts[:-1]) if counts else 0
+
+    @contextmanager
+    def time(self, *labelvalues: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def samples(self) -> dict[tuple[str, ...], list]:
+        return {labelvalues: list(counts) for labelvalues, counts in self.__values.items()}
+
+    def collect(self, samples: dict[tuple[str, ...], list] | None = None) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.__documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for labelvalues, counts in (self.__values if samples is None else samples).items():
+            cumulative = 0
+            for bound, count in zip((*self.__buckets, "+Inf"), counts):
+                cumulative += count
+                yield f"{self.name}_bucket{_labels(self.__labelnames, labelvalues, bound)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.__labelnames, labelvalues)} {counts[-1]}"
+            yield f"{self.name}_count{_labels(self.__labelnames, labelvalues)} {cumulative}"
+
+
+class CallbackMetric:
+    # Values read when the metrics are rendered, e.g. from the caches' stats() or the connection pool
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        labelnames: tuple[str, ...],
+        callback: Callable[[], dict[tuple[str, ...], float]],
+    ):
+        self.name = name
+        self.kind = kind
+        self.__documentation = documentation
+        self.__labelnames = labelnames
+        self.__callback = callback
+
+    def samples(self) -> dict[tuple[str, ...], float]:
+        return dict(self.__callback())
+
+    def collect(self, samples: dict[tuple[str, ...], float] | None = None) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.__documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for labelvalues, value in (self.__callback() if samples is None else samples).items():
+            yield f"{self.name}{_labels(self.__labelnames, labelvalues)} {value}"
+
+
+class Registry:
+    def __init__(self):
+        self.__metrics: dict[str, Counter | Histogram | CallbackMetric] = {}
+
+    def register(self, metric: Counter | Histogram | CallbackMetric) -> None:
+        # Registering a name again replaces the metric, callbacks are re-registered on every app startup
+        self.__metrics[metric.name] = metric
+
+    def kind(self, name: str) -> str | None:
+        metric = self.__metrics.get(name)
+        return metric.kind if metric is not None else None
+
+    def snapshot(self) -> dict[str, list]:
+        # Every metric's samples as JSON, label values as lists
+        return {
+            name: [[list(labelvalues), value] for labelvalues, value in metric.samples().items()]
+            for name, metric in self.__metrics.items()
+        }
+
+    def render(self, snapshots: Iterable[dict[str, list]] = ()) -> str:
+        # This process's values, plus those of the snapshots of other processes when given
+        snapshots = list(snapshots)
+        if not snapshots:
+            return "\n".join(line for metric in self.__metrics.values() for line in metric.collect()) + "\n"
+        lines = []
+        for name, metric in self.__metrics.items():
+            samples = metric.samples()
+            for snapshot in snapshots:
+                for labelvalues, value in snapshot.get(name, ()):
+                    labelvalues = tuple(labelvalues)
+                    current = samples.get(labelvalues)
+                    if current is None:
+                        samples[labelvalues] = value
+                    elif isinstance(value, list):
+                        samples[labelvalues] = [a + b for a, b in zip(current, value)]
+                    else:
+                        samples[labelvalues] = current + value
+            lines.extend(metric.collect(samples))
+        return "\n".join(lines) + "\n"
+
+
+class WorkerSnapshots:
+    # Shares the metrics of the worker processes of one server through a directory: every worker writes its
+    # registry's snapshot to <pid>.json each interval seconds and when it stops, and the worker serving a scrape adds
+    # the other workers' snapshots to its own values. Snapshots of exited workers are kept so counters and
+    # histograms do not go back when a worker is replaced, only their gauges are left out.
+    def __init__(self, registry: Registry, directory: str, interval: float):
+        self.__registry = registry
+        self.__directory = Path(directory)
+        self.__interval = interval
+        self.__path = self.__directory / f"{os.getpid()}.json"
+
+    async def run(self) -> None:
+        while True:
+            await self.write()
+            await asyncio.sleep(self.__interval)
+
+    async def write(self) -> None:
+        # Taken on the event loop, which is the only writer of the values
+        await asyncio.to_thread(self.__write, self.__registry.snapshot())
+
+    def close(self) -> None:
+        # The worker's last values, written once its requests and background tasks are done, outlive it
+        self.__write(self.__registry.snapshot())
+
+    async def others(self) -> list[dict[str, list]]:
+        return await asyncio.to_thread(self.__read_others)
+
+    def __write(self, snapshot: dict[str, list]) -> None:
+        # Renamed into place, readers never see a partial file
+        temporary = self.__path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(snapshot))
+        os.replace(temporary, self.__path)
+
+    def __read_others(self) -> list[dict[str, list]]:
+        snapshots = []
+        for path in self.__directory.glob("*.json"):
+            if path == self.__path:
+                continue
+            try:
+                snapshot: dict[str, Any] = json.loads(path.read_text())
+            except (OSError, ValueError) as e:
+                logger.warning("Skipping metrics snapshot %s: %s", path.name, e)
+                continue
+            if not _alive(int(path.stem)):
+                snapshot = {
+                    name: samples for name, samples in snapshot.items() if self.__registry.kind(name) != "gauge"
+                }
+            snapshots.append(snapshot)
+        return snapshots
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = Histogram(
+    "mantra_http_request_duration_seconds",
+    "Time until the response starts, per route",
+    ("method", "route", "status"),
+)
+STAGE_DURATION = Histogram(
+    "mantra_stage_duration_seconds",
+    "Time spent in a stage of the request pipeline",
+    ("stage",),
+)
+POOL_CHECKOUT_DURATION = Histogram(
+    "mantra_db_pool_checkout_duration_seconds",
+    "Time waited for a pooled database connection, including connecting",
+)
+DB_ROWS = Counter("mantra_db_rows_total", "Rows returned or written by a query", ("query",))
+
+for _metric in (REQUEST_DURATION, STAGE_DURATION, POOL_CHECKOUT_DURATION, DB_ROWS):
+    REGISTRY.register(_metric)
+
+
+def stage(name: str):
+    # with stage("summary_query"): ... records the block's duration in mantra_stage_duration_seconds
+    return STAGE_DURATION.time(name)
@@ -0,0 +1,63 @@
+import asyncio
+import logging
+from collections.abc import Iterable
+from datetime import datetime
+
+import arrow
+
+from dependency.db import get_session_factory
+from repository.record import RecordRepository
+
+logger = logging.getLogger(__name__)
+
+# Records dated before this month stay in records_default, client timestamps cannot create partitions without bound
+EARLIEST_PARTITION_MONTH = datetime(2000, 1, 1)
+
+
+def _month(date: datetime) -> datetime:
+    return date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+class RecordPartitions:
+    # The monthly records partitions. run() keeps them created from the previous month to months_ahead months ahead
+    # and partitions the months of records that still fell into records_default. ensure() creates the partition of a
+    # month before records of it are written, so records with client timestamps (offline sync, batches) land in
+    # their month's partition too. The months known to have one are kept, only the first write to a month per worker
+    # asks the database. Months from EARLIEST_PARTITION_MONTH up to months_ahead months ahead are partitioned.
+    def __init__(self, months_ahead: int, interval: int):
+        self.__months_ahead = months_ahead
+        self.__interval = interval
+        self.__known: set[datetime] = set()
+
+    async def run(self) -> None:
+        while True:
+            try:
+                now = arrow.utcnow()
+                async with get_session_factory()() as session:
+                    repository = RecordRepository(session)
+                    created = await repository.ensure_partitions(
+                        now.shift(months=-1).naive, now.shift(months=self.__months_ahead).naive
+                    )
+                    default_months = await repository.get_default_partition_months()
+                if created:
+                    logger.info("Created %s records partitions", created)
+                await self.ensure(default_months)
+            except Exception as e:
+                logger.error("Records partition maintenance failed: %s", e)
+            await asyncio.sleep(self.__interval)
+
+    async def ensure(self, dates: Iterable[datetime]) -> None:
+        latest = _month(arrow.utcnow().shift(months=self.__months_ahead).naive)
+        missing = {month for month in map(_month, dates) if EARLIEST_PARTITION_MONTH <= month <= latest} - self.__known
+        if not missing:
+            return
+        try:
+            async with get_session_factory()() as session:
+                repository = RecordRepository(session)
+                for month in sorted(missing):
+                    if await repository.ensure_partitions(month, month):
+                        logger.info("Created the records partition of %s", month.strftime("%Y-%m"))
+                    self.__known.add(month)
+        except Exception as e:
+            # The records still go to records_default, the next write to the month tries again
+            logger.error("Creating records partitions failed: %s", e)
@@ -0,0 +1,95 @@
+import importlib.util
+import logging
+import math
+import os
+import tempfile
+from contextlib import ExitStack
+from pathlib import Path
+
+import uvicorn
+
+from core.settings import Settings
+from util.logger import configure_logging
+
+logger = logging.getLogger(__name__)
+
+# cgroup v2 CPU limit of the container, "<quota> <period>" or "max <period>"
+CGROUP_CPU_MAX = Path("/sys/fs/cgroup/cpu.max")
+
+
+def cpu_count() -> int:
+    # CPUs the process may run on, capped by the container's CPU limit (docker --cpus, Kubernetes limits)
+    count = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    try:
+        quota, period = CGROUP_CPU_MAX.read_text().split()
+        limit = math.ceil(int(quota) / int(period))
+    except (OSError, ValueError):
+        return count
+    return max(1, min(count, limit))
+
+
+def worker_count(settings: Settings) -> int:
+    # One event loop per CPU
+    return settings.server_workers or cpu_count()
+
+
+def pool_sizes(settings: Settings, workers: int) -> dict[str, int]:
+    # The per worker pool settings fitting DB_CONNECTION_BUDGET, as environment variables for the workers' Settings.
+    # A worker holds its pool and overflow, and on the primary also the LISTEN connection of the cache listener.
+    # The pool size is kept when it fits, the rest of the worker's share goes to the overflow.
+    budget = settings.db_connection_budget
+    if budget <= 0:
+        return {}
+    listener = 1 if settings.cache_listen else 0
+    primary = budget // workers - listener
+    if primary < 1:
+        raise ValueError(f"DB_CONNECTION_BUDGET {budget} leaves no pooled connection to each of {workers} workers")
+    pool_size = min(settings.db_pool_size, primary)
+    sizes = {"DB_POOL_SIZE": pool_size, "DB_MAX_OVERFLOW": primary - pool_size}
+    if settings.read_database_url:
+        replica = budget // workers
+        read_pool_size = min(settings.db_read_pool_size, replica)
+        sizes |= {"DB_READ_POOL_SIZE": read_pool_size, "DB_READ_MAX_OVERFLOW": replica - read_pool_size}
+    return sizes
+
+
+def _available(module: str, fallback: str) -> str:
+    return module if importlib.util.find_spec(module) is not None else fallback
+
+
+def run(settings: Settings) -> None:
+    # Serves main:app from worker_count processes under uvicorn's supervisor, which restarts dead workers and
+    # forwards SIGTERM to them for a graceful shutdown
+    configure_logging(settings)
+    workers = worker_count(settings)
+    sizes = pool_sizes(settings, workers)
+    # Read by every worker's Settings
+    os.environ.update({name: str(value) for name, value in sizes.items()})
+    loop, http = _available("uvloop", "asyncio"), _available("httptools", "h11")
+    logger.info(
+        "Starting %s workers on %s:%s (%s, %s)", workers, settings.server_host, settings.server_port, loop, http
+    )
+    if sizes:
+        logger.info("Per worker pools within DB_CONNECTION_BUDGET %s: %s", settings.db_connection_budget, sizes)
+    with ExitStack() as stack:
+        if settings.metrics_dir:
+            # Snapshots of an earlier run's workers are not part of this one
+            for snapshot in Path(settings.metrics_dir).glob("*.json"):
+                snapshot.unlink()
+        elif workers > 1:
+            # Scrapes reach any one worker, all of them report the sum through this directory
+            os.environ["METRICS_DIR"] = stack.enter_context(tempfile.TemporaryDirectory(prefix="mantra-metrics-"))
+        uvicorn.run(
+            "main:app",
+            app_dir=str(Path(__file__).parent.parent),
+            host=settings.server_host,
+            port=settings.server_port,
+            workers=workers,
+            loop=loop,
+            http=http,
+            timeout_graceful_shutdown=settings.server_graceful_timeout,
+            access_log=settings.server_access_log,
+            # The workers log through configure_logging, uvicorn's loggers propagate to it
+            log_config=None,
+            proxy_headers=True,
+        )
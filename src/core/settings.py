@@ -1,6 +1,10 @@
-from pydantic import Field
+from pydantic import AliasChoices, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from constant.log_format import LogFormat
+from constant.moving_average import MovingAverageSource
+from constant.summary_query import SummaryQuery
+
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
@@ -12,3 +16,87 @@ class Settings(BaseSettings):
     postgres_user: str = Field(default="", validation_alias="POSTGRES_USER")
     postgres_password: str = Field(default="", validation_alias="POSTGRES_PASSWORD")
     postgres_db: str = Field(default="", validation_alias="POSTGRES_DB")
+
+    # Production server (python server.py): SERVER_WORKERS processes, 0 runs one per available CPU. On SIGTERM every
+    # worker stops accepting connections and finishes its in-flight requests for up to SERVER_GRACEFUL_TIMEOUT seconds.
+    server_host: str = Field(default="0.0.0.0", validation_alias="SERVER_HOST")
+    server_port: int = Field(default=8000, validation_alias="SERVER_PORT")
+    server_workers: int = Field(default=0, ge=0, validation_alias="SERVER_WORKERS")
+    server_graceful_timeout: int = Field(default=30, validation_alias="SERVER_GRACEFUL_TIMEOUT")
+    server_access_log: bool = Field(default=False, validation_alias="SERVER_ACCESS_LOG")
+
+    # Connection pool, one per worker process
+    db_pool_size: int = Field(default=5, validation_alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=5, validation_alias="DB_MAX_OVERFLOW")
+    # Connections the workers of python server.py together may open to each database, their pools are sized to fit.
+    # 0 keeps DB_POOL_SIZE and DB_MAX_OVERFLOW (and the DB_READ_ ones) per worker.
+    db_connection_budget: int = Field(default=0, ge=0, validation_alias="DB_CONNECTION_BUDGET")
+    db_pool_pre_ping: bool = Field(default=True, validation_alias="DB_POOL_PRE_PING")
+    db_pool_recycle: int = Field(default=1500, validation_alias="DB_POOL_RECYCLE")
+    db_statement_cache_size: int = Field(default=100, validation_alias="DB_STATEMENT_CACHE_SIZE")
+
+    # Where SMA summaries are computed, see UserService.get_user_summary
+    summary_moving_average_source: MovingAverageSource = Field(
+        default=MovingAverageSource.PYTHON, validation_alias="SUMMARY_MOVING_AVERAGE_SOURCE"
+    )
+
+    # Read replica (a postgresql:// DSN) with its own pool per worker for summary and user reads, unset keeps them on
+    # the primary. A user's reads stay on the primary for read_your_writes_window seconds after their writes.
+    postgres_read_dsn: str = Field(default="", validation_alias="POSTGRES_READ_DSN")
+    db_read_pool_size: int = Field(default=5, validation_alias="DB_READ_POOL_SIZE")
+    db_read_max_overflow: int = Field(default=5, validation_alias="DB_READ_MAX_OVERFLOW")
+    read_your_writes_window: float = Field(default=5, validation_alias="READ_YOUR_WRITES_WINDOW")
+
+    # How summary reads reach Postgres, see AsyncpgRecordRepository
+    summary_query: SummaryQuery = Field(default=SummaryQuery.SQLALCHEMY, validation_alias="SUMMARY_QUERY")
+
+    # Monthly records partitions are created this many months ahead, re-checked every interval seconds (0 disables)
+    records_partition_months_ahead: int = Field(default=3, validation_alias="RECORDS_PARTITION_MONTHS_AHEAD")
+    records_partition_interval: int = Field(default=86400, validation_alias="RECORDS_PARTITION_INTERVAL")
+
+    # Group commit of single record writes (0 rows disables): up to rows records per insert, flushed at the latest
+    # delay seconds after the first one, with at most pending records queued before callers wait
+    record_buffer_rows: int = Field(default=0, validation_alias="RECORD_BUFFER_ROWS")
+    record_buffer_delay: float = Field(default=0.005, validation_alias="RECORD_BUFFER_DELAY")
+    record_buffer_pending: int = Field(default=10_000, validation_alias="RECORD_BUFFER_PENDING")
+
+    # Summary cache per worker, bounded by the buckets of the cached summaries (0 disables it)
+    summary_cache_buckets: int = Field(default=100_000, validation_alias="SUMMARY_CACHE_BUCKETS")
+    summary_cache_ttl: float = Field(default=60, validation_alias="SUMMARY_CACHE_TTL")
+
+    # Known user ids cached per worker (0 disables), unknown ids are remembered for negative_ttl seconds
+    user_cache_size: int = Field(default=100_000, validation_alias="USER_CACHE_SIZE")
+    user_cache_negative_ttl: float = Field(default=5, validation_alias="USER_CACHE_NEGATIVE_TTL")
+
+    # Verified JWT payloads cached per worker until their exp (0 disables), quiet stops printing every token
+    auth_token_cache_size: int = Field(default=10_000, validation_alias="AUTH_TOKEN_CACHE_SIZE")
+    auth_quiet: bool = Field(default=False, validation_alias="AUTH_QUIET")
+
+    # Records at or below INFO are kept at the sample rate (0 to 1), more severe ones always
+    log_level: str = Field(default="INFO", validation_alias="LOG_LEVEL")
+    log_format: LogFormat = Field(default=LogFormat.TEXT, validation_alias="LOG_FORMAT")
+    log_info_sample_rate: float = Field(default=1.0, ge=0, le=1, validation_alias="LOG_INFO_SAMPLE_RATE")
+
+    # Directory the worker processes of one server share their metrics through, every /metrics scrape then shows the
+    # sum of all workers. python server.py uses a temporary one with several workers. Unset, a scrape shows the
+    # worker that serves it.
+    metrics_dir: str = Field(default="", validation_alias="METRICS_DIR")
+    metrics_snapshot_interval: float = Field(default=1, gt=0, validation_alias="METRICS_SNAPSHOT_INTERVAL")
+
+    # Invalidate the caches on changes made by other workers through Postgres LISTEN/NOTIFY,
+    # otherwise only the TTLs bound their staleness. SUMMARY_CACHE_LISTEN is the name from before it covered every cache.
+    cache_listen: bool = Field(default=True, validation_alias=AliasChoices("CACHE_LISTEN", "SUMMARY_CACHE_LISTEN"))
+
+    @property
+    def postgres_dsn(self) -> str:
+        return f"postgresql://{self.postgres_user}:{self.postgres_password}@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
+
+    @property
+    def database_url(self) -> str:
+        return self.postgres_dsn.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+    @property
+    def read_database_url(self) -> str | None:
+        if not self.postgres_read_dsn:
+            return None
+        return self.postgres_read_dsn.replace("postgresql://", "postgresql+asyncpg://", 1)
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, NamedTuple
+
+from dependency.db import get_session_factory
+from repository.record import RecordRepository
+
+logger = logging.getLogger(__name__)
+
+
+class RecordWriteResult(NamedTuple):
+    record_id: str
+    user_exists: bool
+    created: bool
+
+
+class RecordWriteBuffer:
+    # Group commit for create_record: records queued by concurrent requests are written by one task as a single
+    # multi-row insert (and a single commit) once max_rows are queued or max_delay seconds after the first one.
+    # At most max_pending records wait in the queue, further callers wait for room.
+    def __init__(self, max_rows: int, max_delay: float, max_pending: int):
+        self.__max_rows = max_rows
+        self.__max_delay = max_delay
+        self.__queue: asyncio.Queue[tuple[dict[str, Any], asyncio.Future]] = asyncio.Queue(max_pending)
+        self.__flushing: asyncio.Task | None = None
+
+    def pending(self) -> int:
+        return self.__queue.qsize()
+
+    async def create_record(
+        self, user_id: str, record_id: str, word_count: int, study_time: int, date: datetime
+    ) -> RecordWriteResult:
+        future = asyncio.get_running_loop().create_future()
+        record = {
+            "user_id": user_id,
+            "record_id": record_id,
+            "word_count": word_count,
+            "study_time": study_time,
+            "date": date,
+        }
+        await self.__queue.put((record, future))
+        return await future
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            while True:
+                batch = [await self.__queue.get()]
+                deadline = loop.time() + self.__max_delay
+                while len(batch) < self.__max_rows:
+                    if not self.__queue.empty():
+                        batch.append(self.__queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.__queue.get(), timeout))
+                    except TimeoutError:
+                        break
+                # Shielded so a shutdown does not abort a write half way
+                self.__flushing = asyncio.create_task(self.__flush(batch))
+                batch = []
+                await asyncio.shield(self.__flushing)
+        except asyncio.CancelledError:
+            # Records queued before the shutdown are still written
+            if self.__flushing is not None:
+                await self.__flushing
+            while not self.__queue.empty():
+                batch.append(self.__queue.get_nowait())
+            if batch:
+                await self.__flush(batch)
+            raise
+
+    async def __flush(self, batch: list[tuple[dict[str, Any], asyncio.Future]]) -> None:
+        # create_records expects unique record_ids, a record_id queued twice is a duplicate the second time
+        records = {}
+        for record, _ in batch:
+            records.setdefault(record["record_id"], record)
+        results, errors = {}, {}
+        try:
+            results = await self.__write(list(records.values()))
+        except Exception as e:
+            if len(records) == 1:
+                logger.error("Writing a buffered record failed: %s", e)
+                errors = dict.fromkeys(records, e)
+            else:
+                # One bad record fails the whole insert, alone it only fails its own request
+                logger.warning("Writing %s buffered records failed, writing them one by one: %s", len(records), e)
+                for record_id, record in records.items():
+                    try:
+                        results |= await self.__write([record])
+                    except Exception as e:
+                        logger.error("Writing buffered record %s failed: %s", record_id, e)
+                        errors[record_id] = e
+        for record, future in batch:
+            if future.done():
+                continue
+            record_id = record["record_id"]
+            if record_id in errors:
+                future.set_exception(errors[record_id])
+                continue
+            future.set_result(results[record_id])
+            results[record_id] = results[record_id]._replace(created=False)
+
+    async def __write(self, records: list[dict[str, Any]]) -> dict[str, RecordWriteResult]:
+        async with get_session_factory()() as session:
+            rows = await RecordRepository(session).create_records(records)
+        return {row.record_id: RecordWriteResult(row.record_id, row.user_exists, row.created) for row in rows}
@@ -0,0 +1,11 @@
+from functools import lru_cache
+
+from api.auth.authenticator import JsonWebTokenAuthenticator
+from dependency.cache import get_token_cache
+from dependency.setting import get_settings
+
+
+@lru_cache
+def get_authenticator() -> JsonWebTokenAuthenticator:
+    settings = get_settings()
+    return JsonWebTokenAuthenticator(get_token_cache(), quiet=settings.auth_quiet)
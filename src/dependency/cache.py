@@ -0,0 +1,40 @@
+from functools import lru_cache
+
+from cache.recent_writes import RecentWrites
+from cache.record_version import RecordVersionCache
+from cache.summary import SummaryCache
+from cache.token import TokenCache
+from cache.user import UserExistenceCache
+from dependency.setting import get_settings
+
+
+@lru_cache
+def get_summary_cache() -> SummaryCache:
+    settings = get_settings()
+    return SummaryCache(settings.summary_cache_buckets, settings.summary_cache_ttl)
+
+
+@lru_cache
+def get_user_cache() -> UserExistenceCache:
+    settings = get_settings()
+    return UserExistenceCache(settings.user_cache_size, settings.user_cache_negative_ttl)
+
+
+@lru_cache
+def get_record_version_cache() -> RecordVersionCache:
+    # Kept as long as summaries, also without CACHE_LISTEN a poll sees other workers' writes within that time
+    settings = get_settings()
+    return RecordVersionCache(settings.user_cache_size, settings.summary_cache_ttl)
+
+
+@lru_cache
+def get_token_cache() -> TokenCache:
+    return TokenCache(get_settings().auth_token_cache_size)
+
+
+@lru_cache
+def get_recent_writes() -> RecentWrites:
+    # Only kept when reads can go to a replica
+    settings = get_settings()
+    window = settings.read_your_writes_window if settings.read_database_url else 0
+    return RecentWrites(window, settings.user_cache_size)
@@ -1,28 +1,99 @@
+import logging
+import time
 from collections.abc import AsyncGenerator
 from typing import Any
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
+from core.metrics import POOL_CHECKOUT_DURATION
+from core.settings import Settings
 from dependency.setting import get_settings
 
-settings = get_settings()
+# One engine (and therefore one connection pool) per worker process, created by the app lifespan.
+# The read engine exists when a replica is configured, reads use the primary otherwise.
+_engine: AsyncEngine | None = None
+_session_factory: async_sessionmaker[AsyncSession] | None = None
+_read_engine: AsyncEngine | None = None
+_read_session_factory: async_sessionmaker[AsyncSession] | None = None
 
-DATABASE_URL = f"postgresql+asyncpg://{settings.postgres_user}:{settings.postgres_password}@{settings.postgres_host}:{settings.postgres_port}/{settings.postgres_db}"
 
-kwargs = {
-    "echo": False,
-    "pool_pre_ping": True,
-    "pool_recycle": 1500,
-    "pool_size": 1,
-    "max_overflow": 1,
-}
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    # Records how long a checkout waits for a free (or new) connection
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_DURATION.observe(time.perf_counter() - start)
 
 
-async def get_db() -> AsyncGenerator[AsyncSession, Any]:
-    engine = create_async_engine(DATABASE_URL, **kwargs)
+# SQLAlchemy names a pool's logger after its class, this one is not under the "sqlalchemy" logger SQLAlchemy caps at
+# WARN. Capped the same way, disposals and invalidated connections stay out of the INFO logs.
+logging.getLogger(f"{TimedQueuePool.__module__}.{TimedQueuePool.__name__}").setLevel(logging.WARNING)
+
 
-    async_session = async_sessionmaker(
-        bind=engine,
+def create_engine(settings: Settings, replica: bool = False) -> AsyncEngine:
+    return create_async_engine(
+        settings.read_database_url if replica else settings.database_url,
+        echo=False,
+        poolclass=TimedQueuePool,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_recycle=settings.db_pool_recycle,
+        pool_size=settings.db_read_pool_size if replica else settings.db_pool_size,
+        max_overflow=settings.db_read_max_overflow if replica else settings.db_max_overflow,
+        connect_args={"statement_cache_size": settings.db_statement_cache_size},
     )
-    async with async_session() as session:
+
+
+def init_engine(settings: Settings | None = None) -> AsyncEngine:
+    global _engine, _session_factory, _read_engine, _read_session_factory
+    if _engine is None:
+        settings = settings or get_settings()
+        _engine = create_engine(settings)
+        _session_factory = async_sessionmaker(bind=_engine)
+        if settings.read_database_url:
+            _read_engine = create_engine(settings, replica=True)
+            _read_session_factory = async_sessionmaker(bind=_read_engine)
+    return _engine
+
+
+async def dispose_engine() -> None:
+    global _engine, _session_factory, _read_engine, _read_session_factory
+    for engine in (_engine, _read_engine):
+        if engine is not None:
+            await engine.dispose()
+    _engine = None
+    _session_factory = None
+    _read_engine = None
+    _read_session_factory = None
+
+
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    if _session_factory is None:
+        init_engine()
+    return _session_factory
+
+
+async def get_db() -> AsyncGenerator[AsyncSession, Any]:
+    async with get_session_factory()() as session:
+        yield session
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession | None, Any]:
+    # A replica session, None without a replica so repositories read through the primary session
+    if _engine is None:
+        init_engine()
+    if _read_session_factory is None:
+        yield None
+        return
+    async with _read_session_factory() as session:
         yield session
+
+
+def get_engine() -> AsyncEngine | None:
+    return _engine
+
+
+def get_read_engine() -> AsyncEngine | None:
+    return _read_engine
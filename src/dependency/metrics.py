@@ -0,0 +1,78 @@
+from core.metrics import REGISTRY, CallbackMetric, WorkerSnapshots
+from core.settings import Settings
+from dependency.cache import get_record_version_cache, get_summary_cache, get_token_cache, get_user_cache
+from dependency.db import get_engine, get_read_engine
+from dependency.write_buffer import get_record_write_buffer
+
+# Created by the app lifespan when METRICS_DIR is set, the lifespan also runs its writing task.
+_worker_snapshots: WorkerSnapshots | None = None
+
+
+def _cache_requests() -> dict[tuple[str, ...], float]:
+    values = {}
+    for name, cache in (
+        ("summary", get_summary_cache()),
+        ("user", get_user_cache()),
+        ("token", get_token_cache()),
+        ("record_version", get_record_version_cache()),
+    ):
+        values[(name, "hit")] = cache.hits
+        values[(name, "miss")] = cache.misses
+    return values
+
+
+def _cache_entries() -> dict[tuple[str, ...], float]:
+    user_stats = get_user_cache().stats()
+    return {
+        ("summary",): get_summary_cache().stats()["size"],
+        ("user",): user_stats["known"] + user_stats["missing"],
+        ("token",): get_token_cache().stats()["size"],
+        ("record_version",): get_record_version_cache().stats()["size"],
+    }
+
+
+def _pool_connections() -> dict[tuple[str, ...], float]:
+    values = {}
+    for name, engine in (("primary", get_engine()), ("replica", get_read_engine())):
+        if engine is not None:
+            values[(name, "checked_out")] = engine.pool.checkedout()
+            values[(name, "idle")] = engine.pool.checkedin()
+    return values
+
+
+def _record_buffer_pending() -> dict[tuple[str, ...], float]:
+    write_buffer = get_record_write_buffer()
+    return {(): write_buffer.pending()} if write_buffer is not None else {}
+
+
+def register_runtime_metrics() -> None:
+    # Metrics read from the caches, the pool and the write buffer when /metrics is scraped
+    for metric in (
+        CallbackMetric(
+            "mantra_cache_requests_total", "Cache lookups by result", "counter", ("cache", "result"), _cache_requests
+        ),
+        CallbackMetric("mantra_cache_entries", "Entries held by a cache", "gauge", ("cache",), _cache_entries),
+        CallbackMetric(
+            "mantra_db_pool_connections", "Pooled connections by state", "gauge", ("pool", "state"), _pool_connections
+        ),
+        CallbackMetric(
+            "mantra_record_buffer_pending", "Records waiting in the write buffer", "gauge", (), _record_buffer_pending
+        ),
+    ):
+        REGISTRY.register(metric)
+
+
+def init_worker_snapshots(settings: Settings) -> WorkerSnapshots | None:
+    global _worker_snapshots
+    if settings.metrics_dir:
+        _worker_snapshots = WorkerSnapshots(REGISTRY, settings.metrics_dir, settings.metrics_snapshot_interval)
+    return _worker_snapshots
+
+
+def close_worker_snapshots() -> None:
+    global _worker_snapshots
+    _worker_snapshots = None
+
+
+def get_worker_snapshots() -> WorkerSnapshots | None:
+    return _worker_snapshots
@@ -0,0 +1,13 @@
+from functools import lru_cache
+
+from core.partition import RecordPartitions
+from dependency.setting import get_settings
+
+
+@lru_cache
+def get_record_partitions() -> RecordPartitions | None:
+    # None when RECORDS_PARTITION_INTERVAL is 0, the partitions are then left alone
+    settings = get_settings()
+    if settings.records_partition_interval <= 0:
+        return None
+    return RecordPartitions(settings.records_partition_months_ahead, settings.records_partition_interval)
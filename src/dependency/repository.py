@@ -3,14 +3,31 @@ from typing import Annotated
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from dependency.db import get_db
+from cache.recent_writes import RecentWrites
+from constant.summary_query import SummaryQuery
+from core.settings import Settings
+from dependency.cache import get_recent_writes
+from dependency.db import get_db, get_read_db
+from dependency.setting import get_settings
+from repository.asyncpg_record import AsyncpgRecordRepository
 from repository.record import RecordRepository
 from repository.user import UserRepository
 
 
-def get_record_repository(db: Annotated[AsyncSession, Depends(get_db)]) -> RecordRepository:
-    return RecordRepository(db)
+def get_record_repository(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    read_db: Annotated[AsyncSession | None, Depends(get_read_db)],
+    recent_writes: Annotated[RecentWrites, Depends(get_recent_writes)],
+    settings: Annotated[Settings, Depends(get_settings)],
+) -> RecordRepository:
+    if settings.summary_query == SummaryQuery.ASYNCPG:
+        return AsyncpgRecordRepository(db, read_db, recent_writes)
+    return RecordRepository(db, read_db, recent_writes)
 
 
-def get_user_repository(db: Annotated[AsyncSession, Depends(get_db)]) -> UserRepository:
-    return UserRepository(db)
+def get_user_repository(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    read_db: Annotated[AsyncSession | None, Depends(get_read_db)],
+    recent_writes: Annotated[RecentWrites, Depends(get_recent_writes)],
+) -> UserRepository:
+    return UserRepository(db, read_db, recent_writes)
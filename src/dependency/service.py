@@ -2,7 +2,18 @@ from typing import Annotated
 
 from fastapi import Depends
 
+from cache.recent_writes import RecentWrites
+from cache.record_version import RecordVersionCache
+from cache.summary import SummaryCache
+from cache.user import UserExistenceCache
+from core.partition import RecordPartitions
+from core.settings import Settings
+from core.write_buffer import RecordWriteBuffer
+from dependency.cache import get_recent_writes, get_record_version_cache, get_summary_cache, get_user_cache
+from dependency.partition import get_record_partitions
 from dependency.repository import get_record_repository, get_user_repository
+from dependency.setting import get_settings
+from dependency.write_buffer import get_record_write_buffer
 from repository.record import RecordRepository
 from repository.user import UserRepository
 from service.record import RecordService
@@ -12,12 +23,31 @@ from service.user import UserService
 def get_record_service(
     record_repo: Annotated[RecordRepository, Depends(get_record_repository)],
     user_repo: Annotated[UserRepository, Depends(get_user_repository)],
+    summary_cache: Annotated[SummaryCache, Depends(get_summary_cache)],
+    user_cache: Annotated[UserExistenceCache, Depends(get_user_cache)],
+    write_buffer: Annotated[RecordWriteBuffer | None, Depends(get_record_write_buffer)],
+    recent_writes: Annotated[RecentWrites, Depends(get_recent_writes)],
+    record_version_cache: Annotated[RecordVersionCache, Depends(get_record_version_cache)],
+    partitions: Annotated[RecordPartitions | None, Depends(get_record_partitions)],
 ) -> RecordService:
-    return RecordService(record_repo, user_repo)
+    return RecordService(
+        record_repo, user_repo, summary_cache, user_cache, write_buffer, recent_writes, record_version_cache, partitions
+    )
 
 
 def get_user_service(
     record_repo: Annotated[RecordRepository, Depends(get_record_repository)],
     user_repo: Annotated[UserRepository, Depends(get_user_repository)],
+    settings: Annotated[Settings, Depends(get_settings)],
+    summary_cache: Annotated[SummaryCache, Depends(get_summary_cache)],
+    user_cache: Annotated[UserExistenceCache, Depends(get_user_cache)],
+    record_version_cache: Annotated[RecordVersionCache, Depends(get_record_version_cache)],
 ) -> UserService:
-    return UserService(record_repo, user_repo)
+    return UserService(
+        record_repo,
+        user_repo,
+        settings.summary_moving_average_source,
+        summary_cache,
+        user_cache,
+        record_version_cache,
+    )
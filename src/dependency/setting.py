@@ -1,5 +1,8 @@
+from functools import lru_cache
+
 from core.settings import Settings
 
 
+@lru_cache
 def get_settings() -> Settings:
     return Settings()
@@ -0,0 +1,23 @@
+from core.settings import Settings
+from core.write_buffer import RecordWriteBuffer
+
+# Created by the app lifespan when RECORD_BUFFER_ROWS > 0, the lifespan also runs its flushing task.
+_record_write_buffer: RecordWriteBuffer | None = None
+
+
+def init_record_write_buffer(settings: Settings) -> RecordWriteBuffer | None:
+    global _record_write_buffer
+    if settings.record_buffer_rows > 0:
+        _record_write_buffer = RecordWriteBuffer(
+            settings.record_buffer_rows, settings.record_buffer_delay, settings.record_buffer_pending
+        )
+    return _record_write_buffer
+
+
+def close_record_write_buffer() -> None:
+    global _record_write_buffer
+    _record_write_buffer = None
+
+
+def get_record_write_buffer() -> RecordWriteBuffer | None:
+    return _record_write_buffer
@@ -1,29 +1,102 @@
+import asyncio
 import logging
-import logging.config
+import time
 import uuid
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, status
 from fastapi.exceptions import HTTPException, RequestValidationError
 from fastapi.responses import JSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
+from api.metrics.controller import router as metrics_router
 from api.v1.router import router as v1_router
+from cache.listener import NotificationListener
+from constant.channel import RECORD_WRITTEN_CHANNEL, USER_CHANGED_CHANNEL
 from core.contextvar.trace_id import trace_id_ctx
-from util.logger import logger_config
-
-logging.config.dictConfig(logger_config())
+from core.metrics import REQUEST_DURATION
+from dependency.cache import get_recent_writes, get_record_version_cache, get_summary_cache, get_user_cache
+from dependency.db import dispose_engine, init_engine
+from dependency.metrics import close_worker_snapshots, init_worker_snapshots, register_runtime_metrics
+from dependency.partition import get_record_partitions
+from dependency.setting import get_settings
+from dependency.write_buffer import close_record_write_buffer, init_record_write_buffer
+from util.logger import configure_logging
+
+configure_logging(get_settings())
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    init_engine(settings)
+    tasks = []
+    record_partitions = get_record_partitions()
+    if record_partitions is not None:
+        tasks.append(asyncio.create_task(record_partitions.run()))
+    record_write_buffer = init_record_write_buffer(settings)
+    if record_write_buffer is not None:
+        tasks.append(asyncio.create_task(record_write_buffer.run()))
+    register_runtime_metrics()
+    worker_snapshots = init_worker_snapshots(settings)
+    if worker_snapshots is not None:
+        tasks.append(asyncio.create_task(worker_snapshots.run()))
+    if settings.cache_listen:
+        summary_cache, user_cache, recent_writes = get_summary_cache(), get_user_cache(), get_recent_writes()
+        record_version_cache = get_record_version_cache()
+
+        # Writes through other workers also keep the user's reads on the primary for the read-your-writes window
+        def record_written(user_id: str):
+            summary_cache.invalidate(user_id)
+            record_version_cache.invalidate(user_id)
+            recent_writes.add(user_id)
+
+        def user_changed(user_id: str):
+            user_cache.invalidate(user_id)
+            recent_writes.add(user_id)
+
+        def reset_caches():
+            summary_cache.clear()
+            user_cache.clear()
+            record_version_cache.clear()
+
+        listener = NotificationListener(
+            settings.postgres_dsn,
+            {RECORD_WRITTEN_CHANNEL: record_written, USER_CHANGED_CHANNEL: user_changed},
+            reset_caches,
+        )
+        tasks.append(asyncio.create_task(listener.run()))
+    yield
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    close_record_write_buffer()
+    await dispose_engine()
+    if worker_snapshots is not None:
+        worker_snapshots.close()
+        close_worker_snapshots()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
+    start = time.perf_counter()
     trace_id = request.headers.get("X-Trace-Id", str(uuid.uuid4()))
     trace_id_ctx.set(trace_id)
     response = await call_next(request)
     response.headers["X-Trace-Id"] = trace_id
     trace_id_ctx.set("-")
+    # The route template keeps the label set bounded, unmatched paths share one label
+    route = request.scope.get("route")
+    REQUEST_DURATION.observe(
+        time.perf_counter() - start,
+        request.method,
+        route.path if route is not None else "unmatched",
+        str(response.status_code),
+    )
     return response
 
 
@@ -64,3 +137,4 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 
 
 app.include_router(v1_router, prefix="/api/v1")
+app.include_router(metrics_router)
@@ -1,15 +1,21 @@
 import arrow
-from sqlalchemy import UUID, Column, DateTime, Integer, String
+from sqlalchemy import UUID, Column, DateTime, Index, Integer, String, text
 
 from model.base import Base
 
 
 class Record(Base):
     __tablename__ = "records"
+    # Range partitioned by month on date, see records_ensure_partitions in the partition_records migration
+    __table_args__ = (
+        Index("ix_records_record_id", "record_id", "date", unique=True),
+        Index("ix_records_user_id_date", "user_id", "date"),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    record_id = Column(String, unique=True, index=True)
-    user_id = Column(UUID(as_uuid=True), index=True, nullable=False)
+    id = Column(Integer, primary_key=True, server_default=text("nextval('records_id_seq')"))
+    record_id = Column(String)
+    user_id = Column(UUID(as_uuid=True), nullable=False)
     word_count = Column(Integer, nullable=False)
     study_time = Column(Integer, nullable=False)
-    date = Column(DateTime, default=arrow.utcnow().naive, nullable=False)
+    date = Column(DateTime, primary_key=True, default=arrow.utcnow().naive, nullable=False)
@@ -0,0 +1,14 @@
+from sqlalchemy import UUID, BigInteger, Column, DateTime, Integer, String
+
+from model.base import Base
+
+
+class RecordRollup(Base):
+    __tablename__ = "record_rollups"
+
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    granularity = Column(String, primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    word_count = Column(BigInteger, nullable=False, default=0)
+    study_time = Column(BigInteger, nullable=False, default=0)
+    record_count = Column(Integer, nullable=False, default=0)
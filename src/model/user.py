@@ -1,7 +1,7 @@
 import uuid
 
 import arrow
-from sqlalchemy import UUID, Column, DateTime, Integer, String
+from sqlalchemy import UUID, BigInteger, Column, DateTime, Integer, String
 
 from model.base import Base
 
@@ -13,3 +13,5 @@ class User(Base):
     user_id = Column(UUID(as_uuid=True), default=uuid.uuid4, index=True, unique=True, nullable=False)
     username = Column(String, unique=True, index=True, nullable=False)
     created_at = Column(DateTime, default=arrow.utcnow().naive, nullable=False)
+    # Bumped by every write adding records of the user, validates their summaries (ETag)
+    record_version = Column(BigInteger, nullable=False, default=0, server_default="0")
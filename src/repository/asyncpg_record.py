@@ -0,0 +1,127 @@
+from collections.abc import Sequence
+from datetime import datetime
+from functools import lru_cache
+from typing import Any
+
+import asyncpg
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache.recent_writes import RecentWrites
+from constant.granularity import Granularity
+from core.metrics import DB_ROWS, stage
+from repository.record import RecordRepository
+from repository.routing import read_session
+from util.time_bucket import ceil_bucket, floor_bucket
+
+# The statement RecordRepository builds with SQLAlchemy Core, written out once per set of windows.
+# $1 user ids, $2 granularity, [$3, $4) the whole buckets read from record_rollups, $5 start and $6 end.
+SUMMARY_SQL = """
+SELECT user_id, bucket, sum(word_count)::bigint AS total_words, sum(study_time)::bigint AS total_time{averages}
+FROM (
+    SELECT user_id, bucket, word_count, study_time
+    FROM record_rollups
+    WHERE user_id = ANY($1::uuid[]) AND granularity = $2::text AND bucket >= $3 AND bucket < $4
+    UNION ALL
+    SELECT user_id, date_trunc($2::text, date), word_count, study_time
+    FROM records
+    WHERE user_id = ANY($1::uuid[]) AND date >= $5 AND date < $3
+    UNION ALL
+    SELECT user_id, date_trunc($2::text, date), word_count, study_time
+    FROM records
+    WHERE user_id = ANY($1::uuid[]) AND date >= $4 AND date < $6
+) AS buckets
+GROUP BY user_id, bucket{windows}
+ORDER BY user_id, bucket
+"""
+
+# Same float8 division as _window_average, NULL until n buckets are available
+AVERAGE_SQL = (
+    "CASE WHEN count(*) OVER w{n} = {n} THEN CAST(sum(sum({column})::bigint) OVER w{n} AS float8) / {n} END"
+    " AS {column}_sma_{n}"
+)
+WINDOW_SQL = "w{n} AS (PARTITION BY user_id ORDER BY bucket ROWS BETWEEN {preceding} PRECEDING AND CURRENT ROW)"
+
+
+class SummaryRecord(asyncpg.Record):
+    # asyncpg records are compact tuples read by key, the services read summary rows by attribute like SQLAlchemy's
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+@lru_cache(maxsize=256)
+def _summary_sql(sma_windows: tuple[int, ...]) -> str:
+    windows = sorted(set(sma_windows))
+    averages = "".join(
+        f",\n       {AVERAGE_SQL.format(n=n, column=column)}"
+        for n in sma_windows
+        for column in ("word_count", "study_time")
+    )
+    clause = ", ".join(WINDOW_SQL.format(n=n, preceding=n - 1) for n in windows)
+    return SUMMARY_SQL.format(averages=averages, windows=f"\nWINDOW {clause}" if clause else "")
+
+
+class AsyncpgRecordRepository(RecordRepository):
+    # RecordRepository whose summary reads skip SQLAlchemy: the query text is fixed per set of windows, so asyncpg
+    # prepares it once per connection (DB_STATEMENT_CACHE_SIZE) and the rows come back as SummaryRecords.
+    # Everything else, streaming and summaries with statistics included, is RecordRepository's.
+    def __init__(
+        self,
+        db: AsyncSession,
+        read_db: AsyncSession | None = None,
+        recent_writes: RecentWrites | None = None,
+    ):
+        super().__init__(db, read_db, recent_writes)
+        self.__db = db
+        self.__read_db = read_db
+        self.__recent_writes = recent_writes
+
+    async def get_record_summary(
+        self,
+        user_id: str,
+        start: datetime,
+        end: datetime,
+        granularity: Granularity,
+        sma_windows: Sequence[int] = (),
+        statistics: bool = False,
+    ) -> list[SummaryRecord]:
+        if statistics:
+            return await super().get_record_summary(user_id, start, end, granularity, sma_windows, statistics)
+        with stage("summary_query"):
+            result = await self.__fetch_summary([user_id], start, end, granularity, tuple(sma_windows))
+        DB_ROWS.inc("summary", amount=len(result))
+        return result
+
+    async def get_record_summaries(
+        self, user_ids: Sequence[str], start: datetime, end: datetime, granularity: Granularity
+    ) -> list[SummaryRecord]:
+        with stage("summary_query"):
+            result = await self.__fetch_summary(user_ids, start, end, granularity, ())
+        DB_ROWS.inc("summary", amount=len(result))
+        return result
+
+    async def __fetch_summary(
+        self,
+        user_ids: Sequence[str],
+        start: datetime,
+        end: datetime,
+        granularity: Granularity,
+        sma_windows: tuple[int, ...],
+    ) -> list[SummaryRecord]:
+        full_start, full_end = ceil_bucket(start, granularity), floor_bucket(end, granularity)
+        if full_start >= full_end:
+            full_start = full_end = start
+        session = read_session(self.__db, self.__read_db, self.__recent_writes, user_ids)
+        connection = await (await session.connection()).get_raw_connection()
+        return await connection.driver_connection.fetch(
+            _summary_sql(sma_windows),
+            [str(user_id) for user_id in user_ids],
+            granularity.value,
+            full_start,
+            full_end,
+            start,
+            end,
+            record_class=SummaryRecord,
+        )
@@ -1,43 +1,424 @@
+from collections.abc import AsyncIterator, Sequence
 from datetime import datetime
+from typing import Any
 
 from fastapi import Depends
-from sqlalchemy import func, select
+from sqlalchemy import (
+    UUID,
+    BigInteger,
+    DateTime,
+    Float,
+    Integer,
+    String,
+    case,
+    cast,
+    column,
+    delete,
+    func,
+    null,
+    select,
+    table,
+    true,
+    union_all,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import ColumnElement, FromClause, Select, Update
 
+from cache.recent_writes import RecentWrites
+from constant.channel import RECORD_WRITTEN_CHANNEL
 from constant.granularity import Granularity
+from core.metrics import DB_ROWS, stage
 from dependency.db import get_db
 from model.record import Record
+from model.record_rollup import RecordRollup
+from model.user import User
+from repository.routing import read_session
+from util.time_bucket import ceil_bucket, floor_bucket, next_bucket
+
+
+def _upsert_rollups(source: FromClause) -> Insert:
+    # Adds the rows of `source` (user_id, word_count, study_time, date) to every granularity of record_rollups
+    granularities = values(column("granularity", String), name="granularities").data([(g.value,) for g in Granularity])
+    bucket = func.date_trunc(granularities.c.granularity, source.c.date)
+    rows = (
+        select(
+            source.c.user_id,
+            granularities.c.granularity,
+            bucket,
+            func.sum(source.c.word_count),
+            func.sum(source.c.study_time),
+            func.count(),
+        )
+        .select_from(source.join(granularities, true()))
+        .group_by(source.c.user_id, granularities.c.granularity, bucket)
+    )
+    stmt = insert(RecordRollup).from_select(
+        ["user_id", "granularity", "bucket", "word_count", "study_time", "record_count"], rows
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[RecordRollup.user_id, RecordRollup.granularity, RecordRollup.bucket],
+        set_={
+            "word_count": RecordRollup.word_count + stmt.excluded.word_count,
+            "study_time": RecordRollup.study_time + stmt.excluded.study_time,
+            "record_count": RecordRollup.record_count + stmt.excluded.record_count,
+        },
+    )
+
+
+def _bump_record_versions(user_ids: Select | Sequence[str]) -> Update:
+    # Every user gets one increment per statement, however many of their records it writes
+    return update(User).where(User.user_id.in_(user_ids)).values(record_version=User.record_version + 1)
+
+
+def _window_average(
+    total: ColumnElement[int], user_id: ColumnElement[str], bucket: ColumnElement[datetime], n: int
+) -> ColumnElement[float]:
+    # AVG over the user's last n buckets, NULL until n buckets are available. The window sum is divided as float8,
+    # the same IEEE division Python does, so the rounded values match the in-process moving average.
+    window = {"partition_by": user_id, "order_by": bucket, "rows": (-(n - 1), 0)}
+    return case(
+        (func.count().over(**window) == n, cast(func.sum(total).over(**window), Float) / n),
+        else_=None,
+    )
+
+
+def _statistics(buckets: FromClause) -> list[ColumnElement]:
+    # Distribution of the raw records of each bucket: record_count and <field>_{min,max,avg,stddev,p50,p95}.
+    # stddev is the sample standard deviation, NULL for a single record; the percentiles are interpolated.
+    columns = [func.count().label("record_count")]
+    for name in ("word_count", "study_time"):
+        value = buckets.c[name]
+        columns += [
+            func.min(value).label(f"{name}_min"),
+            func.max(value).label(f"{name}_max"),
+            cast(func.avg(value), Float).label(f"{name}_avg"),
+            cast(func.stddev_samp(value), Float).label(f"{name}_stddev"),
+            cast(func.percentile_cont(0.5).within_group(value), Float).label(f"{name}_p50"),
+            cast(func.percentile_cont(0.95).within_group(value), Float).label(f"{name}_p95"),
+        ]
+    return columns
 
 
 class RecordRepository:
-    def __init__(self, db: AsyncSession = Depends(get_db)):
+    # Summaries are read through read_db (a replica) when given, everything else through the primary db
+    def __init__(
+        self,
+        db: AsyncSession = Depends(get_db),
+        read_db: AsyncSession | None = None,
+        recent_writes: RecentWrites | None = None,
+    ):
         self.__db = db
+        self.__read_db = read_db
+        self.__recent_writes = recent_writes
 
     async def get_record(self, record_id: str) -> Record | None:
         stmt = select(Record).where(Record.record_id == record_id)
         return await self.__db.scalar(stmt)
 
     async def get_record_summary(
-        self, user_id: str, start: datetime, end: datetime, granularity: Granularity
+        self,
+        user_id: str,
+        start: datetime,
+        end: datetime,
+        granularity: Granularity,
+        sma_windows: Sequence[int] = (),
+        statistics: bool = False,
     ) -> list[Record]:
-        stmt = (
+        with stage("summary_query"):
+            statement = self.__summary_statement([user_id], start, end, granularity, sma_windows, statistics)
+            rows = await self.__reader([user_id]).execute(statement)
+            result = rows.all()
+        DB_ROWS.inc("summary", amount=len(result))
+        return result
+
+    async def get_record_summary_page(
+        self,
+        user_id: str,
+        start: datetime,
+        end: datetime,
+        granularity: Granularity,
+        limit: int,
+        after: datetime | None = None,
+        lookback: int | None = 0,
+        statistics: bool = False,
+    ) -> list[Row]:
+        # Keyset page of get_record_summary: the first `limit` buckets of [start, end) after the bucket `after`,
+        # preceded by up to `lookback` buckets up to `after` (all of them when None) to warm up the moving averages.
+        # The warm-up buckets carry no statistics, their statistics columns are NULL.
+        seek = start if after is None else max(start, next_bucket(after, granularity))
+        page = self.__page_statement(user_id, seek, end, granularity, limit, statistics=statistics)
+        pages = [page]
+        if after is not None and lookback != 0:
+            previous = self.__page_statement(user_id, start, min(seek, end), granularity, lookback, descending=True)
+            padding = [cast(null(), column.type).label(column.name) for column in page.selected_columns[4:]]
+            pages.insert(0, previous.add_columns(*padding))
+        buckets = union_all(*(select(page.subquery()) for page in pages)).subquery()
+        with stage("summary_query"):
+            rows = await self.__reader([user_id]).execute(select(buckets).order_by(buckets.c.bucket))
+            result = rows.all()
+        DB_ROWS.inc("summary", amount=len(result))
+        return result
+
+    async def get_record_summaries(
+        self, user_ids: Sequence[str], start: datetime, end: datetime, granularity: Granularity
+    ) -> list[Row]:
+        # get_record_summary for several users in one query, the rows are ordered by user_id then bucket
+        with stage("summary_query"):
+            statement = self.__summary_statement(user_ids, start, end, granularity, ())
+            rows = await self.__reader(user_ids).execute(statement)
+            result = rows.all()
+        DB_ROWS.inc("summary", amount=len(result))
+        return result
+
+    async def stream_record_summary(
+        self,
+        user_id: str,
+        start: datetime,
+        end: datetime,
+        granularity: Granularity,
+        sma_windows: Sequence[int] = (),
+        statistics: bool = False,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Row]:
+        # Same rows as get_record_summary, fetched batch_size at a time through a server-side cursor.
+        # The request's session is closed before a streamed body is sent, so the cursor gets a connection
+        # of its own that is held for as long as the rows are iterated.
+        stmt = self.__summary_statement([user_id], start, end, granularity, sma_windows, statistics)
+        async with self.__reader([user_id]).bind.connect() as connection:
+            result = await connection.stream(stmt.execution_options(yield_per=batch_size))
+            count = 0
+            try:
+                async for row in result:
+                    count += 1
+                    yield row
+            finally:
+                DB_ROWS.inc("summary", amount=count)
+
+    def __reader(self, user_ids: Sequence[str]) -> AsyncSession:
+        return read_session(self.__db, self.__read_db, self.__recent_writes, user_ids)
+
+    def __summary_statement(
+        self,
+        user_ids: Sequence[str],
+        start: datetime,
+        end: datetime,
+        granularity: Granularity,
+        sma_windows: Sequence[int],
+        statistics: bool = False,
+    ) -> Select:
+        # Whole buckets inside [start, end) come from record_rollups, only the partial buckets
+        # at both edges of the range are aggregated from the raw records.
+        # Every window in sma_windows adds word_count_sma_<n> and study_time_sma_<n> columns, statistics adds the
+        # _statistics columns. Distributions cannot be rolled up, so then every bucket is aggregated from the records.
+        if statistics:
+            buckets = self.__record_buckets(user_ids, start, end, granularity).subquery()
+        else:
+            full_start, full_end = ceil_bucket(start, granularity), floor_bucket(end, granularity)
+            if full_start >= full_end:
+                full_start = full_end = start
+            rollups = select(
+                RecordRollup.user_id.label("user_id"),
+                RecordRollup.bucket.label("bucket"),
+                RecordRollup.word_count.label("word_count"),
+                RecordRollup.study_time.label("study_time"),
+            ).where(
+                RecordRollup.user_id.in_(user_ids),
+                RecordRollup.granularity == granularity,
+                RecordRollup.bucket >= full_start,
+                RecordRollup.bucket < full_end,
+            )
+            edges = [
+                self.__record_buckets(user_ids, edge_start, edge_end, granularity)
+                for edge_start, edge_end in ((start, full_start), (full_end, end))
+            ]
+            buckets = union_all(rollups, *edges).subquery()
+        total_words = cast(func.sum(buckets.c.word_count), BigInteger)
+        total_time = cast(func.sum(buckets.c.study_time), BigInteger)
+        columns = [
+            buckets.c.user_id,
+            buckets.c.bucket,
+            total_words.label("total_words"),
+            total_time.label("total_time"),
+        ]
+        for window in sma_windows:
+            columns += [
+                _window_average(total_words, buckets.c.user_id, buckets.c.bucket, window).label(
+                    f"word_count_sma_{window}"
+                ),
+                _window_average(total_time, buckets.c.user_id, buckets.c.bucket, window).label(
+                    f"study_time_sma_{window}"
+                ),
+            ]
+        if statistics:
+            columns += _statistics(buckets)
+        return (
+            select(*columns).group_by(buckets.c.user_id, buckets.c.bucket).order_by(buckets.c.user_id, buckets.c.bucket)
+        )
+
+    def __page_statement(
+        self,
+        user_id: str,
+        start: datetime,
+        end: datetime,
+        granularity: Granularity,
+        limit: int,
+        descending: bool = False,
+        statistics: bool = False,
+    ) -> Select:
+        # The first (or last) `limit` rows of __summary_statement. Whole buckets never share a bucket with the
+        # partial ones at the edges, so the rollups need no grouping: they are read in (user_id, granularity,
+        # bucket) key order and stop at the limit, wherever the page starts. Statistics come from the raw records,
+        # which are aggregated from `start` on.
+        if statistics:
+            page = self.__summary_statement([user_id], start, end, granularity, (), statistics)
+            bucket = page.selected_columns.bucket
+            return page.order_by(None).order_by(bucket.desc() if descending else bucket).limit(limit)
+        full_start, full_end = ceil_bucket(start, granularity), floor_bucket(end, granularity)
+        if full_start >= full_end:
+            full_start = full_end = start
+        rollups = (
             select(
-                func.date_trunc(granularity, Record.date).label("bucket"),
-                func.sum(Record.word_count).label("total_words"),
-                func.sum(Record.study_time).label("total_time"),
+                RecordRollup.user_id.label("user_id"),
+                RecordRollup.bucket.label("bucket"),
+                cast(RecordRollup.word_count, BigInteger).label("total_words"),
+                cast(RecordRollup.study_time, BigInteger).label("total_time"),
             )
-            .where(Record.user_id == user_id, Record.date >= start, Record.date < end)
-            .group_by("bucket")
-            .order_by("bucket")
+            .where(
+                RecordRollup.user_id == user_id,
+                RecordRollup.granularity == granularity,
+                RecordRollup.bucket >= full_start,
+                RecordRollup.bucket < full_end,
+            )
+            .order_by(RecordRollup.bucket.desc() if descending else RecordRollup.bucket)
+            .limit(limit)
         )
-        rows = await self.__db.execute(stmt)
-        result = rows.all()
-        return result
+        edges = union_all(
+            *(
+                self.__record_buckets([user_id], edge_start, edge_end, granularity)
+                for edge_start, edge_end in ((start, full_start), (full_end, end))
+            )
+        ).subquery()
+        edge_buckets = select(
+            edges.c.user_id,
+            edges.c.bucket,
+            cast(func.sum(edges.c.word_count), BigInteger).label("total_words"),
+            cast(func.sum(edges.c.study_time), BigInteger).label("total_time"),
+        ).group_by(edges.c.user_id, edges.c.bucket)
+        buckets = union_all(select(rollups.subquery()), edge_buckets).subquery()
+        return select(buckets).order_by(buckets.c.bucket.desc() if descending else buckets.c.bucket).limit(limit)
+
+    def __record_buckets(
+        self, user_ids: Sequence[str], start: datetime, end: datetime, granularity: Granularity
+    ) -> Select:
+        # A plain date range so the planner prunes to its partitions and seeks (user_id, date)
+        return select(
+            Record.user_id.label("user_id"),
+            func.date_trunc(granularity, Record.date).label("bucket"),
+            Record.word_count.label("word_count"),
+            Record.study_time.label("study_time"),
+        ).where(Record.user_id.in_(user_ids), Record.date >= start, Record.date < end)
 
     async def create_record(
         self, user_id: str, record_id: str, word_count: int, study_time: int, date: datetime
-    ) -> None:
-        record = Record(user_id=user_id, record_id=record_id, word_count=word_count, study_time=study_time, date=date)
-        self.__db.add(record)
+    ) -> Row:
+        rows = await self.create_records(
+            [
+                {
+                    "user_id": user_id,
+                    "record_id": record_id,
+                    "word_count": word_count,
+                    "study_time": study_time,
+                    "date": date,
+                }
+            ]
+        )
+        return rows[0]
+
+    async def create_records(self, records: list[dict[str, Any]]) -> list[Row]:
+        # A single round trip: records of unknown users are not inserted, existing record_ids are skipped and
+        # only the inserted records are added to the rollups. Every input record gets a
+        # (record_id, user_exists, created) row back. record_ids are expected to be unique within `records`.
+        new_records = select(
+            values(
+                column("record_id", String),
+                column("user_id", UUID(as_uuid=True)),
+                column("word_count", Integer),
+                column("study_time", Integer),
+                column("date", DateTime),
+                name="new_records",
+            ).data(
+                [
+                    (record["record_id"], record["user_id"], record["word_count"], record["study_time"], record["date"])
+                    for record in records
+                ]
+            )
+        ).cte("new_records")
+        inserted = (
+            insert(Record)
+            .from_select(
+                ["record_id", "user_id", "word_count", "study_time", "date"],
+                select(new_records).join(User, User.user_id == new_records.c.user_id),
+            )
+            # record_id hashes the record timestamp, the partition key only completes the unique index
+            .on_conflict_do_nothing(index_elements=[Record.record_id, Record.date])
+            .returning(Record.record_id, Record.user_id, Record.word_count, Record.study_time, Record.date)
+            .cte("inserted")
+        )
+        stmt = (
+            select(
+                new_records.c.record_id,
+                User.id.is_not(None).label("user_exists"),
+                inserted.c.record_id.is_not(None).label("created"),
+                # Delivered to every worker's summary cache on commit, Postgres folds duplicate payloads
+                case(
+                    (
+                        inserted.c.record_id.is_not(None),
+                        func.pg_notify(RECORD_WRITTEN_CHANNEL, cast(new_records.c.user_id, String)),
+                    )
+                ).label("notified"),
+            )
+            .select_from(
+                new_records.outerjoin(User, User.user_id == new_records.c.user_id).outerjoin(
+                    inserted, inserted.c.record_id == new_records.c.record_id
+                )
+            )
+            .add_cte(_upsert_rollups(inserted).cte("rollups"))
+            .add_cte(_bump_record_versions(select(inserted.c.user_id)).cte("record_versions"))
+        )
+        with stage("record_write"):
+            rows = await self.__db.execute(stmt)
+            result = rows.all()
+            await self.__db.commit()
+        DB_ROWS.inc("record_write", amount=len(result))
+        return result
+
+    async def rebuild_rollups(self, user_ids: Sequence[str]) -> None:
+        # Recomputes the users' rollups from their records, for records written without create_records
+        # (bulk loads with COPY). Commits whatever else the session has pending, such as those records.
+        await self.__db.execute(delete(RecordRollup).where(RecordRollup.user_id.in_(user_ids)))
+        source = (
+            select(Record.user_id, Record.word_count, Record.study_time, Record.date)
+            .where(Record.user_id.in_(user_ids))
+            .subquery()
+        )
+        await self.__db.execute(_upsert_rollups(source))
+        # Running workers drop the users' cached summaries and versions on commit, as for create_records
+        bumped = _bump_record_versions(user_ids).returning(User.user_id).cte("record_versions")
+        await self.__db.execute(select(func.pg_notify(RECORD_WRITTEN_CHANNEL, cast(bumped.c.user_id, String))))
         await self.__db.commit()
-        return
+
+    async def ensure_partitions(self, start: datetime, end: datetime) -> int:
+        created = await self.__db.scalar(select(func.records_ensure_partitions(start, end)))
+        await self.__db.commit()
+        return created
+
+    async def get_default_partition_months(self) -> list[datetime]:
+        # Months of the records that fell into records_default for want of a partition
+        records_default = table("records_default", column("date", DateTime))
+        month = func.date_trunc("month", records_default.c.date)
+        result = await self.__db.scalars(select(month).distinct().order_by(month))
+        return list(result)
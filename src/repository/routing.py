@@ -0,0 +1,14 @@
+from collections.abc import Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache.recent_writes import RecentWrites
+
+
+def read_session(
+    db: AsyncSession, read_db: AsyncSession | None, recent_writes: RecentWrites | None, user_ids: Iterable[str]
+) -> AsyncSession:
+    # The replica session, unless there is none or one of the users wrote within the read-your-writes window
+    if read_db is None or (recent_writes is not None and any(map(recent_writes.contains, user_ids))):
+        return db
+    return read_db
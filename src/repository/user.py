@@ -1,15 +1,39 @@
+from collections.abc import Sequence
+
 from fastapi import Depends
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from cache.recent_writes import RecentWrites
 from dependency.db import get_db
 from model.user import User
+from repository.routing import read_session
 
 
 class UserRepository:
-    def __init__(self, db: AsyncSession = Depends(get_db)):
+    def __init__(
+        self,
+        db: AsyncSession = Depends(get_db),
+        read_db: AsyncSession | None = None,
+        recent_writes: RecentWrites | None = None,
+    ):
         self.__db = db
+        self.__read_db = read_db
+        self.__recent_writes = recent_writes
 
     async def get_user(self, user_id: str) -> User | None:
         stmt = select(User).where(User.user_id == user_id)
-        return await self.__db.scalar(stmt)
+        return await self.__reader([user_id]).scalar(stmt)
+
+    async def get_record_version(self, user_id: str) -> int | None:
+        # None when the user does not exist
+        stmt = select(User.record_version).where(User.user_id == user_id)
+        return await self.__reader([user_id]).scalar(stmt)
+
+    async def get_users(self, user_ids: Sequence[str]) -> Sequence[User]:
+        stmt = select(User).where(User.user_id.in_(user_ids))
+        result = await self.__reader(user_ids).scalars(stmt)
+        return result.all()
+
+    def __reader(self, user_ids: Sequence[str]) -> AsyncSession:
+        return read_session(self.__db, self.__read_db, self.__recent_writes, user_ids)
@@ -0,0 +1,7 @@
+"""Production entrypoint: python server.py, configured by the SERVER_* and DB_CONNECTION_BUDGET settings."""
+
+from core.server import run
+from dependency.setting import get_settings
+
+if __name__ == "__main__":
+    run(get_settings())
@@ -1,30 +1,129 @@
 import hashlib
+import uuid
+from typing import Any
 
 import arrow
 from fastapi import HTTPException
 
+from cache.recent_writes import RecentWrites
+from cache.record_version import RecordVersionCache
+from cache.summary import SummaryCache
+from cache.user import UserExistenceCache
+from constant.record_status import RecordStatus
+from core.partition import RecordPartitions
+from core.write_buffer import RecordWriteBuffer
 from repository.record import RecordRepository
 from repository.user import UserRepository
 
 
 class RecordService:
-    def __init__(self, record_repo: RecordRepository, user_repo: UserRepository):
+    def __init__(
+        self,
+        record_repo: RecordRepository,
+        user_repo: UserRepository,
+        summary_cache: SummaryCache | None = None,
+        user_cache: UserExistenceCache | None = None,
+        write_buffer: RecordWriteBuffer | None = None,
+        recent_writes: RecentWrites | None = None,
+        record_version_cache: RecordVersionCache | None = None,
+        partitions: RecordPartitions | None = None,
+    ):
         self.__record_repo = record_repo
         self.__user_repo = user_repo
+        self.__summary_cache = summary_cache
+        self.__user_cache = user_cache
+        # Single records are group committed with other requests' records when set
+        self.__write_buffer = write_buffer
+        self.__recent_writes = recent_writes
+        self.__record_version_cache = record_version_cache
+        # Creates the partitions of the records' months ahead of the insert when set
+        self.__partitions = partitions
 
     async def create_record(self, user_id: str, word_count: int, study_time: int, timestamp: int | None) -> None:
-        user = await self.__user_repo.get_user(user_id)
-        if not user:
-            raise HTTPException(status_code=404, detail=f"User {user_id} not found")
-        now = arrow.utcnow()
-        if timestamp is not None:
-            now = arrow.get(timestamp)
+        self.__check_user(user_id)
+        now = arrow.get(timestamp) if timestamp is not None else self.__now()
         record_id = self.__generate_record_id(user_id, word_count, study_time, now.int_timestamp)
-        if await self.__record_repo.get_record(record_id):
+        if self.__partitions is not None:
+            await self.__partitions.ensure([now.naive])
+        writer = self.__write_buffer or self.__record_repo
+        result = await writer.create_record(user_id, record_id, word_count, study_time, now.naive)
+        self.__remember_user(user_id, result.user_exists)
+        if not result.user_exists:
+            raise HTTPException(status_code=404, detail=f"User {user_id} not found")
+        if not result.created:
             raise HTTPException(status_code=400, detail=f"Record {record_id} already exists")
-        await self.__record_repo.create_record(user.user_id, record_id, word_count, study_time, now.naive)
+        self.__invalidate_summaries(user_id)
         return
 
+    async def create_records(self, user_id: str, records: list[dict[str, Any]]) -> list[dict[str, str]]:
+        self.__check_user(user_id)
+        now = self.__now()
+        record_ids = []
+        new_records = {}
+        for record in records:
+            date = now if record.get("timestamp") is None else arrow.get(record["timestamp"])
+            record_id = self.__generate_record_id(
+                user_id, record["word_count"], record["study_time"], date.int_timestamp
+            )
+            record_ids.append(record_id)
+            new_records.setdefault(
+                record_id,
+                {
+                    "user_id": user_id,
+                    "record_id": record_id,
+                    "word_count": record["word_count"],
+                    "study_time": record["study_time"],
+                    "date": date.naive,
+                },
+            )
+        if self.__partitions is not None:
+            await self.__partitions.ensure(record["date"] for record in new_records.values())
+        rows = await self.__record_repo.create_records(list(new_records.values()))
+        user_exists = all(row.user_exists for row in rows)
+        self.__remember_user(user_id, user_exists)
+        if not user_exists:
+            raise HTTPException(status_code=404, detail=f"User {user_id} not found")
+        created = {row.record_id for row in rows if row.created}
+        if created:
+            self.__invalidate_summaries(user_id)
+        results = []
+        for record_id in record_ids:
+            # Only the first occurrence of a record_id repeated inside the batch counts as created
+            status = RecordStatus.CREATED if record_id in created else RecordStatus.DUPLICATE
+            created.discard(record_id)
+            results.append({"record_id": record_id, "status": status})
+        return results
+
+    def __now(self) -> arrow.Arrow:
+        # Truncated to the second record_id hashes, so records are unique on (record_id, date) like on record_id
+        return arrow.get(arrow.utcnow().int_timestamp)
+
+    def __check_user(self, user_id: str) -> None:
+        # user_ids are UUIDs, any other id names no user (and would fail the insert, or a whole buffered batch).
+        # Otherwise only ids recently seen missing are rejected here, the insert itself checks the user.
+        try:
+            uuid.UUID(str(user_id))
+        except ValueError:
+            raise HTTPException(status_code=404, detail=f"User {user_id} not found") from None
+        if self.__user_cache is not None and self.__user_cache.exists(user_id) is False:
+            raise HTTPException(status_code=404, detail=f"User {user_id} not found")
+
+    def __remember_user(self, user_id: str, exists: bool) -> None:
+        if self.__user_cache is not None:
+            if exists:
+                self.__user_cache.add(user_id)
+            else:
+                self.__user_cache.add_missing(user_id)
+
+    def __invalidate_summaries(self, user_id: str) -> None:
+        # Other workers are told by the NOTIFY sent with the insert
+        if self.__summary_cache is not None:
+            self.__summary_cache.invalidate(user_id)
+        if self.__recent_writes is not None:
+            self.__recent_writes.add(user_id)
+        if self.__record_version_cache is not None:
+            self.__record_version_cache.invalidate(user_id)
+
     def __generate_record_id(self, user_id: str, word_count: int, study_time: int, timestamp: str) -> str:
         base_str = f"{user_id}-{timestamp}-{word_count}-{study_time}"
         return hashlib.sha256(base_str.encode()).hexdigest()
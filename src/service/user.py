@@ -1,44 +1,338 @@
+from collections.abc import AsyncIterator, Awaitable, Callable, Hashable, Sequence
+from datetime import datetime
 from typing import Any
 
 import arrow
 from fastapi import HTTPException
 
+from analytics.moving_average import create_moving_average
+from cache.record_version import RecordVersionCache
+from cache.summary import SummaryCache, normalize_user_id
+from cache.user import UserExistenceCache
 from constant.granularity import Granularity
+from constant.moving_average import MovingAverage, MovingAverageSource
+from core.metrics import stage
 from repository.record import RecordRepository
 from repository.user import UserRepository
+from util.cursor import decode_cursor, encode_cursor
+
+# Per field statistics of the records of a bucket, see RecordRepository.get_record_summary
+STATISTICS = ("min", "max", "avg", "stddev", "p50", "p95")
 
 
 class UserService:
-    def __init__(self, record_repo: RecordRepository, user_repo: UserRepository):
+    def __init__(
+        self,
+        record_repo: RecordRepository,
+        user_repo: UserRepository,
+        moving_average_source: MovingAverageSource = MovingAverageSource.PYTHON,
+        summary_cache: SummaryCache | None = None,
+        user_cache: UserExistenceCache | None = None,
+        record_version_cache: RecordVersionCache | None = None,
+    ):
         self.__record_repo = record_repo
         self.__user_repo = user_repo
+        self.__moving_average_source = moving_average_source
+        self.__summary_cache = summary_cache
+        self.__user_cache = user_cache
+        self.__record_version_cache = record_version_cache
+
+    async def get_record_version(self, user_id: str) -> int:
+        # Every write adding records of the user bumps it, their summaries are the same while it is.
+        # A missing user is a 404 here already.
+        if self.__user_cache is not None and self.__user_cache.exists(user_id) is False:
+            raise HTTPException(status_code=404, detail=f"User {user_id} not found")
+        cache = self.__record_version_cache
+        version = cache.get(user_id) if cache is not None else None
+        if version is not None:
+            return version
+        # Taken before the read, a write landing meanwhile then keeps the version out of the cache
+        invalidations = cache.invalidations(user_id) if cache is not None else 0
+        with stage("user_lookup"):
+            version = await self.__user_repo.get_record_version(user_id)
+        self.__remember_user(user_id, version is not None)
+        if version is None:
+            raise HTTPException(status_code=404, detail=f"User {user_id} not found")
+        if cache is not None:
+            cache.set(user_id, version, invalidations)
+        return version
 
     async def get_user_summary(
-        self, user_id: str, start: int, end: int, granularity: Granularity, n: int | None = None
+        self,
+        user_id: str,
+        start: int,
+        end: int,
+        granularity: Granularity,
+        n: int | Sequence[int] | None = None,
+        method: MovingAverage = MovingAverage.SMA,
+        statistics: bool = False,
+        record_version: int | None = None,
     ) -> list[dict[str, Any]]:
-        user = await self.__user_repo.get_user(user_id)
-        if not user:
-            raise HTTPException(status_code=404, detail=f"User {user_id} not found")
+        # statistics adds record_count and the <field>_{min,max,avg,stddev,p50,p95} of every bucket's records.
+        # record_version, the one of the response's ETag, keeps summaries cached before it from being served.
+        windows = [n] if isinstance(n, int) else list(n or [])
+        key = (start, end, granularity, tuple(windows), method, statistics, record_version)
+        return await self.__cached(
+            user_id, key, lambda: self.__get_user_summary(user_id, start, end, granularity, windows, method, statistics)
+        )
+
+    async def get_user_summary_page(
+        self,
+        user_id: str,
+        start: int,
+        end: int,
+        granularity: Granularity,
+        limit: int,
+        after: str | None = None,
+        n: int | Sequence[int] | None = None,
+        method: MovingAverage = MovingAverage.SMA,
+        statistics: bool = False,
+        record_version: int | None = None,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        # get_user_summary one page of at most limit buckets at a time: after is the cursor of the previous page,
+        # the cursor of the next page is returned along with the summaries, None on the last page
+        windows = [n] if isinstance(n, int) else list(n or [])
+        try:
+            last = decode_cursor(after) if after is not None else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        key = ("page", start, end, granularity, tuple(windows), method, statistics, limit, after, record_version)
+        return await self.__cached(
+            user_id,
+            key,
+            lambda: self.__get_user_summary_page(
+                user_id, start, end, granularity, limit, last, windows, method, statistics
+            ),
+        )
+
+    async def get_users_summary(
+        self,
+        user_ids: Sequence[str],
+        start: int,
+        end: int,
+        granularity: Granularity,
+        n: int | Sequence[int] | None = None,
+        method: MovingAverage = MovingAverage.SMA,
+    ) -> dict[str, list[dict[str, Any]]]:
+        # get_user_summary for several users from one grouped query, the averages are computed per user.
+        # Bypasses the summary cache and always computes the averages in Python.
+        windows = [n] if isinstance(n, int) else list(n or [])
+        user_ids = list(dict.fromkeys(user_ids))
+        await self.__check_users(user_ids)
+        records = await self.__record_repo.get_record_summaries(
+            user_ids, arrow.get(start).naive, arrow.get(end).naive, granularity
+        )
+        requested = {normalize_user_id(user_id): user_id for user_id in user_ids}
+        res = {user_id: [] for user_id in user_ids}
+        summarizers = {}
+        with stage("moving_average"):
+            for record in records:
+                user_id = requested[normalize_user_id(record.user_id)]
+                if user_id not in summarizers:
+                    summarizers[user_id] = self.__summarizer(windows, method)
+                res[user_id].append(summarizers[user_id](record))
+        return res
+
+    async def stream_user_summary(
+        self,
+        user_id: str,
+        start: int,
+        end: int,
+        granularity: Granularity,
+        n: int | Sequence[int] | None = None,
+        method: MovingAverage = MovingAverage.SMA,
+        statistics: bool = False,
+    ) -> AsyncIterator[dict[str, Any]]:
+        # Same summaries as get_user_summary, computed one bucket at a time as the rows arrive.
+        # The user is checked before anything is streamed so a missing user is still a 404.
+        # Streams bypass the summary cache, holding a whole range is what they avoid.
+        windows = [n] if isinstance(n, int) else list(n or [])
+        await self.__check_user(user_id)
+        options, summarize = self.__query(windows, method, statistics)
+        records = self.__record_repo.stream_record_summary(
+            user_id, arrow.get(start).naive, arrow.get(end).naive, granularity, **options
+        )
+        return (summarize(record) async for record in records)
+
+    async def __get_user_summary(
+        self,
+        user_id: str,
+        start: int,
+        end: int,
+        granularity: Granularity,
+        windows: list[int],
+        method: MovingAverage,
+        statistics: bool,
+    ) -> list[dict[str, Any]]:
+        await self.__check_user(user_id)
+        options, summarize = self.__query(windows, method, statistics)
         records = await self.__record_repo.get_record_summary(
-            user_id, arrow.get(start).naive, arrow.get(end).naive, granularity
+            user_id, arrow.get(start).naive, arrow.get(end).naive, granularity, **options
         )
-        res = []
-        for record in records:
-            res.append(
-                {
-                    "date": record.bucket,
-                    "word_count": record.total_words,
-                    "study_time": record.total_time,
-                }
-            )
-        if n is not None:
-            for i in range(n - 1, len(records)):
-                word_count_sma = round(sum([record.total_words for record in records[i - n + 1 : i + 1]]) / n, 2)
-                study_time_sma = round(sum([record.total_time for record in records[i - n + 1 : i + 1]]) / n, 2)
-                res[i].update(
-                    {
-                        "word_count_sma": word_count_sma,
-                        "study_time_sma": study_time_sma,
-                    }
-                )
+        with stage("moving_average"):
+            return [summarize(record) for record in records]
+
+    async def __get_user_summary_page(
+        self,
+        user_id: str,
+        start: int,
+        end: int,
+        granularity: Granularity,
+        limit: int,
+        last: datetime | None,
+        windows: list[int],
+        method: MovingAverage,
+        statistics: bool,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        await self.__check_user(user_id)
+        # The averages of the page's first buckets need the buckets before it: n - 1 of them for SMA and WMA, all of
+        # them for EMA, which is seeded from the first n buckets of the range. The averages are computed in Python
+        # over these and the page, one more bucket than the page tells whether there is a next one.
+        lookback = 0
+        if last is not None and windows:
+            lookback = None if method == MovingAverage.EMA else max(windows) - 1
+        options, summarize = self.__query(windows, method, statistics, database_windows=False)
+        records = await self.__record_repo.get_record_summary_page(
+            user_id,
+            arrow.get(start).naive,
+            arrow.get(end).naive,
+            granularity,
+            limit + 1,
+            after=last,
+            lookback=lookback,
+            **options,
+        )
+        with stage("moving_average"):
+            summaries = [summarize(record) for record in records]
+        page = [summary for summary in summaries if last is None or summary["date"] > last]
+        if len(page) <= limit:
+            return page, None
+        return page[:limit], encode_cursor(page[limit - 1]["date"])
+
+    async def __cached(self, user_id: str, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        if self.__summary_cache is None:
+            return await compute()
+        cached = self.__summary_cache.get(user_id, key)
+        if cached is not None:
+            return cached
+        # Read the version before querying, a write landing meanwhile then keeps the result out of the cache
+        version = self.__summary_cache.version(user_id)
+        res = await compute()
+        self.__summary_cache.set(user_id, key, res, version)
         return res
+
+    async def __check_user(self, user_id: str) -> None:
+        exists = self.__user_cache.exists(user_id) if self.__user_cache is not None else None
+        if exists is None:
+            with stage("user_lookup"):
+                exists = await self.__user_repo.get_user(user_id) is not None
+            self.__remember_user(user_id, exists)
+        if not exists:
+            raise HTTPException(status_code=404, detail=f"User {user_id} not found")
+
+    async def __check_users(self, user_ids: list[str]) -> None:
+        unknown, missing = [], []
+        for user_id in user_ids:
+            exists = self.__user_cache.exists(user_id) if self.__user_cache is not None else None
+            if exists is None:
+                unknown.append(user_id)
+            elif not exists:
+                missing.append(user_id)
+        if unknown:
+            with stage("user_lookup"):
+                found = {normalize_user_id(user.user_id) for user in await self.__user_repo.get_users(unknown)}
+            for user_id in unknown:
+                exists = normalize_user_id(user_id) in found
+                self.__remember_user(user_id, exists)
+                if not exists:
+                    missing.append(user_id)
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Users {', '.join(missing)} not found")
+
+    def __remember_user(self, user_id: str, exists: bool) -> None:
+        if self.__user_cache is None:
+            return
+        if exists:
+            self.__user_cache.add(user_id)
+        else:
+            self.__user_cache.add_missing(user_id)
+
+    def __query(
+        self, windows: list[int], method: MovingAverage, statistics: bool, database_windows: bool = True
+    ) -> tuple[dict[str, Any], Callable[[Any], dict[str, Any]]]:
+        # The summary query options for the repository and the function turning its rows into summaries
+        if database_windows and self.__database_windows(windows, method):
+            options, summarize = {"sma_windows": windows}, self.__database_summarizer(windows)
+        else:
+            options, summarize = {}, self.__summarizer(windows, method)
+        if not statistics:
+            return options, summarize
+
+        def summarize_with_statistics(record: Any) -> dict[str, Any]:
+            summary = summarize(record)
+            summary["record_count"] = record.record_count
+            for field in ("word_count", "study_time"):
+                for name in STATISTICS:
+                    value = getattr(record, f"{field}_{name}")
+                    summary[f"{field}_{name}"] = round(value, 2) if isinstance(value, float) else value
+            return summary
+
+        return {**options, "statistics": True}, summarize_with_statistics
+
+    def __database_windows(self, windows: list[int], method: MovingAverage) -> bool:
+        return (
+            bool(windows)
+            and method == MovingAverage.SMA
+            and self.__moving_average_source == MovingAverageSource.DATABASE
+        )
+
+    def __summarizer(self, windows: list[int], method: MovingAverage) -> Callable[[Any], dict[str, Any]]:
+        # Returns a function turning the records, fed in bucket order, into summaries
+        averages = [
+            (
+                *self.__average_keys(method, window, len(windows)),
+                create_moving_average(method, window),
+                create_moving_average(method, window),
+            )
+            for window in windows
+        ]
+
+        def summarize(record: Any) -> dict[str, Any]:
+            summary = {
+                "date": record.bucket,
+                "word_count": record.total_words,
+                "study_time": record.total_time,
+            }
+            for word_count_key, study_time_key, word_count_average, study_time_average in averages:
+                word_count_value = word_count_average.update(record.total_words)
+                study_time_value = study_time_average.update(record.total_time)
+                if word_count_value is not None:
+                    summary[word_count_key] = word_count_value
+                    summary[study_time_key] = study_time_value
+            return summary
+
+        return summarize
+
+    def __database_summarizer(self, windows: list[int]) -> Callable[[Any], dict[str, Any]]:
+        # The window averages come as word_count_sma_<n> columns, only rounding is left to do
+        keys = [(window, *self.__average_keys(MovingAverage.SMA, window, len(windows))) for window in windows]
+
+        def summarize(record: Any) -> dict[str, Any]:
+            summary = {
+                "date": record.bucket,
+                "word_count": record.total_words,
+                "study_time": record.total_time,
+            }
+            for window, word_count_key, study_time_key in keys:
+                word_count_value = getattr(record, f"word_count_sma_{window}")
+                if word_count_value is not None:
+                    summary[word_count_key] = round(word_count_value, 2)
+                    summary[study_time_key] = round(getattr(record, f"study_time_sma_{window}"), 2)
+            return summary
+
+        return summarize
+
+    def __average_keys(self, method: MovingAverage, window: int, window_count: int) -> tuple[str, str]:
+        # A single window keeps the plain keys (word_count_sma), several windows are suffixed (word_count_sma_7)
+        suffix = f"{method}" if window_count == 1 else f"{method}_{window}"
+        return f"word_count_{suffix}", f"study_time_{suffix}"
@@ -0,0 +1,18 @@
+import base64
+import binascii
+from datetime import datetime
+
+import arrow
+
+
+# Pagination cursors are opaque to clients: URL safe base64 of the Unix timestamp of a page's last bucket
+def encode_cursor(bucket: datetime) -> str:
+    return base64.urlsafe_b64encode(str(arrow.get(bucket).int_timestamp).encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> datetime:
+    try:
+        timestamp = int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return arrow.get(timestamp).naive
+    except (ValueError, binascii.Error, OverflowError) as e:
+        raise ValueError(f"Invalid cursor {cursor}") from e
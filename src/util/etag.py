@@ -0,0 +1,14 @@
+# Summary ETags are the user's record_version. They are weak: the same version means the same summaries,
+# but not necessarily the same bytes (the averages may be computed by Python or the database).
+def make_etag(version: int) -> str:
+    return f'W/"{version}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # If-None-Match compares weakly, a W/ prefix on either side is ignored
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
@@ -1,8 +1,20 @@
+import atexit
+import copy
+import json
 import logging
+import queue
+import random
 from logging import LogRecord
-from typing import Any
+from logging.handlers import QueueHandler, QueueListener
 
+from constant.log_format import LogFormat
 from core.contextvar.trace_id import trace_id_ctx
+from core.settings import Settings
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+TEXT_FORMAT = "%(asctime)s [trace_id=%(trace_id)s] %(levelname)s: %(message)s"
+
+_listener: QueueListener | None = None
 
 
 class TraceIdFilter(logging.Filter):
@@ -11,30 +23,83 @@ class TraceIdFilter(logging.Filter):
         return True
 
 
-def logger_config() -> dict[str, Any]:
-    return {
-        "version": 1,
-        "disable_existing_loggers": False,
-        "filters": {
-            "trace_id": {
-                "()": TraceIdFilter,  # 呼叫我們的 Filter class
-            }
-        },
-        "formatters": {
-            "default": {
-                "datefmt": "%Y-%m-%d %H:%M:%S",
-                "format": "%(asctime)s [trace_id=%(trace_id)s] %(levelname)s: %(message)s",
-            },
-            "json": {
-                "format": '{"time": "%(asctime)s", "level": "%(levelname)s", "trace_id": "%(trace_id)s", "message": "%(message)s"}',
-            },
-        },
-        "handlers": {
-            "console": {
-                "class": "logging.StreamHandler",
-                "formatter": "default",
-                "filters": ["trace_id"],
-            }
-        },
-        "root": {"level": "INFO", "handlers": ["console"]},
-    }
+class SamplingFilter(logging.Filter):
+    # Keeps records up to max_level at `rate` (0 to 1), more severe records always
+    def __init__(self, rate: float, max_level: int = logging.INFO):
+        super().__init__()
+        self.__rate = rate
+        self.__max_level = max_level
+
+    def filter(self, record: LogRecord):
+        return record.levelno > self.__max_level or random.random() < self.__rate
+
+
+class JsonFormatter(logging.Formatter):
+    # One JSON object per line
+    def format(self, record: LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, DATE_FORMAT),
+            "level": record.levelname,
+            "logger": record.name,
+            "trace_id": getattr(record, "trace_id", "-"),
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DeferredFormatQueueHandler(QueueHandler):
+    # QueueHandler.prepare formats the whole record on the calling thread. Only what cannot wait is resolved here:
+    # the message (its args may change once the call returns) and the traceback. The listener thread formats.
+    def prepare(self, record: LogRecord) -> LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _stop_listener() -> None:
+    # Writes out what is still queued
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(_stop_listener)
+
+
+def configure_logging(settings: Settings) -> None:
+    # Logging calls only filter the record and put it on a queue, formatting and writing to the stream happen on
+    # the listener thread so a slow stdout does not block the event loop
+    global _listener
+    _stop_listener()
+
+    console = logging.StreamHandler()
+    if settings.log_format == LogFormat.JSON:
+        console.setFormatter(JsonFormatter())
+    else:
+        console.setFormatter(logging.Formatter(TEXT_FORMAT, DATE_FORMAT))
+
+    handler = DeferredFormatQueueHandler(queue.SimpleQueue())
+    # Sampled out records are dropped before they reach the queue, the trace id context variable can only be read
+    # on the thread that logged
+    if settings.log_info_sample_rate < 1:
+        handler.addFilter(SamplingFilter(settings.log_info_sample_rate))
+    handler.addFilter(TraceIdFilter())
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+        existing.close()
+    root.addHandler(handler)
+    root.setLevel(settings.log_level.upper())
+
+    _listener = QueueListener(handler.queue, console)
+    _listener.start()
@@ -0,0 +1,22 @@
+from datetime import datetime
+
+import arrow
+
+from constant.granularity import Granularity
+
+
+def floor_bucket(value: datetime, granularity: Granularity) -> datetime:
+    # Same boundaries as Postgres date_trunc, weeks start on Monday
+    return arrow.get(value).floor(granularity.value).naive
+
+
+def next_bucket(value: datetime, granularity: Granularity) -> datetime:
+    # Start of the bucket after the one containing value
+    return arrow.get(floor_bucket(value, granularity)).shift(**{f"{granularity.value}s": 1}).naive
+
+
+def ceil_bucket(value: datetime, granularity: Granularity) -> datetime:
+    floor = floor_bucket(value, granularity)
+    if floor == value:
+        return floor
+    return next_bucket(floor, granularity)
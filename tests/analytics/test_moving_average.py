@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+from analytics.moving_average import create_moving_average, moving_average
+from constant.moving_average import MovingAverage
+
+
+def naive_sma(values: list[int], n: int) -> list[float | None]:
+    return [round(sum(values[i - n + 1 : i + 1]) / n, 2) if i >= n - 1 else None for i in range(len(values))]
+
+
+def naive_wma(values: list[int], n: int) -> list[float | None]:
+    weights = range(1, n + 1)
+    return [
+        round(sum(w * v for w, v in zip(weights, values[i - n + 1 : i + 1])) / sum(weights), 2) if i >= n - 1 else None
+        for i in range(len(values))
+    ]
+
+
+class TestMovingAverage:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        rnd = random.Random(42)
+        self.values = [rnd.randrange(0, 10_000) for _ in range(500)]
+
+    @pytest.mark.parametrize("n", [1, 2, 3, 7, 30, 90, 500, 501])
+    def test_sma_matches_naive(self, n: int):
+        assert moving_average(self.values, n, MovingAverage.SMA) == naive_sma(self.values, n)
+
+    @pytest.mark.parametrize("n", [1, 2, 3, 7, 30, 90, 500, 501])
+    def test_wma_matches_naive(self, n: int):
+        assert moving_average(self.values, n, MovingAverage.WMA) == naive_wma(self.values, n)
+
+    def test_ema(self):
+        result = moving_average([1, 2, 3, 4, 5], 3, MovingAverage.EMA)
+
+        # seed = (1 + 2 + 3) / 3 = 2, alpha = 0.5
+        assert result == [None, None, 2.0, 3.0, 4.0]
+
+    def test_ema_window_of_one_tracks_values(self):
+        assert moving_average([5, 9, 1], 1, MovingAverage.EMA) == [5.0, 9.0, 1.0]
+
+    def test_invalid_window(self):
+        with pytest.raises(ValueError, match="Window size must be positive"):
+            create_moving_average(MovingAverage.SMA, 0)
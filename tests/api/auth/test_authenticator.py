@@ -9,6 +9,7 @@ from pydantic import ValidationError
 
 from api.auth.authenticator import JsonWebTokenAuthenticator
 from api.auth.schema import AuthData
+from cache.token import TokenCache
 
 
 class TestJsonWebTokenAuthenticator:
@@ -152,3 +153,30 @@ class TestJsonWebTokenAuthenticator:
 
         assert isinstance(result, AuthData)
         assert result.user_id == ""
+
+    @patch("jwt.decode")
+    def test_validate_jwt_token_cached(self, mock_jwt_decode: MagicMock):
+        authenticator = JsonWebTokenAuthenticator(TokenCache(max_size=10))
+        mock_payload = {"user_id": "test_user_123", "exp": arrow.utcnow().int_timestamp + 3600}
+        mock_jwt_decode.return_value = mock_payload
+
+        results = [authenticator.validate_jwt_token("valid_token") for _ in range(3)]
+
+        assert results == [mock_payload] * 3
+        mock_jwt_decode.assert_called_once_with("valid_token", algorithms=["HS256"])
+
+    @patch("jwt.decode")
+    def test_validate_jwt_token_invalid_is_not_cached(self, mock_jwt_decode: MagicMock):
+        authenticator = JsonWebTokenAuthenticator(TokenCache(max_size=10))
+        mock_jwt_decode.side_effect = jwt.InvalidTokenError("Invalid token")
+
+        for _ in range(2):
+            assert authenticator.validate_jwt_token("invalid_token") is None
+
+        assert mock_jwt_decode.call_count == 2
+
+    def test_validate_jwt_token_quiet(self, capsys: pytest.CaptureFixture):
+        token = jwt.encode({"user_id": "test_user_123", "exp": arrow.utcnow().int_timestamp + 3600}, key="")
+
+        assert JsonWebTokenAuthenticator(quiet=True).validate_jwt_token(token) is not None
+        assert capsys.readouterr().out == ""
@@ -0,0 +1,20 @@
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from main import app
+
+
+class TestMetricsController:
+    def test_get_metrics(self):
+        client = TestClient(app)
+        client.get("/metrics")
+        client.get("/unknown")
+
+        response = client.get("/metrics")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'mantra_http_request_duration_seconds_count{method="GET",route="/metrics",status="200"}' in response.text
+        assert (
+            'mantra_http_request_duration_seconds_count{method="GET",route="unmatched",status="404"}' in response.text
+        )
@@ -78,3 +78,40 @@ class TestRecordController:
         )
 
         assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_create_records_success(self, mock_jwt_header: dict[str, str]):
+        user_id = "test_user_123"
+        self.mock_record_service.create_records = AsyncMock(
+            return_value=[
+                {"record_id": "a", "status": "created"},
+                {"record_id": "b", "status": "duplicate"},
+            ]
+        )
+
+        response = self.client.post(
+            f"{self.base_url}/{user_id}/batch",
+            json=[
+                {"word_count": 100, "study_time": 3600, "timestamp": 1640995200},
+                {"word_count": 150, "study_time": 4200},
+            ],
+            headers=mock_jwt_header,
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            "results": [{"record_id": "a", "status": "created"}, {"record_id": "b", "status": "duplicate"}],
+            "created": 1,
+            "duplicate": 1,
+        }
+        self.mock_record_service.create_records.assert_called_once_with(
+            user_id=user_id,
+            records=[
+                {"word_count": 100, "study_time": 3600, "timestamp": 1640995200},
+                {"word_count": 150, "study_time": 4200, "timestamp": None},
+            ],
+        )
+
+    def test_create_records_empty_batch(self, mock_jwt_header: dict[str, str]):
+        response = self.client.post(f"{self.base_url}/test_user_123/batch", json=[], headers=mock_jwt_header)
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -1,3 +1,4 @@
+import json
 from unittest.mock import AsyncMock
 
 import pytest
@@ -18,6 +19,7 @@ class TestUserController:
 
         # Override service dependency
         app.dependency_overrides[get_user_service] = lambda: self.mock_user_service
+        self.mock_user_service.get_record_version = AsyncMock(return_value=3)
 
         yield
 
@@ -51,3 +53,223 @@ class TestUserController:
             )
         assert response_data["summary"] == expected_summary
         assert response_data["total"] == len(expected_summary)
+        assert response_data["next"] is None
+
+    def test_get_user_summary_with_several_windows(self, mock_jwt_header):
+        expected_summary = [
+            {"date": "2022-01-01T00:00:00", "word_count": 100, "study_time": 3600, "word_count_ema_7": 90.5},
+        ]
+        self.mock_user_service.get_user_summary = AsyncMock(return_value=expected_summary)
+
+        response = self.client.get(
+            f"{self.base_url}/test_user_123/summary",
+            params={"start": 1640995200, "end": 1672531199, "granularity": "day", "n": "7,30", "method": "ema"},
+            headers=mock_jwt_header,
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json()["summary"][0]["word_count_ema_7"] == 90.5
+        self.mock_user_service.get_user_summary.assert_called_once_with(
+            user_id="test_user_123",
+            start=1640995200,
+            end=1672531199,
+            granularity=Granularity.DAY,
+            n=[7, 30],
+            method="ema",
+            statistics=False,
+            record_version=3,
+        )
+
+    def test_get_user_summary_with_statistics(self, mock_jwt_header):
+        expected_summary = [
+            {
+                "date": "2022-01-01T00:00:00",
+                "word_count": 100,
+                "study_time": 3600,
+                "record_count": 2,
+                "word_count_min": 40,
+                "word_count_p95": 59.0,
+            },
+        ]
+        self.mock_user_service.get_user_summary = AsyncMock(return_value=expected_summary)
+
+        response = self.client.get(
+            f"{self.base_url}/test_user_123/summary",
+            params={"start": 1640995200, "end": 1672531199, "granularity": "day", "stats": True},
+            headers=mock_jwt_header,
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        summary = response.json()["summary"][0]
+        assert summary["record_count"] == 2
+        assert summary["word_count_min"] == 40
+        assert summary["word_count_p95"] == 59.0
+        assert self.mock_user_service.get_user_summary.call_args.kwargs["statistics"] is True
+
+    def test_get_user_summary_stream(self, mock_jwt_header):
+        async def summaries():
+            yield {"date": "2022-01-01T00:00:00", "word_count": 100, "study_time": 3600}
+            yield {"date": "2022-01-02T00:00:00", "word_count": 150, "study_time": 4200, "word_count_sma": 125.0}
+
+        self.mock_user_service.stream_user_summary = AsyncMock(return_value=summaries())
+
+        response = self.client.get(
+            f"{self.base_url}/test_user_123/summary",
+            params={"start": 1640995200, "end": 1672531199, "granularity": "day", "stream": True},
+            headers=mock_jwt_header,
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["word_count"] for line in lines] == [100, 150]
+        assert lines[1]["word_count_sma"] == 125.0
+
+    def test_get_user_summary_columns(self, mock_jwt_header):
+        self.mock_user_service.get_user_summary = AsyncMock(
+            return_value=[
+                {"date": "2022-01-01T00:00:00", "word_count": 100, "study_time": 3600},
+                {"date": "2022-01-02T00:00:00", "word_count": 150, "study_time": 4200},
+            ]
+        )
+
+        response = self.client.get(
+            f"{self.base_url}/test_user_123/summary",
+            params={"start": 1640995200, "end": 1672531199, "granularity": "day", "layout": "columns"},
+            headers=mock_jwt_header,
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json()["summary"]["word_count"] == [100, 150]
+        assert response.json()["summary"]["word_count_sma"] == [None, None]
+        assert response.json()["total"] == 2
+
+    def test_get_user_summary_stream_columns(self, mock_jwt_header):
+        response = self.client.get(
+            f"{self.base_url}/test_user_123/summary",
+            params={"start": 1640995200, "end": 1672531199, "granularity": "day", "stream": True, "layout": "columns"},
+            headers=mock_jwt_header,
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_get_user_summary_page(self, mock_jwt_header):
+        self.mock_user_service.get_user_summary_page = AsyncMock(
+            return_value=([{"date": "2022-01-02T00:00:00", "word_count": 150, "study_time": 4200}], "MTY0MTA4MTYwMA")
+        )
+
+        response = self.client.get(
+            f"{self.base_url}/test_user_123/summary",
+            params={
+                "start": 1640995200,
+                "end": 1672531199,
+                "granularity": "day",
+                "limit": 1,
+                "after": "MTY0MDk5NTIwMA",
+            },
+            headers=mock_jwt_header,
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json()["summary"][0]["word_count"] == 150
+        assert response.json()["next"] == "MTY0MTA4MTYwMA"
+        self.mock_user_service.get_user_summary_page.assert_called_once_with(
+            user_id="test_user_123",
+            start=1640995200,
+            end=1672531199,
+            granularity=Granularity.DAY,
+            limit=1,
+            after="MTY0MDk5NTIwMA",
+            n=None,
+            method="sma",
+            statistics=False,
+            record_version=3,
+        )
+
+    @pytest.mark.parametrize(
+        ("params", "expected"),
+        [
+            ({"after": "MTY0MDk5NTIwMA"}, status.HTTP_400_BAD_REQUEST),
+            ({"limit": 10, "stream": True}, status.HTTP_400_BAD_REQUEST),
+            ({"limit": 0}, status.HTTP_422_UNPROCESSABLE_ENTITY),
+        ],
+    )
+    def test_get_user_summary_page_invalid(self, mock_jwt_header, params, expected):
+        response = self.client.get(
+            f"{self.base_url}/test_user_123/summary",
+            params={"start": 1640995200, "end": 1672531199, "granularity": "day", **params},
+            headers=mock_jwt_header,
+        )
+
+        assert response.status_code == expected
+
+    def test_get_user_summary_etag(self, mock_jwt_header):
+        self.mock_user_service.get_user_summary = AsyncMock(return_value=[])
+
+        response = self.client.get(
+            f"{self.base_url}/test_user_123/summary",
+            params={"start": 1640995200, "end": 1672531199, "granularity": "day"},
+            headers={**mock_jwt_header, "If-None-Match": 'W/"2"'},
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.headers["ETag"] == 'W/"3"'
+        self.mock_user_service.get_record_version.assert_called_once_with("test_user_123")
+
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_get_user_summary_not_modified(self, mock_jwt_header, stream):
+        self.mock_user_service.get_user_summary = AsyncMock()
+        self.mock_user_service.stream_user_summary = AsyncMock()
+
+        response = self.client.get(
+            f"{self.base_url}/test_user_123/summary",
+            params={"start": 1640995200, "end": 1672531199, "granularity": "day", "stream": stream},
+            headers={**mock_jwt_header, "If-None-Match": 'W/"3"'},
+        )
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.headers["ETag"] == 'W/"3"'
+        assert response.content == b""
+        self.mock_user_service.get_user_summary.assert_not_called()
+        self.mock_user_service.stream_user_summary.assert_not_called()
+
+    def test_get_users_summary(self, mock_jwt_header):
+        user_ids = ["550e8400-e29b-41d4-a716-446655440001", "550e8400-e29b-41d4-a716-446655440002"]
+        self.mock_user_service.get_users_summary = AsyncMock(
+            return_value={
+                user_ids[0]: [{"date": "2022-01-01T00:00:00", "word_count": 100, "study_time": 3600}],
+                user_ids[1]: [],
+            }
+        )
+
+        response = self.client.post(
+            f"{self.base_url}/summary",
+            json={"user_ids": user_ids, "start": 1640995200, "end": 1672531199, "granularity": "day", "n": [7, 30]},
+            headers=mock_jwt_header,
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["summary"][user_ids[0]][0]["word_count"] == 100
+        assert response.json()["summary"][user_ids[1]] == []
+        assert response.json()["total"] == 2
+        self.mock_user_service.get_users_summary.assert_called_once_with(
+            user_ids=user_ids, start=1640995200, end=1672531199, granularity=Granularity.DAY, n=[7, 30], method="sma"
+        )
+
+    def test_get_users_summary_invalid_user_id(self, mock_jwt_header):
+        response = self.client.post(
+            f"{self.base_url}/summary",
+            json={"user_ids": ["test_user_123"], "start": 1640995200, "end": 1672531199, "granularity": "day"},
+            headers=mock_jwt_header,
+        )
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_get_user_summary_invalid_window(self, mock_jwt_header):
+        response = self.client.get(
+            f"{self.base_url}/test_user_123/summary",
+            params={"start": 1640995200, "end": 1672531199, "granularity": "day", "n": "0,7"},
+            headers=mock_jwt_header,
+        )
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -0,0 +1,55 @@
+import json
+from datetime import datetime
+
+from api.v1.user.encoder import encode_summaries, encode_summary_columns
+from api.v1.user.schema import GetUserSummaryResponse
+
+SUMMARIES = [
+    {"date": datetime(2022, 1, 1), "word_count": 100, "study_time": 3600},
+    {
+        "date": datetime(2022, 1, 2),
+        "word_count": 150,
+        "study_time": 4200,
+        "word_count_sma": 125.0,
+        "study_time_sma": 3900.0,
+    },
+    {
+        "date": datetime(2022, 1, 3, 5),
+        "word_count": 0,
+        "study_time": 0,
+        "word_count_ema_7": 0.33,
+        "study_time_ema_7": 1.5,
+    },
+]
+
+
+class TestUserEncoder:
+    def test_encode_summaries_matches_response_model(self):
+        expected = GetUserSummaryResponse(summary=SUMMARIES, total=len(SUMMARIES)).model_dump(mode="json")
+
+        assert json.loads(encode_summaries(SUMMARIES)) == expected
+
+    def test_encode_summaries_page_matches_response_model(self):
+        expected = GetUserSummaryResponse(summary=SUMMARIES[:2], total=2, next="MTY0MTA4MTYwMA").model_dump(mode="json")
+
+        assert json.loads(encode_summaries(SUMMARIES[:2], "MTY0MTA4MTYwMA")) == expected
+
+    def test_encode_summaries_empty(self):
+        assert json.loads(encode_summaries([])) == {"summary": [], "total": 0, "next": None}
+
+    def test_encode_summary_columns(self):
+        result = json.loads(encode_summary_columns(SUMMARIES))
+
+        assert result == {
+            "summary": {
+                "date": ["2022-01-01T00:00:00", "2022-01-02T00:00:00", "2022-01-03T05:00:00"],
+                "word_count": [100, 150, 0],
+                "study_time": [3600, 4200, 0],
+                "word_count_sma": [None, 125.0, None],
+                "study_time_sma": [None, 3900.0, None],
+                "word_count_ema_7": [None, None, 0.33],
+                "study_time_ema_7": [None, None, 1.5],
+            },
+            "total": 3,
+            "next": None,
+        }
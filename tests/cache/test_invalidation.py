@@ -0,0 +1,38 @@
+from unittest.mock import patch
+
+from cache.invalidation import Invalidations
+
+USER_ID = "550e8400-e29b-41d4-a716-446655440001"
+OTHER_USER_ID = "550e8400-e29b-41d4-a716-446655440002"
+
+
+class TestInvalidations:
+    def test_token_is_stale_after_invalidation(self):
+        invalidations = Invalidations(max_size=10, ttl=60)
+        token = invalidations.token()
+
+        invalidations.invalidate(USER_ID)
+
+        assert not invalidations.current(USER_ID, token)
+        assert invalidations.current(OTHER_USER_ID, token)
+        assert invalidations.current(USER_ID, invalidations.token())
+
+    def test_forgets_after_ttl(self):
+        invalidations = Invalidations(max_size=10, ttl=60)
+        with patch("cache.invalidation.time.monotonic", return_value=1000):
+            token = invalidations.token()
+            invalidations.invalidate(USER_ID)
+        with patch("cache.invalidation.time.monotonic", return_value=1061):
+            assert not invalidations.current(OTHER_USER_ID, token)
+            assert len(invalidations) == 0
+
+    def test_forgets_oldest_past_max_size(self):
+        invalidations = Invalidations(max_size=1, ttl=60)
+        invalidations.invalidate(USER_ID)
+        token = invalidations.token()
+
+        invalidations.invalidate(OTHER_USER_ID)
+
+        assert len(invalidations) == 1
+        assert invalidations.current(USER_ID, token)
+        assert not invalidations.current(OTHER_USER_ID, token)
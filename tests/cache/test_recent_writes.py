@@ -0,0 +1,44 @@
+from unittest.mock import patch
+
+from cache.recent_writes import RecentWrites
+
+USER_ID = "550e8400-e29b-41d4-a716-446655440001"
+OTHER_USER_ID = "550e8400-e29b-41d4-a716-446655440002"
+
+
+class TestRecentWrites:
+    def test_write_is_remembered_for_the_window(self):
+        recent_writes = RecentWrites(window=5, max_size=10)
+
+        with patch("cache.recent_writes.time.monotonic", return_value=1000):
+            recent_writes.add(USER_ID)
+            assert recent_writes.contains(USER_ID.upper())
+            assert not recent_writes.contains(OTHER_USER_ID)
+        with patch("cache.recent_writes.time.monotonic", return_value=1006):
+            assert not recent_writes.contains(USER_ID)
+
+    def test_expired_writes_are_dropped(self):
+        recent_writes = RecentWrites(window=5, max_size=10)
+
+        with patch("cache.recent_writes.time.monotonic", return_value=1000):
+            recent_writes.add(USER_ID)
+        with patch("cache.recent_writes.time.monotonic", return_value=1006):
+            recent_writes.add(OTHER_USER_ID)
+
+        assert recent_writes.stats() == {"size": 1}
+
+    def test_oldest_write_is_evicted(self):
+        recent_writes = RecentWrites(window=5, max_size=1)
+
+        recent_writes.add(USER_ID)
+        recent_writes.add(OTHER_USER_ID)
+
+        assert not recent_writes.contains(USER_ID)
+        assert recent_writes.contains(OTHER_USER_ID)
+
+    def test_zero_window_keeps_nothing(self):
+        recent_writes = RecentWrites(window=0, max_size=10)
+
+        recent_writes.add(USER_ID)
+
+        assert not recent_writes.contains(USER_ID)
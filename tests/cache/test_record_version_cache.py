@@ -0,0 +1,70 @@
+from unittest.mock import patch
+
+from cache.record_version import RecordVersionCache
+
+USER_ID = "550e8400-e29b-41d4-a716-446655440001"
+OTHER_USER_ID = "550e8400-e29b-41d4-a716-446655440002"
+
+
+class TestRecordVersionCache:
+    def test_get_set(self):
+        cache = RecordVersionCache(max_size=10, ttl=60)
+
+        assert cache.get(USER_ID) is None
+        cache.set(USER_ID, 3, cache.invalidations(USER_ID))
+
+        assert cache.get(USER_ID.upper()) == 3
+        assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+    def test_invalidate(self):
+        cache = RecordVersionCache(max_size=10, ttl=60)
+        cache.set(USER_ID, 3, cache.invalidations(USER_ID))
+
+        cache.invalidate(USER_ID)
+
+        assert cache.get(USER_ID) is None
+
+    def test_version_read_during_a_write_is_not_kept(self):
+        cache = RecordVersionCache(max_size=10, ttl=60)
+        invalidations = cache.invalidations(USER_ID)
+        cache.invalidate(USER_ID)
+
+        cache.set(USER_ID, 3, invalidations)
+
+        assert cache.get(USER_ID) is None
+
+    def test_invalidations_are_forgotten_after_ttl(self):
+        cache = RecordVersionCache(max_size=10, ttl=60)
+        with patch("cache.invalidation.time.monotonic", return_value=1000):
+            invalidations = cache.invalidations(USER_ID)
+            cache.invalidate(USER_ID)
+        with patch("cache.invalidation.time.monotonic", return_value=1061):
+            cache.set(USER_ID, 3, invalidations)
+
+            assert cache.get(USER_ID) is None
+            cache.set(USER_ID, 3, cache.invalidations(USER_ID))
+
+            assert cache.get(USER_ID) == 3
+
+    def test_evicts_least_recently_used(self):
+        cache = RecordVersionCache(max_size=1, ttl=60)
+        cache.set(USER_ID, 3, 0)
+        cache.set(OTHER_USER_ID, 5, 0)
+
+        assert cache.get(USER_ID) is None
+        assert cache.get(OTHER_USER_ID) == 5
+
+    def test_disabled(self):
+        cache = RecordVersionCache(max_size=0, ttl=60)
+        cache.set(USER_ID, 3, 0)
+
+        assert cache.get(USER_ID) is None
+
+    def test_expires_after_ttl(self):
+        cache = RecordVersionCache(max_size=10, ttl=60)
+        with patch("cache.record_version.time.monotonic", return_value=1000):
+            cache.set(USER_ID, 3, 0)
+        with patch("cache.record_version.time.monotonic", return_value=1060):
+            assert cache.get(USER_ID) == 3
+        with patch("cache.record_version.time.monotonic", return_value=1061):
+            assert cache.get(USER_ID) is None
@@ -0,0 +1,91 @@
+from unittest.mock import patch
+
+import pytest
+
+from cache.summary import SummaryCache
+
+USER_ID = "550e8400-e29b-41d4-a716-446655440001"
+OTHER_USER_ID = "550e8400-e29b-41d4-a716-446655440002"
+
+
+class TestSummaryCache:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.cache = SummaryCache(max_buckets=2, ttl=60)
+
+    def test_get_after_set(self):
+        self.cache.set(USER_ID, "key", [1], self.cache.version(USER_ID))
+
+        assert self.cache.get(USER_ID, "key") == [1]
+        assert self.cache.get(USER_ID, "other") is None
+        assert self.cache.stats() == {
+            "size": 1,
+            "buckets": 1,
+            "hits": 1,
+            "misses": 1,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    def test_invalidate_makes_entries_stale(self):
+        self.cache.set(USER_ID, "key", [1], self.cache.version(USER_ID))
+
+        self.cache.invalidate(USER_ID.upper())
+
+        assert self.cache.get(USER_ID, "key") is None
+        assert self.cache.stats()["size"] == 0
+
+    def test_invalidate_keeps_other_users_entries(self):
+        self.cache.set(OTHER_USER_ID, "key", [1], self.cache.version(OTHER_USER_ID))
+
+        self.cache.invalidate(USER_ID)
+
+        assert self.cache.get(OTHER_USER_ID, "key") == [1]
+
+    def test_set_with_outdated_version_is_ignored(self):
+        version = self.cache.version(USER_ID)
+        self.cache.invalidate(USER_ID)
+
+        self.cache.set(USER_ID, "key", [1], version)
+
+        assert self.cache.get(USER_ID, "key") is None
+
+    def test_set_with_outdated_version_is_ignored_after_the_invalidation_is_forgotten(self):
+        with patch("cache.invalidation.time.monotonic", return_value=1000):
+            version = self.cache.version(USER_ID)
+            self.cache.invalidate(USER_ID)
+        with patch("cache.invalidation.time.monotonic", return_value=1061):
+            self.cache.set(USER_ID, "key", [1], version)
+
+            assert self.cache.get(USER_ID, "key") is None
+            self.cache.set(USER_ID, "key", [1], self.cache.version(USER_ID))
+
+            assert self.cache.get(USER_ID, "key") == [1]
+
+    def test_least_recently_used_is_evicted(self):
+        for key in ("a", "b"):
+            self.cache.set(USER_ID, key, [key], 0)
+        self.cache.get(USER_ID, "a")
+
+        self.cache.set(USER_ID, "c", ["c"], 0)
+
+        assert self.cache.get(USER_ID, "b") is None
+        assert self.cache.get(USER_ID, "a") == ["a"]
+        assert self.cache.get(USER_ID, "c") == ["c"]
+        assert self.cache.stats()["evictions"] == 1
+
+    def test_bounded_by_buckets(self):
+        self.cache.set(USER_ID, "a", [1], 0)
+        self.cache.set(USER_ID, "b", ([1, 2], None), 0)
+        self.cache.set(USER_ID, "c", [1, 2, 3], 0)
+
+        assert self.cache.get(USER_ID, "a") is None
+        assert self.cache.get(USER_ID, "b") == ([1, 2], None)
+        assert self.cache.get(USER_ID, "c") is None
+        assert self.cache.stats()["buckets"] == 2
+
+    def test_expired_entry(self):
+        with patch("cache.summary.time.monotonic", return_value=1000):
+            self.cache.set(USER_ID, "key", [1], 0)
+        with patch("cache.summary.time.monotonic", return_value=1061):
+            assert self.cache.get(USER_ID, "key") is None
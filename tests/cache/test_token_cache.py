@@ -0,0 +1,35 @@
+from unittest.mock import patch
+
+import pytest
+
+from cache.token import TokenCache
+
+
+class TestTokenCache:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.cache = TokenCache(max_size=1)
+
+    def test_get_after_set(self):
+        payload = {"user_id": "test_user_123", "exp": 2000}
+        with patch("cache.token.time.time", return_value=1000):
+            self.cache.set("token", payload)
+
+            assert self.cache.get("token") == payload
+            assert self.cache.get("other") is None
+        assert self.cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+    def test_entry_expires_with_token(self):
+        self.cache.set("token", {"user_id": "test_user_123", "exp": 2000})
+
+        with patch("cache.token.time.time", return_value=2001):
+            assert self.cache.get("token") is None
+        assert self.cache.stats()["size"] == 0
+
+    def test_least_recently_used_is_evicted(self):
+        with patch("cache.token.time.time", return_value=1000):
+            self.cache.set("a", {"exp": 2000})
+            self.cache.set("b", {"exp": 2000})
+
+            assert self.cache.get("a") is None
+            assert self.cache.get("b") == {"exp": 2000}
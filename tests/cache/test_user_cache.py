@@ -0,0 +1,44 @@
+from unittest.mock import patch
+
+import pytest
+
+from cache.user import UserExistenceCache
+
+USER_ID = "550e8400-e29b-41d4-a716-446655440001"
+OTHER_USER_ID = "550e8400-e29b-41d4-a716-446655440002"
+
+
+class TestUserExistenceCache:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.cache = UserExistenceCache(max_size=1, negative_ttl=5)
+
+    def test_unknown_user_is_not_cached(self):
+        assert self.cache.exists(USER_ID) is None
+        assert self.cache.stats() == {"known": 0, "missing": 0, "hits": 0, "misses": 1}
+
+    def test_known_user(self):
+        self.cache.add(USER_ID)
+
+        assert self.cache.exists(USER_ID.upper()) is True
+
+    def test_missing_user_expires(self):
+        with patch("cache.user.time.monotonic", return_value=1000):
+            self.cache.add_missing(USER_ID)
+            assert self.cache.exists(USER_ID) is False
+        with patch("cache.user.time.monotonic", return_value=1006):
+            assert self.cache.exists(USER_ID) is None
+
+    def test_invalidate(self):
+        self.cache.add_missing(USER_ID)
+
+        self.cache.invalidate(USER_ID)
+
+        assert self.cache.exists(USER_ID) is None
+
+    def test_least_recently_used_is_evicted(self):
+        self.cache.add(USER_ID)
+        self.cache.add(OTHER_USER_ID)
+
+        assert self.cache.exists(USER_ID) is None
+        assert self.cache.exists(OTHER_USER_ID) is True
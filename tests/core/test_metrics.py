@@ -0,0 +1,123 @@
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from core.metrics import CallbackMetric, Counter, Histogram, Registry, WorkerSnapshots
+
+
+class TestMetrics:
+    def test_counter(self):
+        counter = Counter("rows_total", "Rows", ("query",))
+
+        counter.inc("summary", amount=3)
+        counter.inc("summary")
+
+        assert counter.value("summary") == 4
+        assert list(counter.collect()) == [
+            "# HELP rows_total Rows",
+            "# TYPE rows_total counter",
+            'rows_total{query="summary"} 4',
+        ]
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("duration_seconds", "Duration", ("stage",), buckets=(0.1, 1.0))
+
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value, "auth")
+
+        assert histogram.count("auth") == 4
+        assert list(histogram.collect())[2:] == [
+            'duration_seconds_bucket{stage="auth",le="0.1"} 2',
+            'duration_seconds_bucket{stage="auth",le="1.0"} 3',
+            'duration_seconds_bucket{stage="auth",le="+Inf"} 4',
+            'duration_seconds_sum{stage="auth"} 2.65',
+            'duration_seconds_count{stage="auth"} 4',
+        ]
+
+    def test_histogram_time(self):
+        histogram = Histogram("duration_seconds", "Duration")
+
+        with histogram.time():
+            pass
+
+        assert histogram.count() == 1
+
+    def test_registry_render(self):
+        registry = Registry()
+        counter = Counter("requests_total", "Requests", ("route",))
+        counter.inc('/say "hi"')
+        registry.register(counter)
+        registry.register(CallbackMetric("entries", "Entries", "gauge", ("cache",), lambda: {("user",): 2}))
+
+        assert registry.render().splitlines() == [
+            "# HELP requests_total Requests",
+            "# TYPE requests_total counter",
+            'requests_total{route="/say \\"hi\\""} 1',
+            "# HELP entries Entries",
+            "# TYPE entries gauge",
+            'entries{cache="user"} 2',
+        ]
+
+    def test_registry_render_adds_snapshots(self):
+        registry = Registry()
+        counter = Counter("requests_total", "Requests", ("route",))
+        counter.inc("/a", amount=2)
+        histogram = Histogram("duration_seconds", "Duration", buckets=(1.0,))
+        histogram.observe(0.5)
+        registry.register(counter)
+        registry.register(histogram)
+        other = {"requests_total": [[["/a"], 3], [["/b"], 1]], "duration_seconds": [[[], [0, 1, 2.0]]]}
+
+        assert registry.render([other]).splitlines() == [
+            "# HELP requests_total Requests",
+            "# TYPE requests_total counter",
+            'requests_total{route="/a"} 5',
+            'requests_total{route="/b"} 1',
+            "# HELP duration_seconds Duration",
+            "# TYPE duration_seconds histogram",
+            'duration_seconds_bucket{le="1.0"} 1',
+            'duration_seconds_bucket{le="+Inf"} 2',
+            "duration_seconds_sum 2.5",
+            "duration_seconds_count 2",
+        ]
+
+
+class TestWorkerSnapshots:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.registry = Registry()
+        self.counter = Counter("requests_total", "Requests")
+        self.registry.register(self.counter)
+        self.registry.register(CallbackMetric("entries", "Entries", "gauge", (), lambda: {(): 2}))
+
+    async def test_snapshots_of_other_workers(self, tmp_path):
+        snapshots = WorkerSnapshots(self.registry, str(tmp_path), interval=1)
+        self.counter.inc(amount=4)
+        await snapshots.write()
+        (tmp_path / "1.json").write_text(json.dumps({"requests_total": [[[], 3]], "entries": [[[], 5]]}))
+
+        others = await snapshots.others()
+
+        assert json.loads((tmp_path / f"{os.getpid()}.json").read_text())["requests_total"] == [[[], 4]]
+        assert others == [{"requests_total": [[[], 3]], "entries": [[[], 5]]}]
+        assert "requests_total 7" in self.registry.render(others)
+        assert "entries 7" in self.registry.render(others)
+
+    async def test_exited_workers_keep_counters_only(self, tmp_path):
+        snapshots = WorkerSnapshots(self.registry, str(tmp_path), interval=1)
+        (tmp_path / "1.json").write_text(json.dumps({"requests_total": [[[], 3]], "entries": [[[], 5]]}))
+
+        with patch("core.metrics._alive", return_value=False):
+            others = await snapshots.others()
+
+        assert others == [{"requests_total": [[[], 3]]}]
+
+    def test_close_writes_last_values(self, tmp_path):
+        snapshots = WorkerSnapshots(self.registry, str(tmp_path), interval=1)
+        self.counter.inc()
+
+        snapshots.close()
+
+        assert json.loads((tmp_path / f"{os.getpid()}.json").read_text())["requests_total"] == [[[], 1]]
@@ -0,0 +1,42 @@
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import arrow
+import pytest
+
+from core.partition import RecordPartitions
+
+
+class TestRecordPartitions:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.partitions = RecordPartitions(months_ahead=3, interval=60)
+        self.repository = MagicMock()
+        self.repository.ensure_partitions = AsyncMock(return_value=1)
+        with (
+            patch("core.partition.get_session_factory", return_value=MagicMock()),
+            patch("core.partition.RecordRepository", return_value=self.repository),
+        ):
+            yield
+
+    async def test_ensure_creates_missing_months_once(self):
+        await self.partitions.ensure([datetime(2021, 5, 3, 12), datetime(2021, 5, 20), datetime(2021, 7, 1)])
+        await self.partitions.ensure([datetime(2021, 5, 9)])
+
+        assert self.repository.ensure_partitions.await_args_list == [
+            ((datetime(2021, 5, 1), datetime(2021, 5, 1)),),
+            ((datetime(2021, 7, 1), datetime(2021, 7, 1)),),
+        ]
+
+    async def test_ensure_skips_months_out_of_range(self):
+        await self.partitions.ensure([datetime(1970, 1, 1), arrow.utcnow().shift(years=1).naive])
+
+        self.repository.ensure_partitions.assert_not_called()
+
+    async def test_ensure_retries_after_failure(self):
+        self.repository.ensure_partitions.side_effect = [RuntimeError("database down"), 1]
+
+        await self.partitions.ensure([datetime(2021, 5, 3)])
+        await self.partitions.ensure([datetime(2021, 5, 3)])
+
+        assert self.repository.ensure_partitions.await_count == 2
@@ -0,0 +1,124 @@
+import os
+from unittest.mock import patch
+
+import pytest
+
+from core import server
+from core.server import cpu_count, pool_sizes, run, worker_count
+from core.settings import Settings
+
+
+class TestCpuCount:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, monkeypatch):
+        self.cpu_max = tmp_path / "cpu.max"
+        monkeypatch.setattr(server, "CGROUP_CPU_MAX", self.cpu_max)
+        monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(8)), raising=False)
+
+    def test_affinity_without_cgroup(self):
+        assert cpu_count() == 8
+
+    def test_unlimited_cgroup(self):
+        self.cpu_max.write_text("max 100000\n")
+
+        assert cpu_count() == 8
+
+    def test_cgroup_quota_rounds_up(self):
+        self.cpu_max.write_text("250000 100000\n")
+
+        assert cpu_count() == 3
+
+    def test_cgroup_quota_above_affinity(self):
+        self.cpu_max.write_text("1600000 100000\n")
+
+        assert cpu_count() == 8
+
+    def test_configured_workers(self):
+        assert worker_count(Settings(SERVER_WORKERS=2)) == 2
+        assert worker_count(Settings()) == 8
+
+
+class TestPoolSizes:
+    def test_no_budget_keeps_settings(self):
+        assert pool_sizes(Settings(), 4) == {}
+
+    def test_budget_shared_by_workers(self):
+        settings = Settings(DB_CONNECTION_BUDGET=40, DB_POOL_SIZE=5)
+
+        # 10 per worker, one of them the LISTEN connection
+        assert pool_sizes(settings, 4) == {"DB_POOL_SIZE": 5, "DB_MAX_OVERFLOW": 4}
+
+    def test_small_budget_shrinks_pool(self):
+        settings = Settings(DB_CONNECTION_BUDGET=25, DB_POOL_SIZE=5, CACHE_LISTEN=False)
+
+        assert pool_sizes(settings, 8) == {"DB_POOL_SIZE": 3, "DB_MAX_OVERFLOW": 0}
+
+    def test_budget_too_small(self):
+        with pytest.raises(ValueError, match="DB_CONNECTION_BUDGET"):
+            pool_sizes(Settings(DB_CONNECTION_BUDGET=7), 4)
+
+    def test_replica_pool(self):
+        settings = Settings(
+            DB_CONNECTION_BUDGET=40, POSTGRES_READ_DSN="postgresql://replica/mantra", DB_READ_POOL_SIZE=20
+        )
+
+        assert pool_sizes(settings, 4) == {
+            "DB_POOL_SIZE": 5,
+            "DB_MAX_OVERFLOW": 4,
+            "DB_READ_POOL_SIZE": 10,
+            "DB_READ_MAX_OVERFLOW": 0,
+        }
+
+
+class TestRun:
+    def test_run_starts_workers(self, monkeypatch):
+        monkeypatch.delenv("DB_POOL_SIZE", raising=False)
+        monkeypatch.delenv("DB_MAX_OVERFLOW", raising=False)
+        settings = Settings(SERVER_WORKERS=3, SERVER_PORT=9000, DB_CONNECTION_BUDGET=12, CACHE_LISTEN=False)
+
+        # run() sets the workers' environment, restored for the tests after this one
+        with (
+            patch.dict(os.environ),
+            patch("core.server.uvicorn.run") as uvicorn_run,
+            patch("core.server.configure_logging"),
+        ):
+            run(settings)
+            # Left for the workers' Settings
+            assert Settings().db_pool_size == 4
+            assert Settings().db_max_overflow == 0
+
+        kwargs = uvicorn_run.call_args.kwargs
+        assert uvicorn_run.call_args.args == ("main:app",)
+        assert kwargs["workers"] == 3
+        assert kwargs["port"] == 9000
+        assert kwargs["loop"] in ("uvloop", "asyncio")
+        assert kwargs["http"] in ("httptools", "h11")
+        assert kwargs["timeout_graceful_shutdown"] == 30
+        assert os.path.isfile(os.path.join(kwargs["app_dir"], "main.py"))
+        assert "DB_POOL_SIZE" not in os.environ
+
+    def test_run_shares_metrics_between_workers(self):
+        settings = Settings(SERVER_WORKERS=2, METRICS_DIR="")
+
+        def uvicorn_run(*args, **kwargs):
+            assert os.path.isdir(os.environ["METRICS_DIR"])
+
+        with (
+            patch.dict(os.environ),
+            patch("core.server.uvicorn.run", side_effect=uvicorn_run) as mock_run,
+            patch("core.server.configure_logging"),
+        ):
+            run(settings)
+            metrics_dir = os.environ["METRICS_DIR"]
+
+        mock_run.assert_called_once()
+        # Removed with the server
+        assert not os.path.exists(metrics_dir)
+
+    def test_run_clears_configured_metrics_dir(self, tmp_path):
+        (tmp_path / "123.json").write_text("{}")
+
+        with patch.dict(os.environ), patch("core.server.uvicorn.run"), patch("core.server.configure_logging"):
+            run(Settings(SERVER_WORKERS=2, METRICS_DIR=str(tmp_path)))
+
+        assert list(tmp_path.iterdir()) == []
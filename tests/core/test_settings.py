@@ -0,0 +1,15 @@
+from core.settings import Settings
+
+
+class TestSettings:
+    def test_cache_listen(self, monkeypatch):
+        monkeypatch.delenv("SUMMARY_CACHE_LISTEN", raising=False)
+        monkeypatch.setenv("CACHE_LISTEN", "false")
+
+        assert Settings().cache_listen is False
+
+    def test_cache_listen_former_name(self, monkeypatch):
+        monkeypatch.delenv("CACHE_LISTEN", raising=False)
+        monkeypatch.setenv("SUMMARY_CACHE_LISTEN", "false")
+
+        assert Settings().cache_listen is False
@@ -0,0 +1,84 @@
+import asyncio
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from core.write_buffer import RecordWriteBuffer, RecordWriteResult
+
+USER_ID = "550e8400-e29b-41d4-a716-446655440001"
+
+
+class TestRecordWriteBuffer:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.buffer = RecordWriteBuffer(max_rows=3, max_delay=0.01, max_pending=100)
+        self.repository = MagicMock()
+        self.repository.create_records = AsyncMock(side_effect=self._create_records)
+        with (
+            patch("core.write_buffer.get_session_factory", return_value=MagicMock()),
+            patch("core.write_buffer.RecordRepository", return_value=self.repository),
+        ):
+            yield
+
+    async def _create_records(self, records):
+        return [RecordWriteResult(record["record_id"], True, record["record_id"] != "existing") for record in records]
+
+    async def _create(self, *record_ids: str) -> list[RecordWriteResult]:
+        task = asyncio.create_task(self.buffer.run())
+        try:
+            return await asyncio.gather(
+                *(self.buffer.create_record(USER_ID, record_id, 1, 1, datetime(2024, 1, 1)) for record_id in record_ids)
+            )
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def test_concurrent_records_are_written_together(self):
+        results = await self._create("a", "existing")
+
+        assert results == [RecordWriteResult("a", True, True), RecordWriteResult("existing", True, False)]
+        self.repository.create_records.assert_called_once()
+        assert [record["record_id"] for record in self.repository.create_records.call_args.args[0]] == [
+            "a",
+            "existing",
+        ]
+
+    async def test_batches_are_capped_at_max_rows(self):
+        await self._create("a", "b", "c", "d", "e")
+
+        assert [len(call.args[0]) for call in self.repository.create_records.call_args_list] == [3, 2]
+
+    async def test_repeated_record_is_duplicate(self):
+        results = await self._create("a", "a")
+
+        assert [result.created for result in results] == [True, False]
+        assert len(self.repository.create_records.call_args.args[0]) == 1
+
+    async def test_write_error_reaches_every_caller(self):
+        self.repository.create_records.side_effect = RuntimeError("connection lost")
+
+        with pytest.raises(RuntimeError, match="connection lost"):
+            await self._create("a", "b")
+
+    async def test_bad_record_only_fails_its_caller(self):
+        async def create_records(records):
+            if any(record["record_id"] == "bad" for record in records):
+                raise ValueError("invalid input")
+            return await self._create_records(records)
+
+        self.repository.create_records.side_effect = create_records
+        task = asyncio.create_task(self.buffer.run())
+        try:
+            results = await asyncio.gather(
+                self.buffer.create_record(USER_ID, "bad", 1, 1, datetime(2024, 1, 1)),
+                self.buffer.create_record(USER_ID, "good", 1, 1, datetime(2024, 1, 1)),
+                return_exceptions=True,
+            )
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        assert isinstance(results[0], ValueError)
+        assert results[1] == RecordWriteResult("good", True, True)
+        assert [len(call.args[0]) for call in self.repository.create_records.call_args_list] == [2, 1, 1]
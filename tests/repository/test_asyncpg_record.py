@@ -0,0 +1,34 @@
+from unittest.mock import AsyncMock
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from constant.summary_query import SummaryQuery
+from core.settings import Settings
+from dependency.repository import get_record_repository
+from repository.asyncpg_record import AsyncpgRecordRepository, _summary_sql
+from repository.record import RecordRepository
+
+
+class TestAsyncpgRecordRepository:
+    def test_summary_sql_without_windows(self):
+        sql = _summary_sql(())
+
+        assert "WINDOW" not in sql
+        assert "_sma_" not in sql
+
+    def test_summary_sql_windows(self):
+        sql = _summary_sql((30, 7, 30))
+
+        for column in ("word_count_sma_7", "study_time_sma_7", "word_count_sma_30", "study_time_sma_30"):
+            assert f"AS {column}" in sql
+        assert "w7 AS (PARTITION BY user_id ORDER BY bucket ROWS BETWEEN 6 PRECEDING AND CURRENT ROW)" in sql
+        assert sql.count("w30 AS (PARTITION") == 1
+
+    def test_summary_query_setting_selects_repository(self):
+        db = AsyncMock(spec=AsyncSession)
+
+        default = get_record_repository(db, None, None, Settings())
+        fast = get_record_repository(db, None, None, Settings(SUMMARY_QUERY=SummaryQuery.ASYNCPG))
+
+        assert type(default) is RecordRepository
+        assert isinstance(fast, AsyncpgRecordRepository)
@@ -0,0 +1,64 @@
+import re
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from constant.granularity import Granularity
+from repository.record import RecordRepository
+
+USER_ID = "550e8400-e29b-41d4-a716-446655440001"
+
+
+def _sql(statement) -> str:
+    # The scalar parameters rendered in place, enough to read the window frames and divisors
+    compiled = statement.compile(dialect=postgresql.dialect())
+    return re.sub(r"%\((\w+)\)s", lambda match: str(compiled.params[match.group(1)]), compiled.string)
+
+
+class TestRecordRepository:
+    async def test_rebuild_rollups_notifies_workers(self):
+        db = AsyncMock(spec=AsyncSession)
+
+        await RecordRepository(db).rebuild_rollups([USER_ID])
+
+        sql = _sql(db.execute.call_args_list[-1].args[0])
+        assert "UPDATE users SET record_version=(users.record_version + " in sql
+        assert "RETURNING users.user_id" in sql
+        assert "pg_notify(" in sql
+        db.commit.assert_awaited_once()
+
+    async def test_summary_database_sma(self):
+        db = AsyncMock(spec=AsyncSession)
+        db.execute.return_value = MagicMock()
+
+        await RecordRepository(db).get_record_summary(
+            USER_ID, datetime(2024, 1, 1), datetime(2024, 2, 1), Granularity.DAY, sma_windows=[7, 30]
+        )
+
+        sql = _sql(db.execute.call_args.args[0])
+        for n in (7, 30):
+            frame = (
+                "OVER (PARTITION BY anon_1.user_id ORDER BY anon_1.bucket "
+                f"ROWS BETWEEN {n - 1} PRECEDING AND CURRENT ROW)"
+            )
+            for column in ("word_count", "study_time"):
+                # NULL until the frame holds n buckets, then the frame's sum divided as float8
+                assert (
+                    f"CASE WHEN (count(*) {frame} = {n}) "
+                    f"THEN CAST(sum(CAST(sum(anon_1.{column}) AS BIGINT)) {frame} AS FLOAT) / CAST({n} AS NUMERIC) "
+                    f"END AS {column}_sma_{n}"
+                ) in sql
+
+    async def test_summary_without_sma(self):
+        db = AsyncMock(spec=AsyncSession)
+        db.execute.return_value = MagicMock()
+
+        await RecordRepository(db).get_record_summary(
+            USER_ID, datetime(2024, 1, 1), datetime(2024, 2, 1), Granularity.DAY
+        )
+
+        sql = _sql(db.execute.call_args.args[0])
+        assert " OVER " not in sql
+        assert "_sma_" not in sql
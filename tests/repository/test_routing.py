@@ -0,0 +1,48 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache.recent_writes import RecentWrites
+from repository.user import UserRepository
+
+USER_ID = "550e8400-e29b-41d4-a716-446655440001"
+OTHER_USER_ID = "550e8400-e29b-41d4-a716-446655440002"
+
+
+class TestReadRouting:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.db = AsyncMock(spec=AsyncSession)
+        self.read_db = AsyncMock(spec=AsyncSession)
+        self.recent_writes = RecentWrites(window=5, max_size=10)
+
+    async def test_reads_use_replica(self):
+        await UserRepository(self.db, self.read_db, self.recent_writes).get_user(USER_ID)
+
+        self.read_db.scalar.assert_called_once()
+        self.db.scalar.assert_not_called()
+
+    async def test_reads_use_primary_without_replica(self):
+        await UserRepository(self.db, None, self.recent_writes).get_user(USER_ID)
+
+        self.db.scalar.assert_called_once()
+
+    async def test_reads_after_own_write_use_primary(self):
+        self.recent_writes.add(USER_ID)
+        repository = UserRepository(self.db, self.read_db, self.recent_writes)
+
+        await repository.get_user(USER_ID)
+        await repository.get_user(OTHER_USER_ID)
+
+        self.db.scalar.assert_called_once()
+        self.read_db.scalar.assert_called_once()
+
+    async def test_bulk_reads_use_primary_when_any_user_wrote(self):
+        self.recent_writes.add(OTHER_USER_ID)
+        self.db.scalars.return_value = MagicMock()
+
+        await UserRepository(self.db, self.read_db, self.recent_writes).get_users([USER_ID, OTHER_USER_ID])
+
+        self.db.scalars.assert_called_once()
+        self.read_db.scalars.assert_not_called()
@@ -1,10 +1,21 @@
 from unittest.mock import AsyncMock, MagicMock
 
+import arrow
 import pytest
 from fastapi import HTTPException
 
+from cache.recent_writes import RecentWrites
+from cache.record_version import RecordVersionCache
+from cache.summary import SummaryCache
+from cache.user import UserExistenceCache
+from constant.record_status import RecordStatus
+from core.partition import RecordPartitions
+from core.write_buffer import RecordWriteBuffer
 from service.record import RecordService
 
+USER_ID = "550e8400-e29b-41d4-a716-446655440001"
+MISSING_USER_ID = "550e8400-e29b-41d4-a716-446655440099"
+
 
 class TestRecordService:
     @pytest.fixture(autouse=True)
@@ -13,34 +24,202 @@ class TestRecordService:
         self.mock_record_repo = mock_record_repository
         self.record_service = RecordService(mock_record_repository, mock_user_repository)
 
+    def _mock_result(self, record_id: str, user_exists: bool = True, created: bool = True) -> MagicMock:
+        result = MagicMock()
+        result.record_id = record_id
+        result.user_exists = user_exists
+        result.created = created
+        return result
+
     @pytest.mark.asyncio
     async def test_create_record_success(self):
-        user_id = "test_user_123"
+        user_id = USER_ID
         word_count = 100
         study_time = 3600
         timestamp = 1640995200
 
-        mock_user = MagicMock()
-        mock_user.user_id = user_id
-        self.mock_user_repo.get_user.return_value = mock_user
-
-        self.mock_record_repo.get_record.return_value = None
-        self.mock_record_repo.create_record.return_value = None
+        self.mock_record_repo.create_record.return_value = self._mock_result("record_id")
 
         result = await self.record_service.create_record(user_id, word_count, study_time, timestamp)
 
         assert result is None
-        self.mock_user_repo.get_user.assert_called_once_with(user_id)
-        self.mock_record_repo.get_record.assert_called_once()
+        self.mock_user_repo.get_user.assert_not_called()
+        self.mock_record_repo.get_record.assert_not_called()
         self.mock_record_repo.create_record.assert_called_once()
+        args = self.mock_record_repo.create_record.call_args.args
+        assert args[0] == user_id
+        assert args[2:] == (word_count, study_time, arrow.get(timestamp).naive)
 
     @pytest.mark.asyncio
     async def test_create_record_user_not_found(self):
-        user_id = "nonexistent_user"
-        self.mock_user_repo.get_user.return_value = None
+        user_id = MISSING_USER_ID
+        self.mock_record_repo.create_record.return_value = self._mock_result("record_id", False, False)
 
         with pytest.raises(HTTPException) as exc_info:
             await self.record_service.create_record(user_id, 100, 3600, 1640995200)
 
         assert exc_info.value.status_code == 404
         assert f"User {user_id} not found" in str(exc_info.value.detail)
+
+    async def test_create_record_duplicate(self):
+        self.mock_record_repo.create_record.return_value = self._mock_result("record_id", True, False)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await self.record_service.create_record(USER_ID, 100, 3600, 1640995200)
+
+        assert exc_info.value.status_code == 400
+        assert "already exists" in str(exc_info.value.detail)
+
+    async def test_create_record_without_timestamp_twice_is_duplicate(self, monkeypatch):
+        # The repository only rejects a record with the same record_id and date, as the unique index does
+        stored = set()
+
+        async def create_record(user_id, record_id, word_count, study_time, date):
+            created = (record_id, date) not in stored
+            stored.add((record_id, date))
+            return self._mock_result(record_id, True, created)
+
+        self.mock_record_repo.create_record.side_effect = create_record
+        instants = iter([arrow.get(1640995200.25), arrow.get(1640995200.75)])
+        monkeypatch.setattr(arrow, "utcnow", lambda: next(instants))
+
+        await self.record_service.create_record(USER_ID, 100, 3600, None)
+        with pytest.raises(HTTPException) as exc_info:
+            await self.record_service.create_record(USER_ID, 100, 3600, None)
+
+        assert exc_info.value.status_code == 400
+        assert self.mock_record_repo.create_record.call_args.args[4] == arrow.get(1640995200).naive
+
+    async def test_create_records_reports_status(self):
+        user_id = USER_ID
+        records = [
+            {"word_count": 100, "study_time": 3600, "timestamp": 1640995200},
+            {"word_count": 200, "study_time": 1800, "timestamp": 1640995300},
+            {"word_count": 100, "study_time": 3600, "timestamp": 1640995200},
+        ]
+
+        async def create_records(new_records):
+            # The second record already exists in the database
+            return [
+                self._mock_result(new_records[0]["record_id"]),
+                self._mock_result(new_records[1]["record_id"], created=False),
+            ]
+
+        self.mock_record_repo.create_records.side_effect = create_records
+
+        result = await self.record_service.create_records(user_id, records)
+
+        assert [item["status"] for item in result] == [
+            RecordStatus.CREATED,
+            RecordStatus.DUPLICATE,
+            RecordStatus.DUPLICATE,
+        ]
+        assert result[0]["record_id"] == result[2]["record_id"]
+        new_records = self.mock_record_repo.create_records.call_args.args[0]
+        assert len(new_records) == 2
+        assert new_records[0]["user_id"] == user_id
+        assert new_records[0]["word_count"] == 100
+
+    async def test_create_records_user_not_found(self):
+        self.mock_record_repo.create_records.return_value = [self._mock_result("record_id", False, False)]
+
+        with pytest.raises(HTTPException) as exc_info:
+            await self.record_service.create_records(MISSING_USER_ID, [{"word_count": 1, "study_time": 1}])
+
+        assert exc_info.value.status_code == 404
+
+    async def test_create_record_invalidates_summary_cache(self):
+        summary_cache = MagicMock(spec=SummaryCache)
+        record_service = RecordService(self.mock_record_repo, self.mock_user_repo, summary_cache)
+        self.mock_record_repo.create_record.return_value = self._mock_result("record_id")
+
+        await record_service.create_record(USER_ID, 100, 3600, 1640995200)
+
+        summary_cache.invalidate.assert_called_once_with(USER_ID)
+
+    async def test_create_record_keeps_reads_on_primary(self):
+        recent_writes = RecentWrites(window=5, max_size=10)
+        record_service = RecordService(self.mock_record_repo, self.mock_user_repo, recent_writes=recent_writes)
+        self.mock_record_repo.create_record.return_value = self._mock_result("record_id")
+
+        await record_service.create_record(USER_ID, 100, 3600, 1640995200)
+
+        assert recent_writes.contains(USER_ID)
+
+    async def test_create_record_invalidates_record_version(self):
+        record_version_cache = RecordVersionCache(max_size=10, ttl=60)
+        record_version_cache.set(USER_ID, 4, record_version_cache.invalidations(USER_ID))
+        record_service = RecordService(
+            self.mock_record_repo, self.mock_user_repo, record_version_cache=record_version_cache
+        )
+        self.mock_record_repo.create_record.return_value = self._mock_result("record_id")
+
+        await record_service.create_record(USER_ID, 100, 3600, 1640995200)
+
+        assert record_version_cache.get(USER_ID) is None
+
+    async def test_create_record_for_cached_missing_user(self):
+        user_cache = UserExistenceCache(max_size=10, negative_ttl=5)
+        record_service = RecordService(self.mock_record_repo, self.mock_user_repo, user_cache=user_cache)
+        self.mock_record_repo.create_record.return_value = self._mock_result("record_id", False, False)
+
+        for _ in range(2):
+            with pytest.raises(HTTPException) as exc_info:
+                await record_service.create_record(MISSING_USER_ID, 100, 3600, 1640995200)
+            assert exc_info.value.status_code == 404
+
+        self.mock_record_repo.create_record.assert_called_once()
+
+    async def test_create_record_ensures_partition(self):
+        partitions = AsyncMock(spec=RecordPartitions)
+        self.mock_record_repo.create_record.return_value = self._mock_result("record_id")
+        record_service = RecordService(self.mock_record_repo, self.mock_user_repo, partitions=partitions)
+
+        await record_service.create_record(USER_ID, 100, 3600, 1640995200)
+
+        partitions.ensure.assert_awaited_once_with([arrow.get(1640995200).naive])
+
+    async def test_create_records_ensures_partitions(self):
+        partitions = AsyncMock(spec=RecordPartitions)
+        self.mock_record_repo.create_records.return_value = [self._mock_result("record_id")]
+        record_service = RecordService(self.mock_record_repo, self.mock_user_repo, partitions=partitions)
+
+        await record_service.create_records(
+            USER_ID,
+            [
+                {"word_count": 1, "study_time": 1, "timestamp": 1609459200},
+                {"word_count": 2, "study_time": 2, "timestamp": 1640995200},
+            ],
+        )
+
+        assert list(partitions.ensure.await_args.args[0]) == [arrow.get(1609459200).naive, arrow.get(1640995200).naive]
+
+    async def test_create_record_through_write_buffer(self):
+        write_buffer = AsyncMock(spec=RecordWriteBuffer)
+        write_buffer.create_record.return_value = self._mock_result("record_id")
+        record_service = RecordService(self.mock_record_repo, self.mock_user_repo, write_buffer=write_buffer)
+
+        await record_service.create_record(USER_ID, 100, 3600, 1640995200)
+
+        write_buffer.create_record.assert_called_once()
+        self.mock_record_repo.create_record.assert_not_called()
+
+    @pytest.mark.parametrize("buffered", [False, True])
+    async def test_create_record_user_id_that_is_not_a_uuid(self, buffered: bool):
+        write_buffer = RecordWriteBuffer(max_rows=10, max_delay=0.01, max_pending=10) if buffered else None
+        record_service = RecordService(self.mock_record_repo, self.mock_user_repo, write_buffer=write_buffer)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await record_service.create_record("not-a-uuid", 100, 3600, 1640995200)
+
+        assert exc_info.value.status_code == 404
+        self.mock_record_repo.create_record.assert_not_called()
+        if write_buffer is not None:
+            assert write_buffer.pending() == 0
+
+    async def test_create_records_user_id_that_is_not_a_uuid(self):
+        with pytest.raises(HTTPException) as exc_info:
+            await self.record_service.create_records("not-a-uuid", [{"word_count": 1, "study_time": 1}])
+
+        assert exc_info.value.status_code == 404
+        self.mock_record_repo.create_records.assert_not_called()
@@ -1,10 +1,17 @@
-from unittest.mock import AsyncMock, MagicMock
+import random
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import arrow
 import pytest
 from fastapi import HTTPException
 
+from cache.record_version import RecordVersionCache
+from cache.summary import SummaryCache
+from cache.user import UserExistenceCache
 from constant.granularity import Granularity
+from constant.moving_average import MovingAverage, MovingAverageSource
 from service.user import UserService
 
 
@@ -78,3 +85,322 @@ class TestUserService:
         result = await self.user_service.get_user_summary(user_id, 1640995200, 1672531199, Granularity.DAY)
 
         assert result == []
+
+    def _mock_records(self, totals: list[tuple[int, int]]) -> list[MagicMock]:
+        records = []
+        for i, (total_words, total_time) in enumerate(totals):
+            record = MagicMock()
+            record.bucket = f"2022-01-{i + 1:02d}"
+            record.total_words = total_words
+            record.total_time = total_time
+            records.append(record)
+        return records
+
+    async def test_get_user_summary_with_sma(self):
+        self.mock_user_repo.get_user.return_value = MagicMock()
+        self.mock_record_repo.get_record_summary.return_value = self._mock_records([(100, 10), (150, 20), (201, 31)])
+
+        result = await self.user_service.get_user_summary("test_user_123", 1640995200, 1672531199, Granularity.DAY, n=2)
+
+        assert "word_count_sma" not in result[0]
+        assert result[1]["word_count_sma"] == 125.0
+        assert result[1]["study_time_sma"] == 15.0
+        assert result[2]["word_count_sma"] == 175.5
+        assert result[2]["study_time_sma"] == 25.5
+
+    async def test_get_user_summary_with_several_windows(self):
+        self.mock_user_repo.get_user.return_value = MagicMock()
+        self.mock_record_repo.get_record_summary.return_value = self._mock_records([(100, 10), (150, 20), (200, 30)])
+
+        result = await self.user_service.get_user_summary(
+            "test_user_123", 1640995200, 1672531199, Granularity.DAY, n=[1, 3], method=MovingAverage.WMA
+        )
+
+        assert result[0] == {
+            "date": "2022-01-01",
+            "word_count": 100,
+            "study_time": 10,
+            "word_count_wma_1": 100.0,
+            "study_time_wma_1": 10.0,
+        }
+        assert result[2]["word_count_wma_3"] == round((100 + 2 * 150 + 3 * 200) / 6, 2)
+        assert result[2]["study_time_wma_3"] == round((10 + 2 * 20 + 3 * 30) / 6, 2)
+        assert "word_count_wma_3" not in result[1]
+
+    async def test_get_user_summary_database_sma_reads_repository_averages(self):
+        # The rows stand in for get_record_summary's averages, test_record.py checks the statement computing them
+        rnd = random.Random(7)
+        totals = [(rnd.randrange(0, 1000), rnd.randrange(0, 10000)) for _ in range(60)]
+        windows = [1, 3, 7, 30]
+        self.mock_user_repo.get_user.return_value = MagicMock()
+        self.mock_record_repo.get_record_summary.return_value = self._mock_records(totals)
+        expected = await self.user_service.get_user_summary(
+            "test_user_123", 1640995200, 1672531199, Granularity.DAY, n=windows
+        )
+
+        # Rows as returned by get_record_summary(..., sma_windows=windows): window sum / n, NULL until the window is full
+        rows = self._mock_records(totals)
+        for i, row in enumerate(rows):
+            for window in windows:
+                full = i >= window - 1
+                window_totals = totals[i - window + 1 : i + 1]
+                setattr(row, f"word_count_sma_{window}", sum(t[0] for t in window_totals) / window if full else None)
+                setattr(row, f"study_time_sma_{window}", sum(t[1] for t in window_totals) / window if full else None)
+        self.mock_record_repo.get_record_summary.reset_mock()
+        self.mock_record_repo.get_record_summary.return_value = rows
+        user_service = UserService(
+            self.mock_record_repo, self.mock_user_repo, moving_average_source=MovingAverageSource.DATABASE
+        )
+
+        result = await user_service.get_user_summary(
+            "test_user_123", 1640995200, 1672531199, Granularity.DAY, n=windows
+        )
+
+        assert result == expected
+        self.mock_record_repo.get_record_summary.assert_called_once_with(
+            "test_user_123",
+            arrow.get(1640995200).naive,
+            arrow.get(1672531199).naive,
+            Granularity.DAY,
+            sma_windows=windows,
+        )
+
+    async def test_get_user_summary_with_statistics(self):
+        self.mock_user_repo.get_user.return_value = MagicMock()
+        records = self._mock_records([(100, 10), (150, 20)])
+        for record in records:
+            record.record_count = 2
+            for field in ("word_count", "study_time"):
+                for name, value in (("min", 40), ("max", 60), ("avg", 50.0), ("stddev", 14.142135), ("p50", 50.0)):
+                    setattr(record, f"{field}_{name}", value)
+                setattr(record, f"{field}_p95", 59.0)
+        records[1].word_count_stddev = None
+        self.mock_record_repo.get_record_summary.return_value = records
+
+        result = await self.user_service.get_user_summary(
+            "test_user_123", 1640995200, 1672531199, Granularity.DAY, n=2, statistics=True
+        )
+
+        assert result[0] == {
+            "date": "2022-01-01",
+            "word_count": 100,
+            "study_time": 10,
+            "record_count": 2,
+            "word_count_min": 40,
+            "word_count_max": 60,
+            "word_count_avg": 50.0,
+            "word_count_stddev": 14.14,
+            "word_count_p50": 50.0,
+            "word_count_p95": 59.0,
+            "study_time_min": 40,
+            "study_time_max": 60,
+            "study_time_avg": 50.0,
+            "study_time_stddev": 14.14,
+            "study_time_p50": 50.0,
+            "study_time_p95": 59.0,
+        }
+        assert result[1]["word_count_sma"] == 125.0
+        assert result[1]["word_count_stddev"] is None
+        self.mock_record_repo.get_record_summary.assert_called_once_with(
+            "test_user_123",
+            arrow.get(1640995200).naive,
+            arrow.get(1672531199).naive,
+            Granularity.DAY,
+            statistics=True,
+        )
+
+    async def test_get_user_summary_uses_cache(self):
+        summary_cache = SummaryCache(max_buckets=10, ttl=60)
+        user_service = UserService(self.mock_record_repo, self.mock_user_repo, summary_cache=summary_cache)
+        self.mock_user_repo.get_user.return_value = MagicMock()
+        self.mock_record_repo.get_record_summary.return_value = self._mock_records([(100, 10), (150, 20)])
+
+        first = await user_service.get_user_summary("test_user_123", 1640995200, 1672531199, Granularity.DAY, n=2)
+        second = await user_service.get_user_summary("test_user_123", 1640995200, 1672531199, Granularity.DAY, n=2)
+        summary_cache.invalidate("test_user_123")
+        third = await user_service.get_user_summary("test_user_123", 1640995200, 1672531199, Granularity.DAY, n=2)
+
+        assert first == second == third
+        assert self.mock_record_repo.get_record_summary.call_count == 2
+        assert summary_cache.stats()["hits"] == 1
+
+    async def test_get_user_summary_uses_user_cache(self):
+        user_cache = UserExistenceCache(max_size=10, negative_ttl=5)
+        user_service = UserService(self.mock_record_repo, self.mock_user_repo, user_cache=user_cache)
+        self.mock_user_repo.get_user.return_value = MagicMock()
+        self.mock_record_repo.get_record_summary.return_value = []
+
+        for _ in range(2):
+            await user_service.get_user_summary("test_user_123", 1640995200, 1672531199, Granularity.DAY)
+
+        self.mock_user_repo.get_user.assert_called_once_with("test_user_123")
+
+    async def test_get_record_version_uses_cache(self):
+        record_version_cache = RecordVersionCache(max_size=10, ttl=60)
+        user_service = UserService(
+            self.mock_record_repo, self.mock_user_repo, record_version_cache=record_version_cache
+        )
+        self.mock_user_repo.get_record_version.return_value = 7
+
+        first = await user_service.get_record_version("test_user_123")
+        second = await user_service.get_record_version("test_user_123")
+        record_version_cache.invalidate("test_user_123")
+        self.mock_user_repo.get_record_version.return_value = 8
+        third = await user_service.get_record_version("test_user_123")
+
+        assert (first, second, third) == (7, 7, 8)
+        assert self.mock_user_repo.get_record_version.call_count == 2
+
+    async def test_get_record_version_sees_other_workers_writes_after_ttl(self):
+        # Without CACHE_LISTEN nothing tells this worker about a write through another one
+        user_service = UserService(
+            self.mock_record_repo, self.mock_user_repo, record_version_cache=RecordVersionCache(max_size=10, ttl=60)
+        )
+        self.mock_user_repo.get_record_version.return_value = 7
+        with patch("cache.record_version.time.monotonic", return_value=1000):
+            await user_service.get_record_version("test_user_123")
+
+        self.mock_user_repo.get_record_version.return_value = 8
+        with patch("cache.record_version.time.monotonic", return_value=1030):
+            assert await user_service.get_record_version("test_user_123") == 7
+        with patch("cache.record_version.time.monotonic", return_value=1061):
+            assert await user_service.get_record_version("test_user_123") == 8
+
+    async def test_get_user_summary_cached_per_record_version(self):
+        user_service = UserService(self.mock_record_repo, self.mock_user_repo, summary_cache=SummaryCache(10, 60))
+        self.mock_user_repo.get_user.return_value = MagicMock()
+        self.mock_record_repo.get_record_summary.return_value = self._mock_records([(100, 10)])
+        await user_service.get_user_summary("test_user_123", 1640995200, 1672531199, Granularity.DAY, record_version=7)
+
+        self.mock_record_repo.get_record_summary.return_value = self._mock_records([(100, 10), (150, 20)])
+        cached = await user_service.get_user_summary(
+            "test_user_123", 1640995200, 1672531199, Granularity.DAY, record_version=7
+        )
+        newer = await user_service.get_user_summary(
+            "test_user_123", 1640995200, 1672531199, Granularity.DAY, record_version=8
+        )
+
+        assert (len(cached), len(newer)) == (1, 2)
+
+    async def test_get_record_version_user_not_found(self):
+        user_cache = UserExistenceCache(max_size=10, negative_ttl=5)
+        user_service = UserService(self.mock_record_repo, self.mock_user_repo, user_cache=user_cache)
+        self.mock_user_repo.get_record_version.return_value = None
+
+        for _ in range(2):
+            with pytest.raises(HTTPException) as exc_info:
+                await user_service.get_record_version("nonexistent_user")
+            assert exc_info.value.status_code == 404
+
+        self.mock_user_repo.get_record_version.assert_called_once_with("nonexistent_user")
+
+    async def test_stream_user_summary_matches_get_user_summary(self):
+        totals = [(100, 10), (150, 20), (200, 30), (50, 40)]
+        self.mock_user_repo.get_user.return_value = MagicMock()
+        self.mock_record_repo.get_record_summary.return_value = self._mock_records(totals)
+        expected = await self.user_service.get_user_summary(
+            "test_user_123", 1640995200, 1672531199, Granularity.DAY, n=[2, 3], method=MovingAverage.EMA
+        )
+
+        async def rows():
+            for row in self._mock_records(totals):
+                yield row
+
+        self.mock_record_repo.stream_record_summary = MagicMock(return_value=rows())
+        summaries = await self.user_service.stream_user_summary(
+            "test_user_123", 1640995200, 1672531199, Granularity.DAY, n=[2, 3], method=MovingAverage.EMA
+        )
+
+        assert [summary async for summary in summaries] == expected
+
+    async def test_stream_user_summary_user_not_found(self):
+        self.mock_user_repo.get_user.return_value = None
+        self.mock_record_repo.stream_record_summary = MagicMock()
+
+        with pytest.raises(HTTPException) as exc_info:
+            await self.user_service.stream_user_summary("nonexistent_user", 1640995200, 1672531199, Granularity.DAY)
+
+        assert exc_info.value.status_code == 404
+        self.mock_record_repo.stream_record_summary.assert_not_called()
+
+    def _page_repository(self, records: list[MagicMock]) -> None:
+        # Serves get_record_summary_page from the records, whose buckets are days from 2022-01-01
+        async def get_record_summary_page(user_id, start, end, granularity, limit, after=None, lookback=0, **kw):
+            page = [record for record in records if after is None or record.bucket > after][:limit]
+            previous = [record for record in records if after is not None and record.bucket <= after]
+            if lookback is not None:
+                previous = previous[len(previous) - lookback :] if lookback else []
+            return previous + page
+
+        for i, record in enumerate(records):
+            record.bucket = datetime(2022, 1, 1) + timedelta(days=i)
+        self.mock_record_repo.get_record_summary.return_value = records
+        self.mock_record_repo.get_record_summary_page.side_effect = get_record_summary_page
+
+    @pytest.mark.parametrize("method", list(MovingAverage))
+    async def test_get_user_summary_page_matches_get_user_summary(self, method: MovingAverage):
+        rnd = random.Random(23)
+        self._page_repository(self._mock_records([(rnd.randrange(1000), rnd.randrange(10000)) for _ in range(25)]))
+        self.mock_user_repo.get_user.return_value = MagicMock()
+        expected = await self.user_service.get_user_summary(
+            "test_user_123", 1640995200, 1672531199, Granularity.DAY, n=[3, 5], method=method
+        )
+
+        pages, after = [], None
+        while True:
+            page, after = await self.user_service.get_user_summary_page(
+                "test_user_123", 1640995200, 1672531199, Granularity.DAY, 4, after, n=[3, 5], method=method
+            )
+            pages.append(page)
+            if after is None:
+                break
+
+        assert [len(page) for page in pages] == [4, 4, 4, 4, 4, 4, 1]
+        assert [summary for page in pages for summary in page] == expected
+        lookback = self.mock_record_repo.get_record_summary_page.call_args.kwargs["lookback"]
+        assert lookback == (None if method == MovingAverage.EMA else 4)
+
+    async def test_get_user_summary_page_invalid_cursor(self):
+        with pytest.raises(HTTPException) as exc_info:
+            await self.user_service.get_user_summary_page(
+                "test_user_123", 1640995200, 1672531199, Granularity.DAY, 10, "not a cursor"
+            )
+
+        assert exc_info.value.status_code == 400
+        self.mock_record_repo.get_record_summary_page.assert_not_called()
+
+    async def test_get_users_summary_computes_averages_per_user(self):
+        user_ids = ["550e8400-e29b-41d4-a716-446655440001", "550e8400-e29b-41d4-a716-446655440002"]
+        self.mock_user_repo.get_users.return_value = [MagicMock(user_id=uuid.UUID(user_id)) for user_id in user_ids]
+        first, second = self._mock_records([(100, 10), (150, 20)]), self._mock_records([(300, 30), (500, 50)])
+        for user_id, records in zip(user_ids, (first, second)):
+            for record in records:
+                record.user_id = uuid.UUID(user_id)
+        self.mock_record_repo.get_record_summaries.return_value = first + second
+        self.mock_record_repo.get_record_summary.side_effect = [first, second]
+        expected = {
+            user_id: await self.user_service.get_user_summary(user_id, 1640995200, 1672531199, Granularity.DAY, n=2)
+            for user_id in user_ids
+        }
+
+        # A repeated user id is summarized once
+        result = await self.user_service.get_users_summary(
+            [*user_ids, user_ids[0]], 1640995200, 1672531199, Granularity.DAY, n=2
+        )
+
+        assert result == expected
+        self.mock_user_repo.get_users.assert_called_once_with(user_ids)
+        self.mock_record_repo.get_record_summaries.assert_called_once_with(
+            user_ids, arrow.get(1640995200).naive, arrow.get(1672531199).naive, Granularity.DAY
+        )
+
+    async def test_get_users_summary_user_not_found(self):
+        user_ids = ["550e8400-e29b-41d4-a716-446655440001", "550e8400-e29b-41d4-a716-446655440002"]
+        self.mock_user_repo.get_users.return_value = [MagicMock(user_id=uuid.UUID(user_ids[0]))]
+
+        with pytest.raises(HTTPException) as exc_info:
+            await self.user_service.get_users_summary(user_ids, 1640995200, 1672531199, Granularity.DAY)
+
+        assert exc_info.value.status_code == 404
+        assert user_ids[1] in str(exc_info.value.detail)
+        self.mock_record_repo.get_record_summaries.assert_not_called()
@@ -0,0 +1,20 @@
+from datetime import datetime
+
+import pytest
+
+from util.cursor import decode_cursor, encode_cursor
+
+
+class TestCursor:
+    def test_round_trip(self):
+        bucket = datetime(2024, 5, 15, 13)
+
+        cursor = encode_cursor(bucket)
+
+        assert "=" not in cursor
+        assert decode_cursor(cursor) == bucket
+
+    @pytest.mark.parametrize("cursor", ["", "not a cursor", "bm90IGEgbnVtYmVy", "é"])
+    def test_decode_invalid(self, cursor: str):
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            decode_cursor(cursor)
@@ -0,0 +1,23 @@
+import pytest
+
+from util.etag import etag_matches, make_etag
+
+
+class TestEtag:
+    def test_make_etag(self):
+        assert make_etag(42) == 'W/"42"'
+
+    @pytest.mark.parametrize(
+        ("if_none_match", "expected"),
+        [
+            (None, False),
+            ("", False),
+            ('W/"42"', True),
+            ('"42"', True),
+            ('W/"41", W/"42"', True),
+            ('W/"41"', False),
+            ("*", True),
+        ],
+    )
+    def test_etag_matches(self, if_none_match: str | None, expected: bool):
+        assert etag_matches(if_none_match, make_etag(42)) is expected
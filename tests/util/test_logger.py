@@ -0,0 +1,89 @@
+import io
+import json
+import logging
+import queue
+import sys
+from logging.handlers import QueueListener
+
+from core.contextvar.trace_id import trace_id_ctx
+from util.logger import DeferredFormatQueueHandler, JsonFormatter, SamplingFilter, TraceIdFilter
+
+
+def _record(message: str, *args, level: int = logging.INFO, exc_info=None) -> logging.LogRecord:
+    return logging.LogRecord("test", level, __file__, 1, message, args, exc_info)
+
+
+class TestLogger:
+    def test_json_formatter_escapes_message(self):
+        record = _record('quoted "%s"\nand a \\ backslash', "value")
+        record.trace_id = "trace-1"
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        assert entry["message"] == 'quoted "value"\nand a \\ backslash'
+        assert entry["level"] == "INFO"
+        assert entry["logger"] == "test"
+        assert entry["trace_id"] == "trace-1"
+        assert "exception" not in entry
+
+    def test_json_formatter_includes_exception(self):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = _record("failed", level=logging.ERROR, exc_info=sys.exc_info())
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        assert "ValueError: boom" in entry["exception"]
+
+    def test_sampling_filter_keeps_warnings(self):
+        drop_all = SamplingFilter(0)
+        keep_all = SamplingFilter(1)
+
+        assert not drop_all.filter(_record("info"))
+        assert not drop_all.filter(_record("debug", level=logging.DEBUG))
+        assert drop_all.filter(_record("warning", level=logging.WARNING))
+        assert drop_all.filter(_record("error", level=logging.ERROR))
+        assert keep_all.filter(_record("info"))
+
+    def test_sampling_filter_rate(self):
+        sampling = SamplingFilter(0.25)
+
+        kept = sum(sampling.filter(_record("info")) for _ in range(10_000))
+
+        assert 2000 < kept < 3000
+
+    def test_queue_handler_formats_on_listener(self):
+        log_queue = queue.SimpleQueue()
+        handler = DeferredFormatQueueHandler(log_queue)
+        handler.addFilter(TraceIdFilter())
+        stream = io.StringIO()
+        console = logging.StreamHandler(stream)
+        console.setFormatter(JsonFormatter())
+        listener = QueueListener(log_queue, console)
+        logger = logging.getLogger("test_queue_handler")
+        logger.propagate = False
+        # Not left to the root level other tests may have set
+        logger.setLevel(logging.INFO)
+        logger.addHandler(handler)
+        token = trace_id_ctx.set("trace-2")
+        try:
+            listener.start()
+            args = ["mutable"]
+            logger.info("value %s", args)
+            # Changed after the call returned, the logged message keeps the value at call time
+            args.append("later")
+            try:
+                raise RuntimeError("queued")
+            except RuntimeError:
+                logger.exception("failed")
+            listener.stop()
+        finally:
+            trace_id_ctx.reset(token)
+            logger.removeHandler(handler)
+
+        first, second = (json.loads(line) for line in stream.getvalue().splitlines())
+        assert first["message"] == "value ['mutable']"
+        assert first["trace_id"] == "trace-2"
+        assert second["level"] == "ERROR"
+        assert "RuntimeError: queued" in second["exception"]
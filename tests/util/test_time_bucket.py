@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import pytest
+
+from constant.granularity import Granularity
+from util.time_bucket import ceil_bucket, floor_bucket, next_bucket
+
+
+class TestTimeBucket:
+    @pytest.mark.parametrize(
+        ("granularity", "expected"),
+        [
+            (Granularity.HOUR, datetime(2024, 5, 15, 13)),
+            (Granularity.DAY, datetime(2024, 5, 15)),
+            (Granularity.WEEK, datetime(2024, 5, 13)),
+            (Granularity.MONTH, datetime(2024, 5, 1)),
+        ],
+    )
+    def test_floor_bucket(self, granularity: Granularity, expected: datetime):
+        assert floor_bucket(datetime(2024, 5, 15, 13, 45, 10), granularity) == expected
+
+    @pytest.mark.parametrize(
+        ("granularity", "expected"),
+        [
+            (Granularity.HOUR, datetime(2024, 5, 15, 14)),
+            (Granularity.DAY, datetime(2024, 5, 16)),
+            (Granularity.WEEK, datetime(2024, 5, 20)),
+            (Granularity.MONTH, datetime(2024, 6, 1)),
+        ],
+    )
+    def test_ceil_bucket(self, granularity: Granularity, expected: datetime):
+        assert ceil_bucket(datetime(2024, 5, 15, 13, 45, 10), granularity) == expected
+
+    def test_ceil_bucket_on_boundary(self):
+        assert ceil_bucket(datetime(2024, 5, 1), Granularity.MONTH) == datetime(2024, 5, 1)
+
+    @pytest.mark.parametrize(
+        ("value", "expected"),
+        [
+            (datetime(2024, 5, 1), datetime(2024, 6, 1)),
+            (datetime(2024, 12, 15, 13), datetime(2025, 1, 1)),
+        ],
+    )
+    def test_next_bucket(self, value: datetime, expected: datetime):
+        assert next_bucket(value, Granularity.MONTH) == expected